@@ -2,42 +2,121 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
 import os
+import json
 from flask_jwt_extended import JWTManager
+from .replicas import RoutingSession, init_replicas
 
 
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 jwt = JWTManager()
 
 def create_app():
     app = Flask(__name__, static_folder='/app/uploads', static_url_path='/uploads')
     CORS(app)
 
+    # Fast JSON encoding and gzip/brotli for large responses
+    from .encoding import FastJSONProvider, compress_response
+    app.json = FastJSONProvider(app)
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    app.config['COMPRESS_GZIP_LEVEL'] = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    app.config['COMPRESS_BROTLI_QUALITY'] = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))
+    app.after_request(compress_response)
+
     app.config['JWT_SECRET_KEY'] = os.getenv("JWT_SECRET_KEY", "supersecretjwt")
     jwt.init_app(app)
-    app.config["SQLALCHEMY_DATABASE_URI"] = "postgresql://postgres:postgres@db:5432/pm_portal"
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DATABASE_URL", "postgresql://postgres:postgres@db:5432/pm_portal")
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.secret_key = os.getenv('SECRET_KEY', 'supersecret')
 
+    # Optional read replicas for GET requests (comma separated URLs)
+    app.config['REPLICA_STICKY_SECONDS'] = float(os.getenv('REPLICA_STICKY_SECONDS', 5))
+    app.config['REPLICA_RETRY_SECONDS'] = float(os.getenv('REPLICA_RETRY_SECONDS', 30))
+    init_replicas(app, os.getenv('DATABASE_REPLICA_URLS', ''))
+
+    # Notification and activity log partitions and retention (scripts/maintain_db.py)
+    app.config['PARTITION_MONTHS_AHEAD'] = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))
+    app.config['NOTIFICATION_RETENTION_DAYS'] = int(os.getenv('NOTIFICATION_RETENTION_DAYS', 90))
+    app.config['NOTIFICATION_ARCHIVE'] = os.getenv('NOTIFICATION_ARCHIVE', 'false').lower() == 'true'
+    # Activity log partitions older than this many months are dropped (0 keeps all)
+    app.config['ACTIVITY_LOG_RETENTION_MONTHS'] = int(os.getenv('ACTIVITY_LOG_RETENTION_MONTHS', 0))
+    # Same-type notifications for the same task and recipient within this many
+    # seconds are merged into one row (0 disables coalescing)
+    app.config['NOTIFICATION_COALESCE_SECONDS'] = int(os.getenv('NOTIFICATION_COALESCE_SECONDS', 300))
+
+    # How long a user's project memberships are cached per worker (0 checks every request)
+    app.config['MEMBERSHIP_CACHE_SECONDS'] = float(os.getenv('MEMBERSHIP_CACHE_SECONDS', 5))
+
+    # GET /sync: changes per kind before the client is told to reload, and
+    # how long deletions are remembered
+    app.config['SYNC_MAX_ROWS'] = int(os.getenv('SYNC_MAX_ROWS', 1000))
+    app.config['SYNC_TOMBSTONE_DAYS'] = int(os.getenv('SYNC_TOMBSTONE_DAYS', 30))
+
+    # Background jobs (scripts/run_scheduler.py): due date alerts and maintenance
+    app.config['SCHEDULER_LOCK_ID'] = int(os.getenv('SCHEDULER_LOCK_ID', 4242))
+    app.config['SCHEDULER_TICK_SECONDS'] = float(os.getenv('SCHEDULER_TICK_SECONDS', 30))
+    app.config['DUE_ALERT_INTERVAL_SECONDS'] = int(os.getenv('DUE_ALERT_INTERVAL_SECONDS', 300))
+    app.config['DUE_SOON_HOURS'] = int(os.getenv('DUE_SOON_HOURS', 24))
+    # How far back the first run looks for tasks that went overdue
+    app.config['DUE_ALERT_LOOKBACK_HOURS'] = int(os.getenv('DUE_ALERT_LOOKBACK_HOURS', 24))
+    app.config['MAINTENANCE_INTERVAL_SECONDS'] = int(os.getenv('MAINTENANCE_INTERVAL_SECONDS', 86400))
+    # Task count snapshots for the trend reports; each day keeps its last run
+    app.config['SNAPSHOT_INTERVAL_SECONDS'] = int(os.getenv('SNAPSHOT_INTERVAL_SECONDS', 3600))
+
     db.init_app(app)
 
+    # Prometheus metrics at /metrics (METRICS_DIR aggregates worker processes)
+    from .metrics import init_metrics
+    app.config['METRICS_DIR'] = os.getenv('METRICS_DIR')
+    app.config['METRICS_FLUSH_SECONDS'] = float(os.getenv('METRICS_FLUSH_SECONDS', 5))
+    app.config['METRICS_TOKEN'] = os.getenv('METRICS_TOKEN')
+    init_metrics(app)
+
+    # Per-user token buckets and concurrency caps for heavy endpoints
+    # (RATE_LIMIT_STORAGE_URL=redis://... shares them between workers)
+    from .ratelimit import DEFAULT_RATE_LIMITS, init_rate_limits
+    app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    app.config['RATE_LIMITS'] = dict(DEFAULT_RATE_LIMITS, **json.loads(os.getenv('RATE_LIMITS', '{}')))
+    app.config['RATE_LIMIT_STORAGE_URL'] = os.getenv('RATE_LIMIT_STORAGE_URL')
+    app.config['RATE_LIMIT_BUSY_RETRY_SECONDS'] = float(os.getenv('RATE_LIMIT_BUSY_RETRY_SECONDS', 2))
+    app.config['RATE_LIMIT_SLOT_TIMEOUT'] = float(os.getenv('RATE_LIMIT_SLOT_TIMEOUT', 120))
+    init_rate_limits(app)
+
+    # Opt-in per-request SQL statistics, Server-Timing and slow request log
+    app.config['SQL_INSTRUMENTATION'] = os.getenv('SQL_INSTRUMENTATION', 'false').lower() == 'true'
+    app.config['SLOW_REQUEST_MS'] = float(os.getenv('SLOW_REQUEST_MS', 500))
+    app.config['SLOW_REQUEST_QUERIES'] = int(os.getenv('SLOW_REQUEST_QUERIES', 50))
+    app.config['SLOW_STATEMENTS_KEPT'] = int(os.getenv('SLOW_STATEMENTS_KEPT', 5))
+    app.config['QUERY_BUDGET_DEFAULT'] = int(os.getenv('QUERY_BUDGET_DEFAULT', 0)) or None
+    # endpoint -> max statements, e.g. QUERY_BUDGETS='{"admin.get_projects": 5}'
+    app.config['QUERY_BUDGETS'] = json.loads(os.getenv('QUERY_BUDGETS', '{}'))
+    app.config['QUERY_BUDGET_STRICT'] = os.getenv('QUERY_BUDGET_STRICT', 'false').lower() == 'true'
+    if app.config['SQL_INSTRUMENTATION']:
+        from .instrumentation import init_instrumentation
+        init_instrumentation(app, db)
+
+    # Opt-in sampling profiler, driven by PUT /admin/profiler
+    app.config['PROFILER_ENABLED'] = os.getenv('PROFILER_ENABLED', 'false').lower() == 'true'
+    app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', '/tmp/profiles')
+    app.config['PROFILE_INTERVAL_MS'] = float(os.getenv('PROFILE_INTERVAL_MS', 5))
+    app.config['PROFILE_MAX_SECONDS'] = float(os.getenv('PROFILE_MAX_SECONDS', 30))
+    if app.config['PROFILER_ENABLED']:
+        from .profiler import init_profiler
+        init_profiler(app)
+
     from . import models
     from .routes import main, admin, member, shared
-    from .routes.db import db_routes
-    
+
     # Register all blueprints
     app.register_blueprint(main)
     app.register_blueprint(admin)
     app.register_blueprint(member)
     app.register_blueprint(shared)
-    app.register_blueprint(db_routes)
-    
-    # Ensure upload directories exist
-    os.makedirs('/app/uploads/projects', exist_ok=True)
-    os.makedirs('/app/uploads/tasks', exist_ok=True)
-    
-    # Create all database tables from models
-    with app.app_context():
-        db.create_all()
+
+    # Tables, partitions and upload directories are created by `flask init-db`,
+    # not on every boot
+    from .cli import init_db_command, verify_counters_command
+    app.cli.add_command(init_db_command)
+    app.cli.add_command(verify_counters_command)
 
     return app
@@ -0,0 +1,82 @@
+from .models import ActivityLog, db
+
+# ======================================
+# ======== STRUCTURED ACTIVITY LOG ======
+# ======================================
+#
+# Activity is stored as an event code plus the subject ids (user, project,
+# task number) and a few params, and turned into text when it is read.
+# Codes are stored in the database: append new events, never renumber.
+
+EVENT_CODES = {
+    'legacy_text': 0,  # free-text rows from before the structured log (app/migrations.py)
+    'project_completed': 1,
+    'project_members_updated': 2,
+    'project_file_uploaded': 3,
+    'task_created': 10,
+    'task_updated': 11,
+    'task_deleted': 12,
+    'task_status_changed': 13,
+    'task_submitted': 14,
+    'task_approved': 15,
+    'task_rejected': 16,
+    'task_commented': 17,
+    'task_file_uploaded': 18,
+}
+EVENT_NAMES = {code: name for name, code in EVENT_CODES.items()}
+
+EVENT_TEMPLATES = {
+    'legacy_text': "{action}",
+    'project_completed': "Marked project '{project_name}' as complete",
+    'project_completed_forced': "Marked project '{project_name}' as complete, closing {forced_tasks} pending tasks",
+    'project_members_updated': "Updated members for project '{project_name}'. Total members: {member_count}",
+    'project_file_uploaded': "Uploaded file '{filename}' to project",
+    'task_created': "Created task #{task_number} '{title}'",
+    'task_updated': "Updated task #{task_number} '{title}'",
+    'task_deleted': "Deleted task #{task_number} '{title}'",
+    'task_status_changed': "Updated task #{task_number} '{title}' status to '{status}'",
+    'task_submitted': "Submitted task #{task_number} '{title}' for review",
+    'task_approved': "Approved completion of task #{task_number} '{title}'",
+    'task_rejected': "Rejected completion of task #{task_number} '{title}' - sent back for revision",
+    'task_rejected_with_reason': "Rejected completion of task #{task_number} '{title}'. Reason: {reason}",
+    'task_commented': "Added comment to task #{task_number} '{title}'",
+    'task_file_uploaded': "Uploaded file '{filename}' to task #{task_number} '{title}'",
+}
+
+
+def log_activity(event, user_id, project_id=None, task_number=None, **params):
+    """Add an activity event to the current transaction"""
+    log = ActivityLog(
+        event_type=EVENT_CODES[event],
+        user_id=int(user_id),
+        project_id=project_id,
+        task_number=task_number,
+        params=params or None
+    )
+    db.session.add(log)
+    return log
+
+
+def render_activity(event_type, task_number, params, project_name=None):
+    """Text of one stored event"""
+    name = EVENT_NAMES.get(event_type)
+    params = params or {}
+    if name == 'task_rejected' and params.get('reason'):
+        name = 'task_rejected_with_reason'
+    elif name == 'project_completed' and params.get('forced_tasks'):
+        name = 'project_completed_forced'
+    try:
+        return EVENT_TEMPLATES[name].format(task_number=task_number, project_name=project_name, **params)
+    except (KeyError, IndexError):
+        return f"Unknown activity ({event_type})"
+
+
+def event_type_codes(value):
+    """Parse ?event_type=a,b into codes; returns (codes or None, error message)"""
+    if not value:
+        return None, None
+    names = [v.strip() for v in value.split(',') if v.strip()]
+    unknown = [n for n in names if n not in EVENT_CODES]
+    if unknown:
+        return None, f"Unknown event_type: {', '.join(unknown)}. Allowed: {', '.join(EVENT_CODES)}"
+    return [EVENT_CODES[n] for n in names], None
@@ -0,0 +1,51 @@
+import os
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+# ======================================
+# ============ CLI COMMANDS =============
+# ======================================
+#
+# Schema work is kept out of create_app() so worker boots and reloads don't
+# pay for it. Run `flask init-db` once per deploy (the Docker image does it
+# before starting the server); it also brings existing tables up to date
+# (app/migrations.py).
+
+UPLOAD_DIRS = ('/app/uploads/projects', '/app/uploads/tasks')
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create missing tables, apply schema migrations, then partitions, sync triggers and upload directories."""
+    from . import db
+    from .maintenance import ensure_partitions
+    from .migrations import migrate_schema
+    from .sync import install_sync_triggers
+
+    db.create_all(bind_key=None)  # on the primary only, replicas follow it
+    click.echo(f"Tables ready on {db.engine.url.render_as_string(hide_password=True)}")
+    click.echo(f"Migrations applied: {migrate_schema() or 'none'}")
+    with db.engine.begin() as connection:
+        install_sync_triggers(connection)
+    click.echo(f"Partitions: {ensure_partitions()}")
+    for directory in UPLOAD_DIRS:
+        os.makedirs(directory, exist_ok=True)
+    current_app.logger.info("init-db finished")
+
+
+@click.command('verify-counters')
+@click.option('--repair', is_flag=True, help="Fix the counters that drifted.")
+@with_appcontext
+def verify_counters_command(repair):
+    """Recompute the project counters and report drift; --repair fixes them and the task comment counts."""
+    from .counters import verify_project_counters
+    from .maintenance import repair_comment_counts
+
+    result = verify_project_counters(repair=repair)
+    click.echo(f"Project counters: {result}")
+    if repair:
+        click.echo(f"Comment counts: {repair_comment_counts()}")
+    if result['drifted'] and not repair:
+        raise SystemExit(1)
@@ -0,0 +1,157 @@
+from datetime import datetime
+from sqlalchemy import text
+from .models import Project, Task, project_members, db
+
+# ======================================
+# =========== PROJECT COUNTERS ==========
+# ======================================
+#
+# Project cards, summaries and reports read task, status, attachment and
+# member counts from columns on projects instead of counting rows. Every
+# route that adds, deletes or moves a task, attachment or membership adds
+# its delta in the same transaction, as col = col + delta, so concurrent
+# requests cannot lose an update. The overdue count depends on the clock
+# and is computed when asked for.
+#
+# repair_project_counters() recomputes them all and fixes drift; it runs
+# from the scheduler and `flask verify-counters`.
+
+# Task status -> counter column. Other statuses only count in task_count.
+STATUS_COUNTERS = {
+    'todo': 'todo_count',
+    'in_progress': 'in_progress_count',
+    'pending_review': 'pending_review_count',
+    'completed': 'completed_count',
+}
+PROJECT_COUNTERS = ('task_count',) + tuple(STATUS_COUNTERS.values()) + ('attachment_count', 'member_count')
+
+
+def adjust_project_counters(project_id, **deltas):
+    """Add deltas (counter name -> amount) to a project's counters.
+
+    Returns the new values of the adjusted counters, or None if nothing changed.
+    """
+    deltas = {name: delta for name, delta in deltas.items() if delta}
+    if not deltas:
+        return None
+    stmt = db.update(Project).where(Project.id == project_id).values({
+        getattr(Project, name): getattr(Project, name) + delta for name, delta in deltas.items()
+    }).returning(*[getattr(Project, name) for name in deltas])
+    row = db.session.execute(stmt, execution_options={"synchronize_session": False}).one_or_none()
+    return dict(row._mapping) if row is not None else None
+
+
+def _status_delta(status, sign):
+    return {STATUS_COUNTERS[status]: sign} if status in STATUS_COUNTERS else {}
+
+
+def count_task(project_id, status, sign=1, attachments=0):
+    """Count a created task (sign=1), or a deleted one (sign=-1) with its attachments"""
+    adjust_project_counters(
+        project_id, task_count=sign, attachment_count=sign * attachments, **_status_delta(status, sign)
+    )
+
+
+def count_status_change(project_id, old_status, new_status):
+    """Move a task between the status counters"""
+    if old_status == new_status:
+        return
+    deltas = _status_delta(old_status, -1)
+    for name, delta in _status_delta(new_status, 1).items():
+        deltas[name] = deltas.get(name, 0) + delta
+    adjust_project_counters(project_id, **deltas)
+
+
+def count_all_completed(project_id):
+    """Every task of the project was just completed"""
+    db.session.execute(db.update(Project).where(Project.id == project_id).values({
+        getattr(Project, name): Project.task_count if name == 'completed_count' else 0
+        for name in STATUS_COUNTERS.values()
+    }), execution_options={"synchronize_session": False})
+
+
+def count_user_removed(user_id):
+    """Drop a user being deleted from the member counts of their projects"""
+    db.session.execute(db.update(Project).where(Project.id.in_(
+        db.select(project_members.c.project_id).where(project_members.c.user_id == user_id)
+    )).values(member_count=Project.member_count - 1), execution_options={"synchronize_session": False})
+
+
+def overdue_count_expression():
+    """Correlated count of a project's open tasks past their due date"""
+    return db.select(db.func.count()).where(
+        Task.project_id == Project.id,
+        Task.due_date < datetime.utcnow(),
+        Task.status != 'completed'
+    ).correlate(Project).scalar_subquery()
+
+
+def project_counts(project, overdue=None):
+    """The counters of a loaded project as a "counts" dict"""
+    return {
+        "tasks": project.task_count,
+        "todo": project.todo_count,
+        "in_progress": project.in_progress_count,
+        "pending_review": project.pending_review_count,
+        "completed": project.completed_count,
+        "overdue": overdue,
+        "attachments": project.attachment_count,
+        "members": project.member_count,
+    }
+
+
+# ======================================
+# ========== VERIFY AND REPAIR ==========
+# ======================================
+
+ACTUAL_COUNTS_SQL = """
+    SELECT p.id,
+           coalesce(t.task_count, 0) AS task_count,
+           {status_columns},
+           coalesce(a.attachment_count, 0) AS attachment_count,
+           coalesce(m.member_count, 0) AS member_count
+    FROM projects p
+    LEFT JOIN (
+        SELECT project_id, count(*) AS task_count, {status_filters}
+        FROM tasks GROUP BY project_id
+    ) t ON t.project_id = p.id
+    LEFT JOIN (
+        SELECT task_project_id AS project_id, count(*) AS attachment_count
+        FROM attachments GROUP BY task_project_id
+    ) a ON a.project_id = p.id
+    LEFT JOIN (
+        SELECT project_id, count(*) AS member_count
+        FROM project_members GROUP BY project_id
+    ) m ON m.project_id = p.id
+""".format(
+    status_columns=",\n           ".join(f"coalesce(t.{c}, 0) AS {c}" for c in STATUS_COUNTERS.values()),
+    status_filters=", ".join(f"count(*) FILTER (WHERE status = '{s}') AS {c}" for s, c in STATUS_COUNTERS.items()),
+)
+
+_stored = ", ".join(f"p.{c}" for c in PROJECT_COUNTERS)
+_actual = ", ".join(f"a.{c}" for c in PROJECT_COUNTERS)
+
+DRIFTED_SQL = text(
+    f"WITH actual AS ({ACTUAL_COUNTS_SQL}) "
+    f"SELECT p.id FROM projects p JOIN actual a ON a.id = p.id "
+    f"WHERE ({_stored}) IS DISTINCT FROM ({_actual}) ORDER BY p.id"
+)
+
+REPAIR_SQL = text(
+    f"WITH actual AS ({ACTUAL_COUNTS_SQL}) "
+    f"UPDATE projects p SET {', '.join(f'{c} = a.{c}' for c in PROJECT_COUNTERS)}, "
+    f"updated_at = now() AT TIME ZONE 'utc' "
+    f"FROM actual a WHERE a.id = p.id AND ({_stored}) IS DISTINCT FROM ({_actual}) RETURNING p.id"
+)
+
+
+def verify_project_counters(repair=False):
+    """Recompute every project's counters; with repair, fix the ones that drifted"""
+    with db.engine.begin() as connection:
+        drifted = connection.execute(REPAIR_SQL if repair else DRIFTED_SQL).scalars().all()
+    return {"drifted": len(drifted), "project_ids": sorted(drifted)[:100], "repaired": repair}
+
+
+def repair_project_counters():
+    """Scheduler job: fix drifted project counters"""
+    return verify_project_counters(repair=True)
@@ -0,0 +1,183 @@
+from datetime import datetime
+from functools import wraps
+import hashlib
+from flask import request, make_response, current_app
+from flask_jwt_extended import get_jwt_identity
+from .models import (User, Project, Task, Comment, ActivityLog, ProjectFile, Notification,
+                     NotificationCounter, project_members, db)
+from .membership import is_project_member
+
+# ======================================
+# ======== CONDITIONAL GET (ETags) ======
+# ======================================
+#
+# Read endpoints are wrapped with @conditional(version_fn). The version
+# function returns cheap aggregate "stamps" (row count + latest updated_at)
+# for everything the response is built from; the weak ETag is a hash of
+# those stamps, the URL and the caller. A matching If-None-Match is
+# answered with 304 before the view runs, so nothing is serialized.
+#
+# Stamps cover only the rows the view returns (the caller's projects or
+# tasks, one project, the latest notifications) and the users whose names
+# it shows, so a write elsewhere does not invalidate every ETag. Each stamp
+# filters on an indexed column.
+#
+# Overdue counts change with the clock, not with a write. Views that show
+# them add _next_due(): the earliest due date still ahead among the open
+# tasks they count, which moves as soon as one of those tasks goes overdue.
+
+
+def _stamp(model, *criteria):
+    """(row count, latest updated_at) of the matching rows in one query"""
+    return tuple(db.session.query(db.func.count(), db.func.max(model.updated_at)).filter(*criteria).one())
+
+
+def _id_stamp(column, *criteria):
+    """(row count, highest id) for append-only tables without updated_at"""
+    return tuple(db.session.query(db.func.count(), db.func.max(column)).filter(*criteria).one())
+
+
+def _next_due(*criteria):
+    """Earliest future due date of the matching open tasks (None if there is none)"""
+    return db.session.query(db.func.min(Task.due_date)).filter(
+        Task.due_date >= datetime.utcnow(), Task.status != 'completed', *criteria
+    ).scalar()
+
+
+# GET /notifications returns this many, newest first
+NOTIFICATIONS_SHOWN = 50
+
+# Query-string filters of GET /admin/tasks; the view and its stamp share them
+TASK_LIST_FILTERS = {
+    'status': (Task.status, str),
+    'priority': (Task.priority, str),
+    'assignee_id': (Task.assigned_to, int),
+    'project_id': (Task.project_id, int),
+}
+
+
+def task_list_criteria(args):
+    """Filter criteria for the TASK_LIST_FILTERS present in args"""
+    criteria = []
+    for name, (column, convert) in TASK_LIST_FILTERS.items():
+        value = args.get(name, type=convert)
+        if value:
+            criteria.append(column == value)
+    return criteria
+
+
+def _task_list_stamp(*criteria):
+    """Stamp of the matching tasks and of the project and assignee names they embed.
+
+    One pass over the tasks: renaming a project or user moves its updated_at
+    past the others, so the latest one is enough for the embedded names.
+    """
+    return tuple(db.session.query(
+        db.func.count(), db.func.max(Task.updated_at), db.func.max(Project.updated_at), db.func.max(User.updated_at)
+    ).select_from(Task).join(Project, Project.id == Task.project_id).outerjoin(
+        User, User.id == Task.assigned_to
+    ).filter(*criteria).one())
+
+
+def projects_version(user_id, **kwargs):
+    # The admin list returns every project. Membership changes touch
+    # Project.updated_at, so project_members needs no stamp of its own.
+    return _stamp(Project), _next_due()
+
+
+def member_projects_version(user_id, **kwargs):
+    my_projects = db.select(project_members.c.project_id).where(project_members.c.user_id == user_id)
+    return _stamp(Project, Project.id.in_(my_projects)), _next_due(Task.project_id.in_(my_projects))
+
+
+def my_tasks_version(user_id, **kwargs):
+    return _task_list_stamp(Task.assigned_to == user_id)
+
+
+def all_tasks_version(user_id, **kwargs):
+    return _task_list_stamp(*task_list_criteria(request.args))
+
+
+def members_version(user_id, **kwargs):
+    # Members with the status counts of their assigned tasks
+    return _stamp(User, User.role == 'member'), _stamp(Task, Task.assigned_to.isnot(None))
+
+
+def reports_version(user_id, **kwargs):
+    # Counts over every project and task; the only names shown are members'
+    return _stamp(Task), _stamp(Project), _stamp(User, User.role == 'member'), _next_due()
+
+
+def project_version(user_id, project_id, **kwargs):
+    # Names shown: members, task assignees and activity authors
+    shown_users = db.union(
+        db.select(project_members.c.user_id).where(project_members.c.project_id == project_id),
+        db.select(Task.assigned_to).where(Task.project_id == project_id),
+        db.select(ActivityLog.user_id).where(ActivityLog.project_id == project_id)
+    )
+    return (
+        _stamp(Project, Project.id == project_id),
+        _stamp(Task, Task.project_id == project_id),
+        _id_stamp(ActivityLog.id, ActivityLog.project_id == project_id),
+        _id_stamp(ProjectFile.id, ProjectFile.project_id == project_id),
+        _stamp(User, User.id.in_(shown_users)),
+        _next_due(Task.project_id == project_id)
+    )
+
+
+def member_project_version(user_id, project_id, **kwargs):
+    """Like project_version, but None (no caching) when the caller is not a member"""
+    if not is_project_member(user_id, project_id):
+        return None
+    return project_version(user_id, project_id)
+
+
+def notifications_version(user_id, **kwargs):
+    # Only the page that is returned. Coalescing and marking read move
+    # updated_at; a row leaving the page moves the oldest created_at.
+    page = db.select(Notification.updated_at, Notification.created_at, Notification.triggered_by).where(
+        Notification.user_id == user_id
+    ).order_by(Notification.created_at.desc()).limit(NOTIFICATIONS_SHOWN).subquery()
+    rows = tuple(db.session.query(
+        db.func.count(), db.func.max(page.c.updated_at), db.func.min(page.c.created_at)
+    ).select_from(page).one())
+    triggerers = _stamp(User, User.id.in_(db.select(page.c.triggered_by)))
+    # Mark-all-as-read only moves the watermark, so it is part of the version
+    counter = db.session.get(NotificationCounter, user_id)
+    watermark = counter.read_up_to if counter else None
+    return rows, watermark, triggerers
+
+
+def comments_version(user_id, project_id, task_number, **kwargs):
+    criteria = (Comment.task_project_id == project_id, Comment.task_number == task_number)
+    return _id_stamp(Comment.id, *criteria), _stamp(User, User.id.in_(db.select(Comment.user_id).where(*criteria)))
+
+
+def conditional(version_fn):
+    """Add a weak ETag to a GET view and answer a matching If-None-Match with 304.
+
+    Must be applied below @jwt_required() (and any role check) so the
+    caller is known before the version stamps are read.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            user_id = get_jwt_identity()
+            stamps = version_fn(int(user_id), **kwargs)
+            if stamps is None:
+                return fn(*args, **kwargs)
+
+            etag = hashlib.sha1(repr((request.full_path, user_id, stamps)).encode('utf-8')).hexdigest()
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            # Let browsers keep the body but always revalidate it
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,130 @@
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, joinedload, selectinload, with_expression
+from .models import User, Project, Task, Attachment
+from .counters import overdue_count_expression
+
+# ======================================
+# ========= SPARSE FIELDSETS ============
+# ======================================
+#
+# Each spec maps an output field to (columns it needs, getter[, eager loader factory]).
+# Views pass the requested field names through select_fields(), defer every
+# other column on the query with load_options(), then build the payload
+# with serialize(). Fields read from a related row carry an eager loader so
+# a list costs one extra query instead of one per row.
+
+
+PROJECT_FIELDS = {
+    "id": ((Project.id,), lambda p: p.id),
+    "name": ((Project.name,), lambda p: p.name),
+    "description": ((Project.description,), lambda p: p.description),
+    "start_date": ((Project.start_date,), lambda p: p.start_date),
+    "due_date": ((Project.due_date,), lambda p: p.due_date),
+    "completion_date": ((Project.completion_date,), lambda p: p.completion_date),
+    "priority": ((Project.priority,), lambda p: p.priority),
+    "created_at": ((Project.created_at,), lambda p: p.created_at),
+    "task_count": ((Project.task_count,), lambda p: p.task_count),
+    "todo_count": ((Project.todo_count,), lambda p: p.todo_count),
+    "in_progress_count": ((Project.in_progress_count,), lambda p: p.in_progress_count),
+    "pending_review_count": ((Project.pending_review_count,), lambda p: p.pending_review_count),
+    "completed_count": ((Project.completed_count,), lambda p: p.completed_count),
+    "attachment_count": ((Project.attachment_count,), lambda p: p.attachment_count),
+    "member_count": ((Project.member_count,), lambda p: p.member_count),
+    "overdue_count": ((), lambda p: p.overdue_count,
+                      lambda: with_expression(Project.overdue_count, overdue_count_expression())),
+}
+
+TASK_FIELDS = {
+    "project_id": ((Task.project_id,), lambda t: t.project_id),
+    "task_number": ((Task.task_number,), lambda t: t.task_number),
+    "title": ((Task.title,), lambda t: t.title),
+    "description": ((Task.description,), lambda t: t.description),
+    "status": ((Task.status,), lambda t: t.status),
+    "priority": ((Task.priority,), lambda t: t.priority),
+    "start_date": ((Task.start_date,), lambda t: t.start_date),
+    "due_date": ((Task.due_date,), lambda t: t.due_date),
+    "completion_date": ((Task.completion_date,), lambda t: t.completion_date),
+    "assigned_to": ((Task.assigned_to,), lambda t: t.assigned_to),
+    "assignee_name": ((Task.assigned_to,), lambda t: t.assignee.name if t.assigned_to else None,
+                      lambda: joinedload(Task.assignee).load_only(User.name)),
+    "project_name": ((Task.project_id,), lambda t: t.project.name,
+                     lambda: joinedload(Task.project).load_only(Project.name)),
+    "attachments_count": ((), lambda t: len(t.attachments),
+                          lambda: selectinload(Task.attachments).load_only(Attachment.id)),
+    "comment_count": ((Task.comment_count,), lambda t: t.comment_count),
+}
+
+MEMBER_FIELDS = {
+    "id": ((User.id,), lambda u: u.id),
+    "name": ((User.name,), lambda u: u.name),
+    "email": ((User.email,), lambda u: u.email),
+    "role": ((User.role,), lambda u: u.role),
+}
+
+# Default fieldsets: what each endpoint returned before fields/include existed, plus the counters
+PROJECT_LIST_FIELDS = (
+    "id", "name", "description", "start_date", "due_date", "completion_date", "priority",
+    "task_count", "completed_count", "overdue_count"
+)
+PROJECT_DETAIL_FIELDS = PROJECT_LIST_FIELDS + ("created_at",)
+PROJECT_TASK_FIELDS = (
+    "project_id", "task_number", "title", "description", "status", "priority",
+    "start_date", "due_date", "completion_date", "assigned_to", "assignee_name", "attachments_count", "comment_count"
+)
+ALL_TASK_FIELDS = (
+    "project_id", "task_number", "title", "description", "status", "priority",
+    "start_date", "due_date", "completion_date", "assigned_to", "assignee_name", "project_name", "comment_count"
+)
+MY_TASK_FIELDS = (
+    "project_id", "task_number", "title", "description", "status", "priority",
+    "due_date", "project_name", "assigned_to", "assignee_name", "attachments_count", "comment_count"
+)
+PROJECT_MEMBER_FIELDS = ("id", "name", "email")
+MEMBER_LIST_FIELDS = ("id", "name", "email", "role")
+
+PROJECT_INCLUDES = ("tasks", "members", "activity_logs")
+MEMBER_INCLUDES = ("task_counts",)
+
+
+def _split(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def select_fields(value, spec, default):
+    """Parse a comma separated ?fields= value. Returns (fields, error message)"""
+    if value is None:
+        return list(default), None
+    fields = _split(value)
+    unknown = [f for f in fields if f not in spec]
+    if unknown:
+        return None, f"Unknown field(s): {', '.join(unknown)}"
+    return fields, None
+
+
+def select_includes(value, allowed, default=None):
+    """Parse a comma separated ?include= value. Returns (includes, error message)"""
+    if value is None:
+        return set(allowed if default is None else default), None
+    includes = _split(value)
+    unknown = [i for i in includes if i not in allowed]
+    if unknown:
+        return None, f"Unknown include(s): {', '.join(unknown)}"
+    return set(includes), None
+
+
+def load_options(model, fields, spec):
+    """Query options that load only the columns and relations the requested fields need"""
+    keys = [column.key for column in inspect(model).primary_key]
+    loaders = []
+    for name in fields:
+        for column in spec[name][0]:
+            if column.key not in keys:
+                keys.append(column.key)
+        if len(spec[name]) > 2:
+            loaders.append(spec[name][2]())
+    return [load_only(*[getattr(model, key) for key in keys])] + loaders
+
+
+def serialize(obj, fields, spec):
+    """Build the response dict for obj with only the requested fields"""
+    return {name: spec[name][1](obj) for name in fields}
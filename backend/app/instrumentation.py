@@ -0,0 +1,147 @@
+import heapq
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter
+from flask import g, request, current_app, has_request_context
+from sqlalchemy import event
+
+# ======================================
+# ======= PER-REQUEST SQL STATISTICS ====
+# ======================================
+#
+# Opt-in (SQL_INSTRUMENTATION=true). Engine events count the statements of
+# each request, add up their time and keep the slowest ones. Every response
+# gets a Server-Timing header (db and total time, visible in the browser's
+# network tab). Requests over SLOW_REQUEST_MS or SLOW_REQUEST_QUERIES are
+# logged with their slowest and most repeated statements, which is where
+# N+1 queries show up.
+#
+# Query budgets: QUERY_BUDGETS (JSON) maps endpoint names to a maximum
+# statement count (QUERY_BUDGET_DEFAULT applies to the rest). Going over is logged, or
+# raises QueryBudgetExceeded when the app is TESTING or QUERY_BUDGET_STRICT
+# is set, so tests fail on a new N+1. assert_max_queries() does the same
+# for a block of code.
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+_local = threading.local()  # statement counters for assert_max_queries blocks
+
+
+def _statement_text(statement):
+    return ' '.join(str(statement).split())
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info['query_started'].pop()
+    for stats in getattr(_local, 'blocks', ()):
+        stats.record(statement, elapsed)
+    if has_request_context() and 'sql_stats' in g:
+        g.sql_stats.record(statement, elapsed)
+
+
+class SQLStats:
+    """Statements seen during one request (or one assert_max_queries block)"""
+
+    def __init__(self, keep=10):
+        self.count = 0
+        self.seconds = 0.0
+        self.keep = keep
+        self.slowest = []  # min-heap of (seconds, n, statement)
+        self.shapes = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        text = _statement_text(statement)
+        self.shapes[text] += 1
+        entry = (seconds, self.count, text)
+        if len(self.slowest) < self.keep:
+            heapq.heappush(self.slowest, entry)
+        else:
+            heapq.heappushpop(self.slowest, entry)
+
+    def report(self):
+        lines = [f"{self.count} statements, {self.seconds * 1000:.1f}ms in the database"]
+        for seconds, _, text in sorted(self.slowest, reverse=True):
+            lines.append(f"  {seconds * 1000:8.2f}ms  {text[:500]}")
+        repeated = [(n, text) for text, n in self.shapes.most_common(3) if n > 1]
+        for n, text in repeated:
+            lines.append(f"  repeated {n}x: {text[:300]}")
+        return '\n'.join(lines)
+
+
+@contextmanager
+def assert_max_queries(limit):
+    """Fail (QueryBudgetExceeded) if the block runs more than limit statements.
+
+    Needs SQL_INSTRUMENTATION so the engine events are installed.
+
+        with assert_max_queries(5):
+            client.get('/admin/projects', headers=headers)
+    """
+    stats = SQLStats()
+    blocks = _local.__dict__.setdefault('blocks', [])
+    blocks.append(stats)
+    try:
+        yield stats
+    finally:
+        blocks.remove(stats)
+    if stats.count > limit:
+        raise QueryBudgetExceeded(f"Expected at most {limit} statements, ran {stats.report()}")
+
+
+def _execute_failed(context):
+    started = context.connection.info.get('query_started') if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+def _start_request():
+    g.sql_stats = SQLStats(keep=current_app.config['SLOW_STATEMENTS_KEPT'])
+    g.request_started = perf_counter()
+
+
+def _finish_request(response):
+    stats = g.pop('sql_stats', None)
+    if stats is None:
+        return response
+    total_ms = (perf_counter() - g.pop('request_started')) * 1000
+    db_ms = stats.seconds * 1000
+    response.headers.add(
+        'Server-Timing', f'db;dur={db_ms:.1f};desc="{stats.count} queries", app;dur={total_ms:.1f}'
+    )
+
+    config = current_app.config
+    label = f"{request.method} {request.path} ({request.endpoint})"
+    if total_ms >= config['SLOW_REQUEST_MS'] or stats.count >= config['SLOW_REQUEST_QUERIES']:
+        current_app.logger.warning("Slow request %s: %.1fms total\n%s", label, total_ms, stats.report())
+
+    budget = config['QUERY_BUDGETS'].get(request.endpoint, config['QUERY_BUDGET_DEFAULT'])
+    if budget is not None and stats.count > budget:
+        message = f"{label} exceeded its query budget of {budget}: {stats.report()}"
+        if current_app.testing or config['QUERY_BUDGET_STRICT']:
+            raise QueryBudgetExceeded(message)
+        current_app.logger.warning(message)
+    return response
+
+
+def init_instrumentation(app, db):
+    """Hook the engine events and request handlers (no-op unless SQL_INSTRUMENTATION)"""
+    if not app.config['SQL_INSTRUMENTATION']:
+        return
+    with app.app_context():
+        for engine in db.engines.values():  # primary and replicas
+            if not event.contains(engine, 'before_cursor_execute', _before_execute):
+                event.listen(engine, 'before_cursor_execute', _before_execute)
+                event.listen(engine, 'after_cursor_execute', _after_execute)
+                event.listen(engine, 'handle_error', _execute_failed)
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
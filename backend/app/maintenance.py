@@ -0,0 +1,128 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import text
+from .models import db
+from .partitions import create_month_partitions, month_partitions_before, drop_partition, month_start, add_months
+
+# ======================================
+# ========== MAINTENANCE JOBS ===========
+# ======================================
+#
+# Periodic housekeeping run by scripts/maintain_db.py. Each job runs in its
+# own transaction and returns a small dict describing what it did.
+
+NOTIFICATION_COLUMNS = (
+    "id, message, type, is_read, count, created_at, updated_at, user_id, "
+    "task_project_id, task_number, project_id, triggered_by"
+)
+
+# Read either individually or through the user's mark-all-as-read watermark
+NOTIFICATION_IS_READ = (
+    "(n.is_read OR n.created_at <= "
+    "(SELECT c.read_up_to FROM notification_counters c WHERE c.user_id = n.user_id))"
+)
+
+
+PARTITIONED_TABLES = ('notifications', 'activity_logs')
+
+
+def ensure_partitions(months_ahead=None):
+    """Create the current and upcoming monthly partitions.
+
+    Rows of those months that landed in a default partition (inserted before
+    their month existed) are moved into the new partition.
+    """
+    months_ahead = months_ahead if months_ahead is not None else current_app.config['PARTITION_MONTHS_AHEAD']
+    created = []
+    with db.engine.begin() as connection:
+        for table in PARTITIONED_TABLES:
+            created += create_month_partitions(connection, table, months_ahead)
+    return {"created": created}
+
+
+def apply_notification_retention(days=None, archive=None):
+    """Remove read notifications older than the retention period.
+
+    Rows are moved to notifications_archive when archiving is enabled,
+    otherwise deleted. Unread notifications are always kept. Monthly
+    partitions that end before the cutoff and are left empty are dropped.
+    """
+    days = days if days is not None else current_app.config['NOTIFICATION_RETENTION_DAYS']
+    archive = archive if archive is not None else current_app.config['NOTIFICATION_ARCHIVE']
+    cutoff = datetime.utcnow() - timedelta(days=days)
+
+    with db.engine.begin() as connection:
+        if archive:
+            removed = connection.execute(text(
+                f"WITH moved AS ("
+                f"  DELETE FROM notifications n WHERE n.created_at < :cutoff AND {NOTIFICATION_IS_READ}"
+                f"  RETURNING {NOTIFICATION_COLUMNS}"
+                f") INSERT INTO notifications_archive ({NOTIFICATION_COLUMNS}, archived_at) "
+                f"SELECT {NOTIFICATION_COLUMNS.replace('is_read', 'true')}, now() FROM moved"
+            ), {"cutoff": cutoff}).rowcount
+        else:
+            removed = connection.execute(text(
+                f"DELETE FROM notifications n WHERE n.created_at < :cutoff AND {NOTIFICATION_IS_READ}"
+            ), {"cutoff": cutoff}).rowcount
+
+        dropped = []
+        for name in month_partitions_before(connection, 'notifications', cutoff):
+            if not connection.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+                drop_partition(connection, 'notifications', name)
+                dropped.append(name)
+
+    return {"cutoff": cutoff.isoformat(), "archived" if archive else "deleted": removed, "dropped_partitions": dropped}
+
+
+def apply_activity_retention(months=None):
+    """Drop activity log partitions older than the retention period (0 keeps everything).
+
+    Whole months are detached and dropped; rows that landed in the default
+    partition are deleted.
+    """
+    months = months if months is not None else current_app.config['ACTIVITY_LOG_RETENTION_MONTHS']
+    if not months:
+        return {"kept": "all"}
+    cutoff = add_months(month_start(datetime.utcnow()), -months)
+
+    with db.engine.begin() as connection:
+        dropped = month_partitions_before(connection, 'activity_logs', cutoff)
+        for name in dropped:
+            drop_partition(connection, 'activity_logs', name)
+        deleted = connection.execute(text(
+            "DELETE FROM activity_logs WHERE created_at < :cutoff"
+        ), {"cutoff": cutoff}).rowcount
+
+    return {"cutoff": cutoff.isoformat(), "dropped_partitions": dropped, "deleted": deleted}
+
+
+def repair_unread_counts():
+    """Recompute every user's unread counter and fix the ones that drifted"""
+    with db.engine.begin() as connection:
+        repaired = connection.execute(text(
+            "INSERT INTO notification_counters (user_id, unread) "
+            "SELECT u.id, count(n.id) FROM users u "
+            "LEFT JOIN notification_counters c ON c.user_id = u.id "
+            "LEFT JOIN notifications n ON n.user_id = u.id AND n.is_read IS NOT TRUE "
+            "AND (c.read_up_to IS NULL OR n.created_at > c.read_up_to) "
+            "GROUP BY u.id "
+            "ON CONFLICT (user_id) DO UPDATE SET unread = EXCLUDED.unread "
+            "WHERE notification_counters.unread <> EXCLUDED.unread"
+        )).rowcount
+    return {"repaired": repaired}
+
+
+REPAIR_COMMENT_COUNTS_SQL = text(
+    "UPDATE tasks t SET comment_count = c.n FROM ("
+    "SELECT k.project_id, k.task_number, count(cm.id) AS n FROM tasks k "
+    "LEFT JOIN comments cm ON cm.task_project_id = k.project_id AND cm.task_number = k.task_number "
+    "GROUP BY k.project_id, k.task_number) c "
+    "WHERE t.project_id = c.project_id AND t.task_number = c.task_number AND t.comment_count <> c.n"
+)
+
+
+def repair_comment_counts():
+    """Recompute tasks.comment_count from the comments table (backfill or drift)"""
+    with db.engine.begin() as connection:
+        repaired = connection.execute(REPAIR_COMMENT_COUNTS_SQL).rowcount
+    return {"repaired": repaired}
@@ -0,0 +1,104 @@
+from functools import wraps
+from time import monotonic
+from flask import g, jsonify, current_app
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.orm import Session
+from .models import Project, project_members, db
+
+# ======================================
+# ========== MEMBERSHIP CHECKS ==========
+# ======================================
+#
+# "Is this user a member of this project" is answered from project_members
+# without loading project.members. Answers are memoized for the request, so
+# the ETag check and the view share one query.
+#
+# With MEMBERSHIP_CACHE_SECONDS > 0 the user's whole project-id set is read
+# once (indexed on user_id) and kept in the process for that long. Membership
+# changes made by this process clear it when they commit; other workers see
+# them within the TTL.
+
+_cache = {}  # user_id -> (expires, frozenset of project ids)
+
+
+def _load_project_ids(user_id):
+    return frozenset(db.session.execute(
+        db.select(project_members.c.project_id).where(project_members.c.user_id == user_id)
+    ).scalars())
+
+
+def member_project_ids(user_id):
+    """Ids of the projects the user is a member of (cached, see above)"""
+    user_id = int(user_id)
+    per_request = g.setdefault('member_project_ids', {})
+    if user_id in per_request:
+        return per_request[user_id]
+    ttl = current_app.config['MEMBERSHIP_CACHE_SECONDS']
+    cached = _cache.get(user_id)
+    if cached is not None and cached[0] > monotonic():
+        ids = cached[1]
+    else:
+        ids = _load_project_ids(user_id)
+        if ttl:
+            _cache[user_id] = (monotonic() + ttl, ids)
+    per_request[user_id] = ids
+    return ids
+
+
+def is_project_member(user_id, project_id):
+    """EXISTS check on project_members, or a lookup in the cached project-id set"""
+    user_id = int(user_id)
+    if current_app.config['MEMBERSHIP_CACHE_SECONDS']:
+        return project_id in member_project_ids(user_id)
+    checked = g.setdefault('project_membership', {})
+    key = (user_id, project_id)
+    if key not in checked:
+        checked[key] = db.session.query(db.exists().where(
+            project_members.c.project_id == project_id,
+            project_members.c.user_id == user_id
+        )).scalar()
+    return checked[key]
+
+
+def forget_memberships(user_ids):
+    """Drop the users' cached memberships once the current transaction commits.
+
+    Clearing earlier would let a request in between cache the old
+    memberships again for a whole TTL; a rollback leaves the cache alone.
+    """
+    db.session.info.setdefault('forget_memberships', set()).update(map(int, user_ids))
+
+
+@db.event.listens_for(Session, 'after_commit')
+def _forget_committed_memberships(session):
+    user_ids = session.info.pop('forget_memberships', None)
+    if not user_ids:
+        return
+    per_request = g.get('member_project_ids', {})
+    checked = g.get('project_membership', {})
+    for user_id in user_ids:
+        _cache.pop(user_id, None)
+        per_request.pop(user_id, None)
+    for key in [k for k in checked if k[0] in user_ids]:
+        del checked[key]
+
+
+@db.event.listens_for(Session, 'after_rollback')
+def _keep_memberships(session):
+    session.info.pop('forget_memberships', None)
+
+
+def project_member_required(fn):
+    """403 unless the caller is a member of the project_id in the URL (404 if there is no such project).
+
+    Apply below @jwt_required() and above @conditional.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        project_id = kwargs['project_id']
+        if not is_project_member(get_jwt_identity(), project_id):
+            if db.session.get(Project, project_id) is None:
+                return jsonify({"msg": "Project not found"}), 404
+            return jsonify({"msg": "Access denied"}), 403
+        return fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,229 @@
+import atexit
+import glob
+import json
+import os
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from time import perf_counter, monotonic
+from flask import request, g, current_app, Response
+
+# ======================================
+# ========== PROMETHEUS METRICS =========
+# ======================================
+#
+# GET /metrics serves the Prometheus text format. Each process keeps its
+# metrics in plain dicts behind one lock, so recording is a dict update.
+#
+# With several worker processes, set METRICS_DIR to a directory shared by
+# the workers (cleared on deploy). Every process writes its values to
+# METRICS_DIR/metrics-<pid>.json at most every METRICS_FLUSH_SECONDS, and
+# /metrics adds up all the files. Counters and histograms of exited workers
+# are kept; gauges only count live processes.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1024, 10240, 102400, 1048576, 5242880, 10485760, 52428800)
+FANOUT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 1000)
+
+# name -> (type, help, histogram buckets)
+METRICS = {
+    'http_requests_total': ('counter', "Requests handled, by route and status", None),
+    'http_request_duration_seconds': ('histogram', "Request latency by route", LATENCY_BUCKETS),
+    'db_pool_connections': ('gauge', "Database pool connections by engine and state", None),
+    'notification_fanout_recipients': ('histogram', "Recipients per notification event", FANOUT_BUCKETS),
+    'notifications_written_total': ('counter', "Notification rows created or coalesced", None),
+    'upload_bytes': ('histogram', "Size of uploaded files", SIZE_BUCKETS),
+    'upload_duration_seconds': ('histogram', "Time to store an uploaded file", LATENCY_BUCKETS),
+    'bcrypt_in_flight': ('gauge', "Password hashes being computed right now (queue depth)", None),
+    'bcrypt_duration_seconds': ('histogram', "Time per password hash or check", LATENCY_BUCKETS),
+    'rate_limited_total': ('counter', "Requests turned away by rate or concurrency limits", None),
+}
+
+_lock = threading.Lock()
+_values = {}  # (name, labels) -> float, or [bucket counts..., sum, count] for histograms
+_last_flush = 0.0
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _values[key] = _values.get(key, 0) + amount
+
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _values[_key(name, labels)] = value
+
+
+def observe(name, value, **labels):
+    buckets = METRICS[name][2]
+    key = _key(name, labels)
+    with _lock:
+        series = _values.get(key)
+        if series is None:
+            series = _values[key] = [0] * (len(buckets) + 3)  # buckets, +Inf, sum, count
+        series[bisect_left(buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+
+@contextmanager
+def track_bcrypt(operation):
+    """Count a password hash/check as in flight and time it"""
+    inc('bcrypt_in_flight', 1)
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        inc('bcrypt_in_flight', -1)
+        observe('bcrypt_duration_seconds', perf_counter() - started, operation=operation)
+
+
+def record_upload(kind, path, started):
+    """Record an uploaded file once it is saved (started is a perf_counter() value)"""
+    observe('upload_duration_seconds', perf_counter() - started, kind=kind)
+    observe('upload_bytes', os.path.getsize(path), kind=kind)
+
+
+# ======================================
+# ====== COLLECTION AND AGGREGATION =====
+# ======================================
+
+def _start_request():
+    g.metrics_started = perf_counter()
+
+
+def _finish_request(response):
+    started = g.pop('metrics_started', None)
+    if started is not None and request.endpoint != 'metrics':
+        # The route pattern, not the URL, so ids don't explode the label set
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        inc('http_requests_total', method=request.method, route=route, status=str(response.status_code))
+        observe('http_request_duration_seconds', perf_counter() - started, method=request.method, route=route)
+    _maybe_flush()
+    return response
+
+
+def _sample_pools():
+    from . import db
+    for bind_key, engine in db.engines.items():
+        pool = engine.pool
+        name = bind_key or 'primary'
+        for state, method in (('size', 'size'), ('checked_out', 'checkedout'), ('overflow', 'overflow')):
+            if hasattr(pool, method):
+                set_gauge('db_pool_connections', getattr(pool, method)(), engine=name, state=state)
+
+
+def _snapshot():
+    with _lock:
+        return [[name, list(labels), value if not isinstance(value, list) else list(value)]
+                for (name, labels), value in _values.items()]
+
+
+def _metrics_file(directory, pid):
+    return os.path.join(directory, f"metrics-{pid}.json")
+
+
+def _flush(directory):
+    path = _metrics_file(directory, os.getpid())
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(_snapshot(), f)
+    os.replace(tmp, path)  # readers never see a half-written file
+
+
+def _maybe_flush():
+    global _last_flush
+    directory = current_app.config['METRICS_DIR']
+    if directory and monotonic() - _last_flush >= current_app.config['METRICS_FLUSH_SECONDS']:
+        _last_flush = monotonic()
+        _sample_pools()
+        _flush(directory)
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _collect():
+    """All series, summed over processes when METRICS_DIR is set"""
+    _sample_pools()
+    directory = current_app.config['METRICS_DIR']
+    if not directory:
+        return _snapshot()
+    _flush(directory)
+    totals = {}
+    for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+        pid = int(os.path.basename(path)[len('metrics-'):-len('.json')])
+        alive = _alive(pid)
+        try:
+            with open(path) as f:
+                series = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for name, labels, value in series:
+            if METRICS[name][0] == 'gauge' and not alive:
+                continue
+            key = (name, tuple(tuple(pair) for pair in labels))
+            if isinstance(value, list):
+                current = totals.setdefault(key, [0] * len(value))
+                totals[key] = [a + b for a, b in zip(current, value)]
+            else:
+                totals[key] = totals.get(key, 0) + value
+    return [[name, list(labels), value] for (name, labels), value in totals.items()]
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def render():
+    by_name = {}
+    for name, labels, value in _collect():
+        by_name.setdefault(name, []).append((labels, value))
+    lines = []
+    for name, (kind, help_text, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in sorted(by_name.get(name, []), key=lambda s: s[0]):
+            if kind != 'histogram':
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ['+Inf'], value[:-2]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {value[-2]}")
+            lines.append(f"{name}_count{_format_labels(labels)} {value[-1]}")
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view():
+    token = current_app.config['METRICS_TOKEN']
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        return Response("Unauthorized\n", status=401, mimetype='text/plain')
+    return Response(render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_metrics(app):
+    """Register /metrics and the request hooks"""
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view, methods=['GET'])
+    if app.config['METRICS_DIR']:
+        os.makedirs(app.config['METRICS_DIR'], exist_ok=True)
+        atexit.register(_flush, app.config['METRICS_DIR'])
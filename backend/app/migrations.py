@@ -0,0 +1,153 @@
+from sqlalchemy import text
+from .activity import EVENT_CODES
+from .counters import PROJECT_COUNTERS, REPAIR_SQL as REPAIR_PROJECT_COUNTERS_SQL
+from .maintenance import REPAIR_COMMENT_COUNTS_SQL
+from .models import SchemaMigration, db
+from .sync import SYNCED_TABLES
+
+# ======================================
+# ========== SCHEMA MIGRATIONS ==========
+# ======================================
+#
+# create_all() creates missing tables but never changes existing ones. Each
+# column, index or table rewrite added after a table first shipped is a
+# named step here, and `flask init-db` runs the steps this database has not
+# recorded in schema_migrations yet, each in its own transaction, right
+# after create_all().
+#
+# Statements stay idempotent (IF NOT EXISTS) because on a fresh database
+# create_all() has already made the current schema; the steps then only
+# record themselves. Backfills run in the same transaction as the columns
+# they fill. A step is SQL (a string or text()) or a callable taking the
+# connection. Append new steps; never edit one that has shipped.
+
+ETAG_TABLES = ('users', 'projects', 'tasks', 'notifications')
+
+MIGRATIONS = [
+    ('028_etag_updated_at', [
+        *(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS updated_at timestamp" for table in ETAG_TABLES),
+        *(f"UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL" for table in ETAG_TABLES),
+        # The stamps filter on these (app/etag.py)
+        "CREATE INDEX IF NOT EXISTS ix_tasks_assigned_to ON tasks (assigned_to)",
+        "CREATE INDEX IF NOT EXISTS ix_project_files_project_id ON project_files (project_id)",
+    ]),
+    ('031_partition_notifications', [
+        lambda connection: _partition_existing_table(connection, 'notifications', _copy_shared_columns),
+    ]),
+    ('033_read_watermark', [
+        "ALTER TABLE notification_counters ADD COLUMN IF NOT EXISTS read_up_to timestamp",
+    ]),
+    ('034_notification_coalescing', [
+        "ALTER TABLE users ADD COLUMN IF NOT EXISTS notification_digest_minutes integer",
+        # The defaults fill the existing rows: each was one event
+        "ALTER TABLE notifications ADD COLUMN IF NOT EXISTS count integer NOT NULL DEFAULT 1",
+        "ALTER TABLE notifications_archive ADD COLUMN IF NOT EXISTS count integer NOT NULL DEFAULT 1",
+    ]),
+    ('034_digest_periods', [
+        "ALTER TABLE notification_counters ADD COLUMN IF NOT EXISTS last_digest_at timestamp",
+    ]),
+    ('035_partition_activity_logs', [
+        lambda connection: _partition_existing_table(connection, 'activity_logs', _copy_legacy_activity),
+    ]),
+    ('043_due_date_indexes', [
+        "CREATE INDEX IF NOT EXISTS ix_tasks_due_date ON tasks (due_date)",
+        "CREATE INDEX IF NOT EXISTS ix_tasks_updated_at ON tasks (updated_at)",
+    ]),
+    ('046_member_projects_index', [
+        "CREATE INDEX IF NOT EXISTS ix_project_members_user_id ON project_members (user_id)",
+    ]),
+    ('047_sync_versions', [
+        *(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS version bigint" for table in SYNCED_TABLES),
+        *(f"CREATE INDEX IF NOT EXISTS ix_{table}_version ON {table} (version)" for table in SYNCED_TABLES),
+        "ALTER TABLE scheduler_jobs ADD COLUMN IF NOT EXISTS high_water_version bigint",
+    ]),
+    ('048_comment_counts', [
+        "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS comment_count integer NOT NULL DEFAULT 0",
+        REPAIR_COMMENT_COUNTS_SQL,
+        "CREATE INDEX IF NOT EXISTS ix_comments_task_id ON comments (task_project_id, task_number, id)",
+    ]),
+    ('049_project_counters', [
+        *(f"ALTER TABLE projects ADD COLUMN IF NOT EXISTS {c} integer NOT NULL DEFAULT 0" for c in PROJECT_COUNTERS),
+        REPAIR_PROJECT_COUNTERS_SQL,
+    ]),
+    ('050_completion_date_index', [
+        "CREATE INDEX IF NOT EXISTS ix_tasks_completion_date ON tasks (completion_date)",
+    ]),
+]
+
+
+def _partition_existing_table(connection, table, copy):
+    """Rebuild a table created before it was partitioned and copy its rows over.
+
+    PostgreSQL cannot partition an existing table. The old one is renamed,
+    the model's table is created with its partitions, copy(connection, old, table)
+    moves the rows, the id sequence is set past them and the old table is
+    dropped. Does nothing if the table is already partitioned.
+    """
+    kind = connection.execute(text(
+        "SELECT relkind FROM pg_class WHERE oid = to_regclass(:table)"
+    ), {"table": table}).scalar()
+    if kind != 'r':
+        return
+    old = f"{table}_unpartitioned"
+    connection.execute(text(f"ALTER TABLE {table} RENAME TO {old}"))
+    connection.execute(text(f"ALTER TABLE {old} RENAME CONSTRAINT {table}_pkey TO {old}_pkey"))
+    # The serial's sequence has the same name as the model's; keep it for the new table
+    connection.execute(text(f"ALTER SEQUENCE IF EXISTS {table}_id_seq OWNED BY NONE"))
+    db.metadata.tables[table].create(connection, checkfirst=True)
+    copy(connection, old, table)
+    connection.execute(text(
+        f"SELECT setval('{table}_id_seq', (SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"
+    ))
+    connection.execute(text(f"DROP TABLE {old}"))
+
+
+def _copy_shared_columns(connection, old, table):
+    """Copy the columns both tables have; created_at is now part of the key"""
+    columns = connection.execute(text(
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = :old AND column_name IN ("
+        "SELECT column_name FROM information_schema.columns "
+        "WHERE table_schema = current_schema() AND table_name = :table) "
+        "ORDER BY ordinal_position"
+    ), {"old": old, "table": table}).scalars().all()
+    values = [
+        "coalesce(created_at, now() AT TIME ZONE 'utc')" if c == 'created_at' else c for c in columns
+    ]
+    connection.execute(text(
+        f"INSERT INTO {table} ({', '.join(columns)}) SELECT {', '.join(values)} FROM {old}"
+    ))
+
+
+def _copy_legacy_activity(connection, old, table):
+    """Free-text rows keep their text as legacy_text events"""
+    connection.execute(text(
+        f"INSERT INTO {table} (id, event_type, user_id, project_id, params, created_at) "
+        f"SELECT id, :code, user_id, project_id, json_build_object('action', action), "
+        f"coalesce(created_at, now() AT TIME ZONE 'utc') FROM {old}"
+    ), {"code": EVENT_CODES['legacy_text']})
+
+
+def _run(connection, step):
+    if callable(step):
+        step(connection)
+    else:
+        connection.execute(text(step) if isinstance(step, str) else step)
+
+
+def migrate_schema():
+    """Apply the steps not yet recorded; returns their names (PostgreSQL only)"""
+    if db.engine.dialect.name != 'postgresql':
+        return []
+    with db.engine.connect() as connection:
+        applied = set(connection.execute(db.select(SchemaMigration.name)).scalars())
+    ran = []
+    for name, steps in MIGRATIONS:
+        if name in applied:
+            continue
+        with db.engine.begin() as connection:
+            for step in steps:
+                _run(connection, step)
+            connection.execute(db.insert(SchemaMigration).values(name=name))
+        ran.append(name)
+    return ran
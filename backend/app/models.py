@@ -1,12 +1,17 @@
 from . import db
 from datetime import datetime
 from flask_bcrypt import generate_password_hash, check_password_hash
+from .partitions import create_default_partition, create_month_partitions
+from .metrics import track_bcrypt
 
 # Association table for many-to-many: Project ↔ User
 project_members = db.Table(
     'project_members',
     db.Column('project_id', db.Integer, db.ForeignKey('projects.id'), primary_key=True),
-    db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
+    db.Column('version', db.BigInteger, nullable=True, index=True),  # set by the sync triggers (app/sync.py)
+    # The primary key serves lookups by project; this one "projects of a user"
+    db.Index('ix_project_members_user_id', 'user_id')
 )
 
 class User(db.Model):
@@ -17,6 +22,10 @@ class User(db.Model):
     password = db.Column(db.String(200), nullable=False)
     role = db.Column(db.String(20), nullable=False)  # 'admin' or 'member'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # ETag version stamp
+    # When set, notifications are folded into one digest per period of this many
+    # minutes, starting at NotificationCounter.last_digest_at
+    notification_digest_minutes = db.Column(db.Integer, nullable=True)
 
     tasks = db.relationship('Task', backref='assignee', lazy=True, foreign_keys='Task.assigned_to')
     comments = db.relationship('Comment', backref='author', lazy=True)
@@ -26,10 +35,12 @@ class User(db.Model):
     )
 
     def set_password(self, raw_password):
-        self.password = generate_password_hash(raw_password).decode('utf-8')
+        with track_bcrypt('hash'):
+            self.password = generate_password_hash(raw_password).decode('utf-8')
 
     def check_password(self, raw_password):
-        return check_password_hash(self.password, raw_password)
+        with track_bcrypt('check'):
+            return check_password_hash(self.password, raw_password)
 
 class Project(db.Model):
     __tablename__ = 'projects'
@@ -41,6 +52,19 @@ class Project(db.Model):
     completion_date = db.Column(db.DateTime, nullable=True)
     priority = db.Column(db.String(20), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # ETag version stamp
+    version = db.Column(db.BigInteger, nullable=True, index=True)  # set by the sync triggers (app/sync.py)
+
+    # Counters kept in step by the routes that change tasks, attachments and members (app/counters.py)
+    task_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    todo_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    in_progress_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    pending_review_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    completed_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    attachment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    member_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Depends on the clock, so it is computed when asked for (fields.PROJECT_FIELDS)
+    overdue_count = db.query_expression()
 
     tasks = db.relationship('Task', backref='project', lazy=True, cascade='all, delete-orphan')
     members = db.relationship(
@@ -50,6 +74,15 @@ class Project(db.Model):
 
 class Task(db.Model):
     __tablename__ = 'tasks'
+    __table_args__ = (
+        # Range scans of the due date scheduler job (app/scheduler.py)
+        db.Index('ix_tasks_due_date', 'due_date'),
+        db.Index('ix_tasks_updated_at', 'updated_at'),
+        # Throughput counts of the daily snapshots (app/snapshots.py)
+        db.Index('ix_tasks_completion_date', 'completion_date'),
+        # "My tasks" lists and their ETag stamps (app/etag.py)
+        db.Index('ix_tasks_assigned_to', 'assigned_to'),
+    )
     # Composite primary key: project_id + task_number
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), primary_key=True, nullable=False)
     task_number = db.Column(db.Integer, primary_key=True, nullable=False)
@@ -62,6 +95,9 @@ class Task(db.Model):
     due_date = db.Column(db.DateTime, nullable=True)
     completion_date = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # ETag version stamp
+    version = db.Column(db.BigInteger, nullable=True, index=True)  # set by the sync triggers (app/sync.py)
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # kept in step on comment insert
 
     assigned_to = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True)
 
@@ -79,6 +115,7 @@ class Comment(db.Model):
     task_project_id = db.Column(db.Integer, nullable=False)
     task_number = db.Column(db.Integer, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    version = db.Column(db.BigInteger, nullable=True, index=True)  # set by the sync triggers (app/sync.py)
     
     __table_args__ = (
         db.ForeignKeyConstraint(
@@ -86,6 +123,8 @@ class Comment(db.Model):
             ['tasks.project_id', 'tasks.task_number'],
             ondelete='CASCADE'
         ),
+        # Keyset pages of a task's comments (shared.get_task_comments)
+        db.Index('ix_comments_task_id', 'task_project_id', 'task_number', 'id'),
     )
 
 class Attachment(db.Model):
@@ -116,25 +155,47 @@ class ProjectFile(db.Model):
     uploaded_at = db.Column(db.DateTime, default=datetime.utcnow)
     uploaded_by = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
 
-    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False)
+    project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=False, index=True)
+
+activity_logs_id_seq = db.Sequence('activity_logs_id_seq')
+
 
 class ActivityLog(db.Model):
+    """Structured activity event, rendered to text at read time (see app/activity.py)"""
     __tablename__ = 'activity_logs'
-    id = db.Column(db.Integer, primary_key=True)
-    action = db.Column(db.String(300), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    # Range partitioned by month on created_at like notifications
+    __table_args__ = (
+        db.Index('ix_activity_logs_project_created', 'project_id', 'created_at'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+    id = db.Column(db.Integer, activity_logs_id_seq, server_default=activity_logs_id_seq.next_value(), primary_key=True)
+    event_type = db.Column(db.SmallInteger, nullable=False)  # activity.EVENT_CODES
+    task_number = db.Column(db.Integer, nullable=True)
+    params = db.Column(db.JSON, nullable=True)  # template values not derivable from the ids (titles, names)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, primary_key=True)
 
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     project_id = db.Column(db.Integer, db.ForeignKey('projects.id'), nullable=True)
 
 
+notifications_id_seq = db.Sequence('notifications_id_seq')
+
+
 class Notification(db.Model):
     __tablename__ = 'notifications'
-    id = db.Column(db.Integer, primary_key=True)
+    # Range partitioned by month on created_at (see app/partitions.py), so the
+    # partition key is part of the primary key and ids come from a sequence
+    __table_args__ = (
+        db.Index('ix_notifications_user_created', 'user_id', 'created_at'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+    id = db.Column(db.Integer, notifications_id_seq, server_default=notifications_id_seq.next_value(), primary_key=True)
     message = db.Column(db.String(500), nullable=False)
     type = db.Column(db.String(50), nullable=False)  # task_status, comment, file, assignment, review
     is_read = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    count = db.Column(db.Integer, nullable=False, default=1, server_default='1')  # events coalesced into this row
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, primary_key=True)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # ETag version stamp
     
     # Who receives the notification
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -148,3 +209,113 @@ class Notification(db.Model):
     
     user = db.relationship('User', foreign_keys=[user_id], backref='notifications')
     triggerer = db.relationship('User', foreign_keys=[triggered_by])
+
+
+class NotificationCounter(db.Model):
+    """Maintained unread count per user, so the badge is a primary-key read.
+
+    read_up_to is the mark-all-as-read watermark: notifications created at or
+    before it count as read even if their own is_read flag is still false.
+    last_digest_at is when the user's current digest period started.
+    """
+    __tablename__ = 'notification_counters'
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    unread = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    read_up_to = db.Column(db.DateTime, nullable=True)
+    last_digest_at = db.Column(db.DateTime, nullable=True)
+
+
+class TaskDueAlert(db.Model):
+    """One row per task, alert kind and due date that has been notified.
+
+    The primary key is what makes the alerts fire once: the scheduler inserts
+    with ON CONFLICT DO NOTHING and only notifies for the rows it inserted.
+    Moving the due date makes the task eligible again.
+    """
+    __tablename__ = 'task_due_alerts'
+    project_id = db.Column(db.Integer, primary_key=True)
+    task_number = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), primary_key=True)  # due_soon, overdue
+    due_date = db.Column(db.DateTime, primary_key=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.ForeignKeyConstraint(
+            ['project_id', 'task_number'],
+            ['tasks.project_id', 'tasks.task_number'],
+            ondelete='CASCADE'
+        ),
+    )
+
+
+class SyncTombstone(db.Model):
+    """A deleted project, task, comment or membership, for GET /sync"""
+    __tablename__ = 'sync_tombstones'
+    id = db.Column(db.BigInteger, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, index=True)
+    entity = db.Column(db.String(20), nullable=False)  # projects, tasks, comments, project_members
+    entity_key = db.Column(db.String(50), nullable=False)  # id, or "project_id:task_number" / "project_id:user_id"
+    project_id = db.Column(db.Integer, nullable=True)
+    user_id = db.Column(db.Integer, nullable=True)  # memberships only
+    deleted_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class TaskSnapshot(db.Model):
+    """Task counts of one project or member on one day, for the trend reports.
+
+    Written by the scheduler (app/snapshots.py). The primary key puts one
+    owner's days next to each other, so a chart's date range is a single
+    index range scan.
+    """
+    __tablename__ = 'task_snapshots'
+    kind = db.Column(db.String(10), primary_key=True)  # project, member
+    owner_id = db.Column(db.Integer, primary_key=True)  # project id or assignee id
+    day = db.Column(db.Date, primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    todo = db.Column(db.Integer, nullable=False, default=0)
+    in_progress = db.Column(db.Integer, nullable=False, default=0)
+    pending_review = db.Column(db.Integer, nullable=False, default=0)
+    completed = db.Column(db.Integer, nullable=False, default=0)
+    completed_today = db.Column(db.Integer, nullable=False, default=0)  # by completion_date
+
+
+class SchedulerJob(db.Model):
+    """Last run and high-water mark of each scheduler job"""
+    __tablename__ = 'scheduler_jobs'
+    name = db.Column(db.String(50), primary_key=True)
+    last_run_at = db.Column(db.DateTime, nullable=True)
+    high_water = db.Column(db.DateTime, nullable=True)  # how far the job has scanned
+    high_water_version = db.Column(db.BigInteger, nullable=True)  # same, for jobs that work by row version
+    last_result = db.Column(db.JSON, nullable=True)
+
+
+class SchemaMigration(db.Model):
+    """A step of app/migrations.py that has been applied to this database"""
+    __tablename__ = 'schema_migrations'
+    name = db.Column(db.String(100), primary_key=True)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class NotificationArchive(db.Model):
+    """Read notifications moved out of the hot table by the retention job"""
+    __tablename__ = 'notifications_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    message = db.Column(db.String(500), nullable=False)
+    type = db.Column(db.String(50), nullable=False)
+    is_read = db.Column(db.Boolean, default=True)
+    count = db.Column(db.Integer, nullable=False, default=1)
+    created_at = db.Column(db.DateTime, nullable=False)
+    updated_at = db.Column(db.DateTime)
+    user_id = db.Column(db.Integer, nullable=False, index=True)
+    task_project_id = db.Column(db.Integer, nullable=True)
+    task_number = db.Column(db.Integer, nullable=True)
+    project_id = db.Column(db.Integer, nullable=True)
+    triggered_by = db.Column(db.Integer, nullable=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+@db.event.listens_for(ActivityLog.__table__, 'after_create')
+@db.event.listens_for(Notification.__table__, 'after_create')
+def create_initial_partitions(target, connection, **kw):
+    create_default_partition(connection, target.name)
+    create_month_partitions(connection, target.name)
@@ -0,0 +1,99 @@
+from datetime import datetime
+from sqlalchemy import text
+
+# ======================================
+# ====== MONTHLY RANGE PARTITIONS =======
+# ======================================
+#
+# Helpers for tables declared with postgresql_partition_by='RANGE (created_at)'.
+# Partitions are named <table>_YYYYMM and cover one calendar month; a
+# <table>_default partition catches anything outside the created range so
+# inserts never fail. PostgreSQL refuses to create a month while the
+# default partition holds rows of it, so those rows are moved into the new
+# partition first. All functions take a Connection and are no-ops on
+# databases other than PostgreSQL.
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    month = value.month - 1 + months
+    return datetime(value.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(table, start):
+    return f"{table}_{start:%Y%m}"
+
+
+def create_default_partition(connection, table):
+    if connection.dialect.name != 'postgresql':
+        return
+    connection.execute(text(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT"))
+
+
+def create_month_partitions(connection, table, months_ahead=3, now=None):
+    """Create partitions for the current month and the next months_ahead months.
+
+    Rows of a new month found in the default partition are moved into it.
+    Returns the names of the partitions that were created.
+    """
+    if connection.dialect.name != 'postgresql':
+        return []
+    existing = set(list_partitions(connection, table))
+    start = month_start(now or datetime.utcnow())
+    created = []
+    for i in range(months_ahead + 1):
+        lower, upper = add_months(start, i), add_months(start, i + 1)
+        name = partition_name(table, lower)
+        if name in existing:
+            continue
+        bounds = f"FOR VALUES FROM ('{lower:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+        in_month = {"lower": lower, "upper": upper}
+        default = f"{table}_default"
+        if default in existing and connection.execute(text(
+            f"SELECT EXISTS (SELECT 1 FROM {default} WHERE created_at >= :lower AND created_at < :upper)"
+        ), in_month).scalar():
+            # Fill a detached table, then attach it once the default no longer overlaps
+            connection.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+            connection.execute(text(
+                f"WITH moved AS (DELETE FROM {default} WHERE created_at >= :lower AND created_at < :upper RETURNING *) "
+                f"INSERT INTO {name} SELECT * FROM moved"
+            ), in_month)
+            connection.execute(text(f"ALTER TABLE {table} ATTACH PARTITION {name} {bounds}"))
+        else:
+            connection.execute(text(f"CREATE TABLE {name} PARTITION OF {table} {bounds}"))
+        created.append(name)
+    return created
+
+
+def list_partitions(connection, table):
+    """Names of the partitions attached to table"""
+    if connection.dialect.name != 'postgresql':
+        return []
+    return connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table ORDER BY c.relname"
+    ), {"table": table}).scalars().all()
+
+
+def month_partitions_before(connection, table, cutoff):
+    """Monthly partitions whose whole range ends on or before cutoff"""
+    names = []
+    for name in list_partitions(connection, table):
+        suffix = name[len(table) + 1:]
+        if not suffix.isdigit():
+            continue  # the default partition
+        start = datetime.strptime(suffix, '%Y%m')
+        if add_months(start, 1) <= cutoff:
+            names.append(name)
+    return names
+
+
+def drop_partition(connection, table, name):
+    """Detach and drop one partition"""
+    connection.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+    connection.execute(text(f"DROP TABLE {name}"))
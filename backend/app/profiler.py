@@ -0,0 +1,141 @@
+import json
+import os
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+from time import monotonic
+from flask import g, request, current_app
+
+# ======================================
+# ========== SAMPLING PROFILER ==========
+# ======================================
+#
+# Opt-in (PROFILER_ENABLED=true). An admin picks what to profile through
+# PUT /admin/profiler: a list of endpoints and/or every N-th request. For a
+# chosen request a background thread samples the request thread's stack
+# every PROFILE_INTERVAL_MS and, when the request ends, writes the samples
+# in folded-stack format (one "frame;frame;frame count" line per stack) to
+# PROFILE_DIR. Feed the files to flamegraph.pl or open them in speedscope.
+#
+# The settings live in PROFILE_DIR/settings.json so every worker process
+# picks them up. Requests that are not profiled only pay a set lookup.
+
+SETTINGS_FILE = 'settings.json'
+_settings = {"endpoints": [], "every_n": 0}
+_settings_checked = 0.0
+_settings_mtime = None
+_request_count = 0
+_count_lock = threading.Lock()
+
+
+def _settings_path():
+    return os.path.join(current_app.config['PROFILE_DIR'], SETTINGS_FILE)
+
+
+def get_settings():
+    """Current settings, re-read from disk at most once a second"""
+    global _settings, _settings_checked, _settings_mtime
+    if monotonic() - _settings_checked >= 1:
+        _settings_checked = monotonic()
+        try:
+            mtime = os.path.getmtime(_settings_path())
+        except OSError:
+            mtime = None
+        if mtime != _settings_mtime:
+            _settings_mtime = mtime
+            try:
+                with open(_settings_path()) as f:
+                    _settings = json.load(f)
+            except (OSError, ValueError):
+                _settings = {"endpoints": [], "every_n": 0}
+    return _settings
+
+
+def update_settings(endpoints, every_n):
+    global _settings, _settings_checked
+    _settings = {"endpoints": sorted(set(endpoints)), "every_n": every_n}
+    path = _settings_path()
+    with open(f"{path}.tmp", 'w') as f:
+        json.dump(_settings, f)
+    os.replace(f"{path}.tmp", path)
+    _settings_checked = 0.0
+    return _settings
+
+
+def list_profiles(limit=50):
+    """Most recent profile files, newest first"""
+    directory = current_app.config['PROFILE_DIR']
+    names = [n for n in os.listdir(directory) if n.endswith('.folded')]
+    names.sort(key=lambda n: os.path.getmtime(os.path.join(directory, n)), reverse=True)
+    return [{"file": n, "bytes": os.path.getsize(os.path.join(directory, n))} for n in names[:limit]]
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's stack at a fixed interval until stopped"""
+
+    def __init__(self, thread_id, interval, max_seconds):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.deadline = monotonic() + max_seconds
+        self.samples = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval) and monotonic() < self.deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def _should_profile():
+    global _request_count
+    settings = get_settings()
+    if request.endpoint in settings["endpoints"]:
+        return True
+    if settings["every_n"]:
+        with _count_lock:
+            _request_count += 1
+            return _request_count % settings["every_n"] == 0
+    return False
+
+
+def _start_request():
+    if request.endpoint is None or not _should_profile():
+        return
+    config = current_app.config
+    g.profiler = StackSampler(threading.get_ident(), config['PROFILE_INTERVAL_MS'] / 1000, config['PROFILE_MAX_SECONDS'])
+    g.profiler.start()
+
+
+def _finish_request(exc):
+    sampler = g.pop('profiler', None)
+    if sampler is None:
+        return
+    sampler.stop()
+    if not sampler.samples:
+        return
+    name = f"{datetime.utcnow():%Y%m%dT%H%M%S%f}-{request.endpoint}-{os.getpid()}.folded"
+    with open(os.path.join(current_app.config['PROFILE_DIR'], name), 'w') as f:
+        for stack, count in sampler.samples.most_common():
+            f.write(f"{stack} {count}\n")
+
+
+def init_profiler(app):
+    """Register the request hooks (no-op unless PROFILER_ENABLED)"""
+    if not app.config['PROFILER_ENABLED']:
+        return
+    os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+    app.before_request(_start_request)
+    app.teardown_request(_finish_request)
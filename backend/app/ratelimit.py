@@ -0,0 +1,236 @@
+import threading
+import uuid
+from math import ceil
+from time import monotonic
+from flask import g, request, jsonify, current_app
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from .metrics import inc
+
+try:
+    import redis
+except ImportError:  # optional, only needed for RATE_LIMIT_STORAGE_URL
+    redis = None
+
+# ======================================
+# ===== RATE AND CONCURRENCY LIMITS =====
+# ======================================
+#
+# RATE_LIMITS maps a blueprint name ('admin') or an endpoint
+# ('admin.get_report_stats') to a limit; endpoint entries override the
+# blueprint's keys. A limit can have:
+#
+#   rate, burst   token bucket per user (JWT identity, or client address for
+#                 anonymous requests): burst requests at once, refilled at
+#                 rate per second. Over it -> 429 with Retry-After.
+#   concurrency   requests of that endpoint (or blueprint) running at the
+#                 same time across all users. Over it -> 503 with
+#                 Retry-After, without waiting for a slot.
+#
+# Limits are checked before the view runs, so a rejected request never
+# touches the database. The default store keeps the state in the process:
+# buckets and caps are per worker. Set RATE_LIMIT_STORAGE_URL to a Redis
+# URL to share them between workers. If Redis is down, requests are let
+# through rather than failed.
+
+# Heavy endpoints; RATE_LIMITS in the environment (JSON) adds or replaces entries
+DEFAULT_RATE_LIMITS = {
+    'admin.get_report_stats': {'rate': 0.5, 'burst': 5, 'concurrency': 2},
+    'admin.get_project_details': {'rate': 2, 'burst': 20, 'concurrency': 8},
+    'member.get_member_project_details': {'rate': 2, 'burst': 20, 'concurrency': 8},
+    'admin.upload_project_file': {'rate': 0.2, 'burst': 10, 'concurrency': 4},
+    'member.upload_task_file': {'rate': 0.2, 'burst': 10, 'concurrency': 4},
+    'member.add_attachment': {'rate': 0.2, 'burst': 10, 'concurrency': 4},
+    'main.login': {'rate': 0.2, 'burst': 10},  # bcrypt, keyed by client address
+}
+
+# Atomic token bucket: KEYS[1] hash {tokens, ts}; ARGV rate, burst.
+# Returns 0 when a token was taken, otherwise milliseconds until one is free.
+TOKEN_BUCKET_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+local rate = tonumber(ARGV[1]) / 1000
+local burst = tonumber(ARGV[2])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) / rate)
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate))
+return wait
+"""
+
+# Concurrency slots: KEYS[1] sorted set of slot ids scored by start time;
+# ARGV limit, slot id, timeout ms. Slots of crashed workers expire.
+ACQUIRE_SLOT_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000 + math.floor(tonumber(now[2]) / 1000)
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[3]))
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[1]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now, ARGV[2])
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+
+class MemoryStore:
+    """Buckets and concurrency counters of this process"""
+
+    MAX_BUCKETS = 10000
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}  # key -> (tokens, updated)
+        self._active = {}   # key -> requests running
+
+    def take(self, key, rate, burst):
+        """Take a token; returns 0, or the seconds until one is available"""
+        now = monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            if len(self._buckets) >= self.MAX_BUCKETS and key not in self._buckets:
+                self._prune(now)
+            self._buckets[key] = (tokens, now)
+        return wait
+
+    def _prune(self, now):
+        # A bucket idle for an hour is full again, forgetting it changes nothing
+        for key, (tokens, updated) in list(self._buckets.items()):
+            if now - updated > 3600:
+                del self._buckets[key]
+
+    def acquire(self, key, limit):
+        with self._lock:
+            if self._active.get(key, 0) >= limit:
+                return None
+            self._active[key] = self._active.get(key, 0) + 1
+        return key
+
+    def release(self, key, slot):
+        with self._lock:
+            self._active[key] -= 1
+
+
+class RedisStore:
+    """Buckets and concurrency slots shared through Redis"""
+
+    def __init__(self, url, slot_timeout):
+        if redis is None:
+            raise RuntimeError("RATE_LIMIT_STORAGE_URL needs the redis package (pip install redis)")
+        self.client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self.slot_timeout_ms = int(slot_timeout * 1000)
+        self._take = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._acquire = self.client.register_script(ACQUIRE_SLOT_SCRIPT)
+
+    def take(self, key, rate, burst):
+        try:
+            return self._take(keys=[f"ratelimit:bucket:{key}"], args=[rate, burst]) / 1000
+        except redis.RedisError as e:
+            current_app.logger.warning("Rate limit store unavailable, not limiting: %s", e)
+            return 0
+
+    def acquire(self, key, limit):
+        slot = uuid.uuid4().hex
+        try:
+            acquired = self._acquire(keys=[f"ratelimit:slots:{key}"], args=[limit, slot, self.slot_timeout_ms])
+        except redis.RedisError as e:
+            current_app.logger.warning("Rate limit store unavailable, not limiting: %s", e)
+            return ''  # let the request through without a slot
+        return slot if acquired else None
+
+    def release(self, key, slot):
+        if not slot:
+            return
+        try:
+            self.client.zrem(f"ratelimit:slots:{key}", slot)
+        except redis.RedisError:
+            pass  # the slot expires after RATE_LIMIT_SLOT_TIMEOUT
+
+
+# ======================================
+# ============ REQUEST HOOKS ============
+# ======================================
+
+_store = None
+_resolved = {}  # endpoint -> (limit, bucket scope, cap scope), or None
+
+
+def _limit_for(endpoint, blueprint):
+    if endpoint not in _resolved:
+        limits = current_app.config['RATE_LIMITS']
+        own = limits.get(endpoint) or {}
+        limit = dict(limits.get(blueprint) or {}, **own)
+        # A bucket or cap set on the blueprint is shared by all its endpoints
+        bucket_scope = endpoint if 'rate' in own else blueprint
+        cap_scope = endpoint if 'concurrency' in own else blueprint
+        _resolved[endpoint] = (limit, bucket_scope, cap_scope) if limit else None
+    return _resolved[endpoint]
+
+
+def _client_key():
+    """JWT identity of the caller, or the client address without a valid token"""
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:  # expired or invalid, the view itself will answer 401/422
+        identity = None
+    return f"user:{identity}" if identity is not None else f"addr:{request.remote_addr}"
+
+
+def _reject(status, message, retry_after, reason):
+    inc('rate_limited_total', endpoint=request.endpoint, reason=reason)
+    response = jsonify({"msg": message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(max(1, ceil(retry_after)))
+    return response
+
+
+def _check_request():
+    if request.endpoint is None or request.method == 'OPTIONS':
+        return None
+    resolved = _limit_for(request.endpoint, request.blueprint)
+    if resolved is None:
+        return None
+    limit, bucket_scope, cap_scope = resolved
+
+    if 'rate' in limit:
+        wait = _store.take(f"{bucket_scope}:{_client_key()}", limit['rate'], limit.get('burst', 1))
+        if wait:
+            return _reject(429, "Too many requests, please slow down", wait, 'rate')
+
+    if 'concurrency' in limit:
+        slot = _store.acquire(cap_scope, limit['concurrency'])
+        if slot is None:
+            return _reject(503, "Server busy, please retry shortly",
+                           current_app.config['RATE_LIMIT_BUSY_RETRY_SECONDS'], 'concurrency')
+        g.rate_limit_slot = (cap_scope, slot)
+    return None
+
+
+def _release_slot(exc):
+    held = g.pop('rate_limit_slot', None)
+    if held is not None:
+        _store.release(*held)
+
+
+def init_rate_limits(app):
+    """Install the store and request hooks (no-op unless RATE_LIMIT_ENABLED)"""
+    global _store
+    if not app.config['RATE_LIMIT_ENABLED']:
+        return
+    url = app.config['RATE_LIMIT_STORAGE_URL']
+    _store = RedisStore(url, app.config['RATE_LIMIT_SLOT_TIMEOUT']) if url else MemoryStore()
+    _resolved.clear()
+    app.before_request(_check_request)
+    app.teardown_request(_release_slot)
@@ -0,0 +1,112 @@
+from time import monotonic
+import random
+from flask import g, request, current_app, has_request_context
+from flask_sqlalchemy.session import Session
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+
+# ======================================
+# ========= READ-REPLICA ROUTING ========
+# ======================================
+#
+# GET requests in the admin, member and shared blueprints run their SELECTs
+# on a replica (DATABASE_REPLICA_URLS, comma separated). Everything else -
+# writes, flushes, other blueprints, scripts outside a request - uses the
+# primary. A replica that fails its connection check is skipped for
+# REPLICA_RETRY_SECONDS and the request falls back to the primary.
+#
+# After a user's write, their reads stay on the primary for
+# REPLICA_STICKY_SECONDS so they see their own changes. The write times are
+# kept per process; with several workers, keep the window above the
+# expected replication lag.
+#
+# PRIMARY_ENDPOINTS always read the primary. GET /sync hands out a cursor
+# that must not be ahead of the rows it was sent with, so its cursor and
+# change queries have to see the same database.
+
+READ_BLUEPRINTS = ('admin', 'member', 'shared')
+READ_METHODS = ('GET', 'HEAD')
+PRIMARY_ENDPOINTS = ('shared.sync_changes',)
+
+_last_write = {}  # user id -> monotonic time of their last write
+_down_until = {}  # bind key -> monotonic time the replica may be retried
+
+
+class RoutingSession(Session):
+    """Session that sends SELECTs to a replica during read-only requests"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (bind is None and not self._flushing and getattr(clause, 'is_select', False)
+                and has_request_context() and g.get('db_read_only')):
+            replica = _request_replica(self._db)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _request_replica(db):
+    """Pick one healthy replica per request, or None to use the primary"""
+    if 'db_replica' not in g:
+        g.db_replica = None
+        keys = list(current_app.config['REPLICA_BIND_KEYS'])
+        random.shuffle(keys)
+        for key in keys:
+            if _down_until.get(key, 0) > monotonic():
+                continue
+            engine = db.engines[key]
+            try:
+                with engine.connect():
+                    pass
+            except Exception as e:
+                current_app.logger.warning("Replica %s unavailable, using primary: %s", key, e)
+                _down_until[key] = monotonic() + current_app.config['REPLICA_RETRY_SECONDS']
+                continue
+            g.db_replica = engine
+            break
+    return g.db_replica
+
+
+def _user_id():
+    try:
+        return get_jwt_identity()
+    except Exception:
+        return None
+
+
+def route_reads():
+    """before_request: decide whether this request may read from a replica"""
+    g.db_read_only = False
+    if request.method not in READ_METHODS or request.blueprint not in READ_BLUEPRINTS:
+        return
+    if request.endpoint in PRIMARY_ENDPOINTS:
+        return
+    try:
+        verify_jwt_in_request(optional=True)
+    except Exception:
+        return  # the view's @jwt_required() reports the bad token
+    user_id = _user_id()
+    written = _last_write.get(user_id)
+    if written is not None and monotonic() - written < current_app.config['REPLICA_STICKY_SECONDS']:
+        return
+    g.db_read_only = True
+
+
+def remember_writes(response):
+    """after_request: pin the user to the primary for a while after a write"""
+    if request.method not in READ_METHODS and request.method != 'OPTIONS' and response.status_code < 400:
+        user_id = _user_id()
+        if user_id is not None:
+            _last_write[user_id] = monotonic()
+    return response
+
+
+def init_replicas(app, replica_urls):
+    """Register replica binds and the request hooks (no-op without replicas)"""
+    urls = [url.strip() for url in replica_urls.split(',') if url.strip()]
+    app.config['REPLICA_BIND_KEYS'] = [f'replica_{i}' for i in range(len(urls))]
+    if not urls:
+        return
+    binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+    for key, url in zip(app.config['REPLICA_BIND_KEYS'], urls):
+        binds[key] = {'url': url, 'pool_pre_ping': True}
+    app.before_request(route_reads)
+    app.after_request(remember_writes)
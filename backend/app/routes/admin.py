@@ -1,11 +1,31 @@
-from flask import Blueprint, request, jsonify, send_file
-from ..models import User, Project, Task, ActivityLog, ProjectFile, Comment, db
+from flask import Blueprint, request, jsonify, send_file, current_app
+from ..models import User, Project, Task, ActivityLog, ProjectFile, project_members, db
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from datetime import datetime
+from datetime import datetime, timedelta
 from functools import wraps
+from sqlalchemy.orm import load_only
+from sqlalchemy.dialects.postgresql import insert
 import os
 from werkzeug.utils import secure_filename
-from .shared import create_notification, notify_project_members
+from ..etag import (conditional, projects_version, project_version, all_tasks_version, members_version,
+                    reports_version, task_list_criteria)
+from ..activity import log_activity, event_type_codes
+from ..membership import forget_memberships
+from ..snapshots import snapshot_series, forget_snapshots
+from ..counters import (
+    adjust_project_counters, count_task, count_status_change, count_all_completed, count_user_removed
+)
+from ..metrics import record_upload
+from .. import profiler
+from .shared import (
+    create_notification, create_notifications, notify_project_members, add_task_comment, page_args,
+    project_summary, project_tasks_page, project_member_list, project_activity_page
+)
+from ..fields import (
+    PROJECT_FIELDS, TASK_FIELDS, MEMBER_FIELDS, PROJECT_LIST_FIELDS, PROJECT_DETAIL_FIELDS,
+    PROJECT_TASK_FIELDS, ALL_TASK_FIELDS, MEMBER_LIST_FIELDS,
+    PROJECT_INCLUDES, MEMBER_INCLUDES, select_fields, select_includes, load_options, serialize
+)
 
 admin = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -28,18 +48,15 @@ def admin_required(fn):
 @admin.route('/projects', methods=['GET'])
 @jwt_required()
 @admin_required
+@conditional(projects_version)
 def get_projects():
-    """Get all projects"""
-    projects = Project.query.all()
-    return jsonify({"projects": [{
-        "id": p.id,
-        "name": p.name,
-        "description": p.description,
-        "start_date": p.start_date.isoformat() if p.start_date else None,
-        "due_date": p.due_date.isoformat() if p.due_date else None,
-        "completion_date": p.completion_date.isoformat() if p.completion_date else None,
-        "priority": p.priority
-    } for p in projects]})
+    """Get all projects (?fields= limits the returned columns)"""
+    fields, error = select_fields(request.args.get('fields'), PROJECT_FIELDS, PROJECT_LIST_FIELDS)
+    if error:
+        return jsonify({"msg": error}), 400
+
+    projects = Project.query.options(*load_options(Project, fields, PROJECT_FIELDS)).all()
+    return jsonify({"projects": [serialize(p, fields, PROJECT_FIELDS) for p in projects]})
 
 
 @admin.route('/projects', methods=['POST'])
@@ -64,46 +81,85 @@ def create_project():
 @admin.route('/projects/<int:project_id>', methods=['GET'])
 @jwt_required()
 @admin_required
+@conditional(project_version)
 def get_project_details(project_id):
-    """Get single project with full details (tasks, members, activity logs)"""
+    """Get single project with full details (tasks, members, activity logs)
+
+    ?fields= and ?task_fields= limit the project and task columns,
+    ?include= picks which of tasks, members and activity_logs are embedded.
+    """
+    fields, error = select_fields(request.args.get('fields'), PROJECT_FIELDS, PROJECT_DETAIL_FIELDS)
+    if error:
+        return jsonify({"msg": error}), 400
+    task_fields, error = select_fields(request.args.get('task_fields'), TASK_FIELDS, PROJECT_TASK_FIELDS)
+    if error:
+        return jsonify({"msg": error}), 400
+    includes, error = select_includes(request.args.get('include'), PROJECT_INCLUDES)
+    if error:
+        return jsonify({"msg": error}), 400
+
+    project = Project.query.options(*load_options(Project, fields, PROJECT_FIELDS)).get_or_404(project_id)
+    result = serialize(project, fields, PROJECT_FIELDS)
+
+    if 'tasks' in includes:
+        result["tasks"], _ = project_tasks_page(project.id, task_fields)
+    if 'members' in includes:
+        result["members"] = project_member_list(project.id)
+    if 'activity_logs' in includes:
+        result["activity_logs"], _ = project_activity_page(project.id, 1, 50)  # latest only; page via /activity
+
+    return jsonify({"project": result})
+
+
+@admin.route('/projects/<int:project_id>/summary', methods=['GET'])
+@jwt_required()
+@admin_required
+@conditional(project_version)
+def get_project_summary(project_id):
+    """Get project info with task/member/file counts (no sub-collections)"""
     project = Project.query.get_or_404(project_id)
-    return jsonify({
-        "project": {
-            "id": project.id,
-            "name": project.name,
-            "description": project.description,
-            "start_date": project.start_date.isoformat() if project.start_date else None,
-            "due_date": project.due_date.isoformat() if project.due_date else None,
-            "completion_date": project.completion_date.isoformat() if project.completion_date else None,
-            "priority": project.priority,
-            "created_at": project.created_at.isoformat(),
-            "tasks": [{
-                "project_id": t.project_id,
-                "task_number": t.task_number,
-                "title": t.title,
-                "description": t.description,
-                "status": t.status,
-                "priority": t.priority,
-                "start_date": t.start_date.isoformat() if t.start_date else None,
-                "due_date": t.due_date.isoformat() if t.due_date else None,
-                "completion_date": t.completion_date.isoformat() if t.completion_date else None,
-                "assigned_to": t.assigned_to,
-                "assignee_name": User.query.get(t.assigned_to).name if t.assigned_to else None,
-                "attachments_count": len(t.attachments)
-            } for t in project.tasks],
-            "members": [{
-                "id": m.id,
-                "name": m.name,
-                "email": m.email
-            } for m in project.members],
-            "activity_logs": [{
-                "id": log.id,
-                "action": log.action,
-                "user_name": User.query.get(log.user_id).name,
-                "created_at": log.created_at.isoformat()
-            } for log in ActivityLog.query.filter_by(project_id=project.id).order_by(ActivityLog.created_at.desc()).all()]
-        }
-    })
+    return jsonify({"project": project_summary(project)})
+
+
+@admin.route('/projects/<int:project_id>/tasks', methods=['GET'])
+@jwt_required()
+@admin_required
+@conditional(project_version)
+def get_project_tasks(project_id):
+    """Get one page of a project's tasks (?page=, ?per_page=, ?fields=)"""
+    Project.query.get_or_404(project_id)
+    fields, error = select_fields(request.args.get('fields'), TASK_FIELDS, PROJECT_TASK_FIELDS)
+    if error:
+        return jsonify({"msg": error}), 400
+
+    page, per_page = page_args()
+    tasks, has_more = project_tasks_page(project_id, fields, page, per_page)
+    return jsonify({"tasks": tasks, "page": page, "per_page": per_page, "has_more": has_more})
+
+
+@admin.route('/projects/<int:project_id>/members', methods=['GET'])
+@jwt_required()
+@admin_required
+@conditional(project_version)
+def get_project_members(project_id):
+    """Get the members of a project"""
+    Project.query.get_or_404(project_id)
+    return jsonify({"members": project_member_list(project_id)})
+
+
+@admin.route('/projects/<int:project_id>/activity', methods=['GET'])
+@jwt_required()
+@admin_required
+@conditional(project_version)
+def get_project_activity(project_id):
+    """Get one page of a project's activity logs, newest first (?page=, ?per_page=, ?event_type=a,b)"""
+    Project.query.get_or_404(project_id)
+    event_types, error = event_type_codes(request.args.get('event_type'))
+    if error:
+        return jsonify({"msg": error}), 400
+    page, per_page = page_args(default_per_page=20)
+    logs, has_more = project_activity_page(project_id, page, per_page, event_types)
+    return jsonify({"activity_logs": logs, "page": page, "per_page": per_page, "has_more": has_more})
 
 
 @admin.route('/projects/<int:project_id>', methods=['PUT'])
@@ -135,7 +191,8 @@ def delete_project(project_id):
     Task.query.filter_by(project_id=project_id).delete()
     
     # Delete all activity logs associated with the project
-    ActivityLog.query.filter_by(user_id=project_id).delete()
+    ActivityLog.query.filter_by(project_id=project_id).delete()
+    forget_snapshots('project', project_id)
     
     # Delete the project
     db.session.delete(project)
@@ -143,94 +200,173 @@ def delete_project(project_id):
     return jsonify({"msg": "Project deleted"})
 
 
+# Pending tasks listed when a project cannot be completed yet
+PENDING_TASKS_SHOWN = 20
+
+
 @admin.route('/projects/<int:project_id>/complete', methods=['PUT'])
 @jwt_required()
 @admin_required
 def complete_project(project_id):
-    """Mark a project as complete and record completion date"""
+    """Mark a project as complete and record completion date
+
+    Refused while tasks are pending; the error lists the first
+    PENDING_TASKS_SHOWN of them and their total. ?force=true completes the
+    pending tasks with one UPDATE instead.
+    """
     project = Project.query.get_or_404(project_id)
-    
-    # Get all tasks to check their status
-    all_tasks = Task.query.filter_by(project_id=project_id).all()
-    pending_tasks = [t for t in all_tasks if t.status != 'completed']
-    
-    # Check if there are pending tasks
-    if pending_tasks:
-        return jsonify({
-            "msg": "Cannot mark project as complete. The following tasks are still pending:",
-            "pending_tasks": [{
-                "project_id": t.project_id,
-                "task_number": t.task_number,
-                "title": t.title,
-                "status": t.status
-            } for t in pending_tasks]
-        }), 400
-    
+    force = request.args.get('force', 'false').lower() == 'true'
+    now = datetime.utcnow()
+    pending = Task.query.filter(Task.project_id == project_id, Task.status.is_distinct_from('completed'))
+
+    forced_tasks = 0
+    if force:
+        forced_tasks = pending.update(
+            {Task.status: 'completed', Task.completion_date: now, Task.updated_at: now},
+            synchronize_session=False
+        )
+        if forced_tasks:
+            count_all_completed(project_id)
+    else:
+        # Stops after PENDING_TASKS_SHOWN + 1 rows instead of loading every task
+        shown = pending.with_entities(
+            Task.project_id, Task.task_number, Task.title, Task.status
+        ).order_by(Task.task_number).limit(PENDING_TASKS_SHOWN + 1).all()
+        if shown:
+            pending_count = pending.count() if len(shown) > PENDING_TASKS_SHOWN else len(shown)
+            return jsonify({
+                "msg": "Cannot mark project as complete. The following tasks are still pending:",
+                "pending_count": pending_count,
+                "pending_tasks": [{
+                    "project_id": t.project_id,
+                    "task_number": t.task_number,
+                    "title": t.title,
+                    "status": t.status
+                } for t in shown[:PENDING_TASKS_SHOWN]]
+            }), 400
+
     # Record completion date
-    project.completion_date = datetime.utcnow()
-    
+    project.completion_date = now
+
     # Log activity
     user_id = get_jwt_identity()
-    log = ActivityLog(
-        action=f"Marked project '{project.name}' as complete",
-        user_id=int(user_id),
-        project_id=project_id
-    )
-    db.session.add(log)
+    if forced_tasks:
+        log_activity('project_completed', user_id, project_id, forced_tasks=forced_tasks)
+    else:
+        log_activity('project_completed', user_id, project_id)
     db.session.commit()
-    
+
     return jsonify({
         "msg": "Project marked as complete",
-        "completion_date": project.completion_date.isoformat()
+        "completion_date": project.completion_date,
+        "forced_tasks": forced_tasks
     })
 
 
+def _id_list(data, key):
+    """A list of integer ids from the request body, or None if malformed"""
+    value = data.get(key, [])
+    if not isinstance(value, list) or not all(isinstance(v, int) and not isinstance(v, bool) for v in value):
+        return None
+    return value
+
+
+def apply_member_changes(project, user_id, add_ids=(), remove_ids=(), keep_only=None):
+    """Change a project's members with set-based statements on project_members.
+
+    add_ids are inserted with ON CONFLICT DO NOTHING (unknown user ids are
+    skipped), remove_ids are deleted, and with keep_only every member not in
+    that list is deleted. Only the members actually added are notified.
+    Returns (added ids, removed ids, member count).
+    """
+    removed = []
+    if keep_only is not None:
+        removed = db.session.execute(project_members.delete().where(
+            project_members.c.project_id == project.id,
+            project_members.c.user_id.notin_(keep_only)
+        ).returning(project_members.c.user_id)).scalars().all()
+    if remove_ids:
+        removed += db.session.execute(project_members.delete().where(
+            project_members.c.project_id == project.id,
+            project_members.c.user_id.in_(remove_ids)
+        ).returning(project_members.c.user_id)).scalars().all()
+
+    added = []
+    if add_ids:
+        stmt = insert(project_members).from_select(
+            ['project_id', 'user_id'],
+            db.select(db.literal(project.id), User.id).where(User.id.in_(add_ids))
+        ).on_conflict_do_nothing()
+        added = db.session.execute(stmt.returning(project_members.c.user_id)).scalars().all()
+
+    counts = adjust_project_counters(project.id, member_count=len(added) - len(removed))
+    member_count = counts['member_count'] if counts else project.member_count
+
+    if added or removed:
+        forget_memberships(added + removed)  # when the route commits
+        # Association rows don't touch the project, so bump its version stamp explicitly
+        project.updated_at = datetime.utcnow()
+        if added:
+            new_members = User.query.options(
+                load_only(User.id, User.notification_digest_minutes)
+            ).filter(User.id.in_(added)).all()
+            create_notifications(
+                new_members,
+                f"You have been added to project '{project.name}'",
+                "assignment",
+                project_id=project.id,
+                triggered_by=int(user_id)
+            )
+        log_activity('project_members_updated', user_id, project.id, member_count=member_count)
+    return added, removed, member_count
+
+
 @admin.route('/projects/<int:project_id>/members', methods=['PUT'])
 @jwt_required()
 @admin_required
 def update_project_members(project_id):
-    """Update project members"""
-    data = request.json
+    """Replace the project members with member_ids"""
+    data = request.json or {}
     project = Project.query.get_or_404(project_id)
-    user_id = get_jwt_identity()
-    
-    # Expects a list of user IDs
-    member_ids = data.get('member_ids', [])
-    
-    # Get existing member IDs before clearing
-    existing_member_ids = set([m.id for m in project.members])
-    new_member_ids = set(member_ids)
-    
-    # Find newly added members
-    added_member_ids = new_member_ids - existing_member_ids
-    
-    # Clear existing members
-    project.members.clear()
-    
-    # Add new members
-    new_members = User.query.filter(User.id.in_(member_ids)).all()
-    for user in new_members:
-        project.members.append(user)
-    
-    # Notify newly added members
-    for member_id in added_member_ids:
-        create_notification(
-            member_id,
-            f"You have been added to project '{project.name}'",
-            "assignment",
-            project_id=project.id,
-            triggered_by=int(user_id)
-        )
-        
-    # Log activity
-    log = ActivityLog(
-        action=f"Updated members for project '{project.name}'. Total members: {len(new_members)}",
-        user_id=int(user_id)
+    member_ids = _id_list(data, 'member_ids')
+    if member_ids is None:
+        return jsonify({"msg": "member_ids must be a list of user ids"}), 400
+
+    added, removed, member_count = apply_member_changes(
+        project, get_jwt_identity(), add_ids=member_ids, keep_only=member_ids
+    )
+    db.session.commit()
+    return jsonify({
+        "msg": f"Project members updated. Total members: {member_count}",
+        "added": added,
+        "removed": removed,
+        "member_count": member_count
+    })
+
+
+@admin.route('/projects/<int:project_id>/members', methods=['PATCH'])
+@jwt_required()
+@admin_required
+def change_project_members(project_id):
+    """Add and remove project members: {"add": [ids], "remove": [ids]}"""
+    data = request.json or {}
+    project = Project.query.get_or_404(project_id)
+    add_ids, remove_ids = _id_list(data, 'add'), _id_list(data, 'remove')
+    if add_ids is None or remove_ids is None:
+        return jsonify({"msg": "add and remove must be lists of user ids"}), 400
+    if set(add_ids) & set(remove_ids):
+        return jsonify({"msg": "A user cannot be both added and removed"}), 400
+
+    added, removed, member_count = apply_member_changes(
+        project, get_jwt_identity(), add_ids=add_ids, remove_ids=remove_ids
     )
-    db.session.add(log)
-    
     db.session.commit()
-    return jsonify({"msg": f"Project members updated. Total members: {len(new_members)}"})
+    return jsonify({
+        "msg": f"Project members updated. Total members: {member_count}",
+        "added": added,
+        "removed": removed,
+        "member_count": member_count
+    })
 
 
 # ======================================
@@ -240,29 +376,40 @@ def update_project_members(project_id):
 @admin.route('/members', methods=['GET'])
 @jwt_required()
 @admin_required
+@conditional(members_version)
 def get_members():
-    """Get all members with task counts"""
-    members = User.query.filter_by(role='member').all()
+    """Get all members with task counts (?fields= / ?include=task_counts)"""
+    fields, error = select_fields(request.args.get('fields'), MEMBER_FIELDS, MEMBER_LIST_FIELDS)
+    if error:
+        return jsonify({"msg": error}), 400
+    includes, error = select_includes(request.args.get('include'), MEMBER_INCLUDES)
+    if error:
+        return jsonify({"msg": error}), 400
+
+    members = User.query.filter_by(role='member').options(*load_options(User, fields, MEMBER_FIELDS)).all()
+
+    # Task counts by status for all the members in one grouped query
+    status_counts = {}
+    if 'task_counts' in includes and members:
+        rows = db.session.query(Task.assigned_to, Task.status, db.func.count()).filter(
+            Task.assigned_to.in_([u.id for u in members])
+        ).group_by(Task.assigned_to, Task.status).all()
+        for user_id, status, count in rows:
+            status_counts.setdefault(user_id, {})[status] = count
+
     result = []
     for u in members:
-        # Count tasks by status for this member
-        assigned_count = Task.query.filter_by(assigned_to=u.id).filter(Task.status.in_(['todo'])).count()
-        in_progress_count = Task.query.filter_by(assigned_to=u.id, status='in_progress').count()
-        pending_review_count = Task.query.filter_by(assigned_to=u.id, status='pending_review').count()
-        completed_count = Task.query.filter_by(assigned_to=u.id, status='completed').count()
-        
-        result.append({
-            "id": u.id,
-            "name": u.name,
-            "email": u.email,
-            "role": u.role,
-            "task_counts": {
-                "assigned": assigned_count,
-                "in_progress": in_progress_count,
-                "pending_review": pending_review_count,
-                "completed": completed_count
+        member_data = serialize(u, fields, MEMBER_FIELDS)
+
+        if 'task_counts' in includes:
+            counts = status_counts.get(u.id, {})
+            member_data["task_counts"] = {
+                "assigned": counts.get('todo', 0),
+                "in_progress": counts.get('in_progress', 0),
+                "pending_review": counts.get('pending_review', 0),
+                "completed": counts.get('completed', 0)
             }
-        })
+        result.append(member_data)
     return jsonify({"members": result})
 
 
@@ -322,6 +469,8 @@ def remove_member(user_id):
     for t in tasks:
         t.assigned_to = None
 
+    count_user_removed(user.id)
+    forget_snapshots('member', user.id)
     db.session.delete(user)
     db.session.commit()
     return jsonify({"msg": "Member removed, tasks unassigned"})
@@ -369,15 +518,11 @@ def create_task(project_id):
     )
     
     db.session.add(task)
+    count_task(project_id, task.status)
     
     # Log activity
     user_id = get_jwt_identity()
-    log = ActivityLog(
-        action=f"Created task #{next_task_number} '{task.title}'",
-        user_id=user_id,
-        project_id=project_id
-    )
-    db.session.add(log)
+    log_activity('task_created', user_id, project_id, next_task_number, title=task.title)
     
     # Notify the assigned member
     create_notification(
@@ -411,6 +556,7 @@ def update_task(project_id, task_number):
     # Track if assignee changed
     old_assigned_to = task.assigned_to
     new_assigned_to = data.get('assigned_to', task.assigned_to)
+    old_status = task.status
     
     task.title = data.get('title', task.title)
     task.description = data.get('description', task.description)
@@ -434,6 +580,7 @@ def update_task(project_id, task_number):
         task.completion_date = datetime.fromisoformat(data['completion_date'])
     
     task.assigned_to = new_assigned_to
+    count_status_change(project_id, old_status, task.status)
     
     # Notify new assignee if assignment changed
     if new_assigned_to and new_assigned_to != old_assigned_to:
@@ -448,12 +595,7 @@ def update_task(project_id, task_number):
         )
     
     # Log activity
-    log = ActivityLog(
-        action=f"Updated task #{task_number} '{task.title}'",
-        user_id=int(user_id),
-        project_id=project_id
-    )
-    db.session.add(log)
+    log_activity('task_updated', user_id, project_id, task_number, title=task.title)
     
     db.session.commit()
     return jsonify({"msg": "Task updated"})
@@ -467,16 +609,13 @@ def delete_task(project_id, task_number):
     task = Task.query.get_or_404((project_id, task_number))
     task_title = task.title
     
+    # The delete cascade loads the attachments anyway
+    count_task(project_id, task.status, sign=-1, attachments=len(task.attachments))
     db.session.delete(task)
     
     # Log activity
     user_id = get_jwt_identity()
-    log = ActivityLog(
-        action=f"Deleted task #{task_number} '{task_title}'",
-        user_id=int(user_id),
-        project_id=project_id
-    )
-    db.session.add(log)
+    log_activity('task_deleted', user_id, project_id, task_number, title=task_title)
     
     db.session.commit()
     return jsonify({"msg": "Task deleted"})
@@ -492,13 +631,7 @@ def admin_add_comment(project_id, task_number):
     task = Task.query.get_or_404((project_id, task_number))
     user = User.query.get(int(user_id))
     
-    comment = Comment(
-        content=data['content'],
-        task_project_id=project_id,
-        task_number=task_number,
-        user_id=int(user_id)
-    )
-    db.session.add(comment)
+    add_task_comment(task, user_id, data['content'])
     
     # Notify the assigned member about admin comment
     if task.assigned_to:
@@ -513,12 +646,7 @@ def admin_add_comment(project_id, task_number):
         )
     
     # Log activity
-    log = ActivityLog(
-        action=f"Added comment to task #{task_number} '{task.title}'",
-        user_id=int(user_id),
-        project_id=project_id
-    )
-    db.session.add(log)
+    log_activity('task_commented', user_id, project_id, task_number, title=task.title)
     
     db.session.commit()
     return jsonify({"msg": "Comment added"})
@@ -536,15 +664,11 @@ def approve_task_completion(project_id, task_number):
     
     task.status = 'completed'
     task.completion_date = datetime.utcnow()
+    count_status_change(project_id, 'pending_review', 'completed')
     
     # Log activity
     user_id = get_jwt_identity()
-    log = ActivityLog(
-        action=f"Approved completion of task #{task_number} '{task.title}'",
-        user_id=int(user_id),
-        project_id=project_id
-    )
-    db.session.add(log)
+    log_activity('task_approved', user_id, project_id, task_number, title=task.title)
     
     # Notify the assigned member
     if task.assigned_to:
@@ -576,18 +700,13 @@ def reject_task_completion(project_id, task_number):
     rejection_reason = data.get('reason', '').strip()
     
     task.status = 'in_progress'
+    count_status_change(project_id, 'pending_review', 'in_progress')
     
     user_id = get_jwt_identity()
     
     # Add rejection reason as a comment if provided
     if rejection_reason:
-        comment = Comment(
-            content=f"⚠️ Task Rejected: {rejection_reason}",
-            task_project_id=project_id,
-            task_number=task_number,
-            user_id=int(user_id)
-        )
-        db.session.add(comment)
+        add_task_comment(task, user_id, f"⚠️ Task Rejected: {rejection_reason}")
     
     # Notify the assigned member
     if task.assigned_to:
@@ -606,16 +725,9 @@ def reject_task_completion(project_id, task_number):
     
     # Log activity with rejection reason if provided
     if rejection_reason:
-        action_msg = f"Rejected completion of task #{task_number} '{task.title}'. Reason: {rejection_reason}"
+        log_activity('task_rejected', user_id, project_id, task_number, title=task.title, reason=rejection_reason)
     else:
-        action_msg = f"Rejected completion of task #{task_number} '{task.title}' - sent back for revision"
-    
-    log = ActivityLog(
-        action=action_msg,
-        user_id=int(user_id),
-        project_id=project_id
-    )
-    db.session.add(log)
+        log_activity('task_rejected', user_id, project_id, task_number, title=task.title)
     
     db.session.commit()
     return jsonify({"msg": "Task sent back for revision"})
@@ -624,48 +736,18 @@ def reject_task_completion(project_id, task_number):
 @admin.route('/tasks', methods=['GET'])
 @jwt_required()
 @admin_required
+@conditional(all_tasks_version)
 def get_all_tasks():
-    """Get all tasks with optional filtering"""
-    query = Task.query
-    
-    # Filter by status
-    status = request.args.get('status')
-    if status:
-        query = query.filter_by(status=status)
-    
-    # Filter by priority
-    priority = request.args.get('priority')
-    if priority:
-        query = query.filter_by(priority=priority)
-    
-    # Filter by assignee
-    assignee_id = request.args.get('assignee_id')
-    if assignee_id:
-        query = query.filter_by(assigned_to=int(assignee_id))
-    
-    # Filter by project
-    project_id = request.args.get('project_id')
-    if project_id:
-        query = query.filter_by(project_id=int(project_id))
-    
-    tasks = query.all()
+    """Get all tasks with optional filtering (?fields= limits the returned columns)"""
+    fields, error = select_fields(request.args.get('fields'), TASK_FIELDS, ALL_TASK_FIELDS)
+    if error:
+        return jsonify({"msg": error}), 400
+
+    # ?status=, ?priority=, ?assignee_id= and ?project_id= filters, shared with the ETag stamp
+    query = Task.query.filter(*task_list_criteria(request.args))
+    tasks = query.options(*load_options(Task, fields, TASK_FIELDS)).all()
     
-    return jsonify({
-        "tasks": [{
-            "project_id": t.project_id,
-            "task_number": t.task_number,
-            "title": t.title,
-            "description": t.description,
-            "status": t.status,
-            "priority": t.priority,
-            "start_date": t.start_date.isoformat() if t.start_date else None,
-            "due_date": t.due_date.isoformat() if t.due_date else None,
-            "completion_date": t.completion_date.isoformat() if t.completion_date else None,
-            "assigned_to": t.assigned_to,
-            "assignee_name": User.query.get(t.assigned_to).name if t.assigned_to else None,
-            "project_name": Project.query.get(t.project_id).name
-        } for t in tasks]
-    })
+    return jsonify({"tasks": [serialize(t, fields, TASK_FIELDS) for t in tasks]})
 
 
 # ======================================
@@ -675,6 +757,7 @@ def get_all_tasks():
 @admin.route('/reports/stats', methods=['GET'])
 @jwt_required()
 @admin_required
+@conditional(reports_version)
 def get_report_stats():
     """Get report statistics"""
     from datetime import datetime
@@ -713,12 +796,14 @@ def get_report_stats():
         {"id": p[0], "name": p[1], "completed": p[2]} for p in top_performers
     ]
     
-    # 7. Project Progress (completion % for each project)
-    projects = Project.query.all()
+    # 7. Project Progress (completion % for each project), from the project counters
+    projects = Project.query.options(
+        load_only(Project.id, Project.name, Project.task_count, Project.completed_count)
+    ).order_by(Project.id).all()
     project_progress = []
     for p in projects:
-        total = len(p.tasks)
-        completed = len([t for t in p.tasks if t.status == 'completed'])
+        total = p.task_count
+        completed = p.completed_count
         progress = round((completed / total * 100), 1) if total > 0 else 0
         project_progress.append({
             "id": p.id,
@@ -752,13 +837,88 @@ def get_report_stats():
     })
 
 
+# Default and longest date range of the trend reports, in days
+TREND_DAYS = 30
+TREND_MAX_DAYS = 366
+
+
+def _trend_args():
+    """Read the owner and date range of a trend report.
+
+    ?project_id= or ?member_id=, plus ?from= and ?to= as ISO dates (the last
+    TREND_DAYS days by default). Returns ((kind, owner id, first day, last
+    day), None), or (None, error response).
+    """
+    project_id = request.args.get('project_id', type=int)
+    member_id = request.args.get('member_id', type=int)
+    if (project_id is None) == (member_id is None):
+        return None, (jsonify({"msg": "Pass either project_id or member_id"}), 400)
+    try:
+        last_day = datetime.fromisoformat(request.args['to']).date() if request.args.get('to') else datetime.utcnow().date()
+        first_day = (datetime.fromisoformat(request.args['from']).date() if request.args.get('from')
+                     else last_day - timedelta(days=TREND_DAYS - 1))
+    except ValueError:
+        return None, (jsonify({"msg": "from and to must be ISO dates"}), 400)
+    if first_day > last_day or (last_day - first_day).days >= TREND_MAX_DAYS:
+        return None, (jsonify({"msg": f"The range must be 1 to {TREND_MAX_DAYS} days"}), 400)
+
+    if project_id is not None:
+        Project.query.options(load_only(Project.id)).get_or_404(project_id)
+        return ('project', project_id, first_day, last_day), None
+    User.query.options(load_only(User.id)).get_or_404(member_id)
+    return ('member', member_id, first_day, last_day), None
+
+
+@admin.route('/reports/burndown', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_report_burndown():
+    """Remaining and completed tasks per day of a project or member, from the daily snapshots"""
+    args, error = _trend_args()
+    if error:
+        return error
+    return jsonify({"series": [{
+        "day": s.day,
+        "total": s.total,
+        "remaining": s.total - s.completed,
+        "completed": s.completed
+    } for s in snapshot_series(*args)]})
+
+
+@admin.route('/reports/cumulative-flow', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_report_cumulative_flow():
+    """Tasks per status per day of a project or member, from the daily snapshots"""
+    args, error = _trend_args()
+    if error:
+        return error
+    return jsonify({"series": [{
+        "day": s.day,
+        "todo": s.todo,
+        "in_progress": s.in_progress,
+        "pending_review": s.pending_review,
+        "completed": s.completed
+    } for s in snapshot_series(*args)]})
+
+
+@admin.route('/reports/throughput', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_report_throughput():
+    """Tasks completed per day by a project or member, from the daily snapshots"""
+    args, error = _trend_args()
+    if error:
+        return error
+    series = [{"day": s.day, "completed": s.completed_today} for s in snapshot_series(*args)]
+    return jsonify({"series": series, "total": sum(point["completed"] for point in series)})
+
+
 # ======================================
 # ========== FILE ROUTES ===============
 # ======================================
 
-# Ensure uploads directory exists
-UPLOADS_DIR = '/app/uploads/projects'
-os.makedirs(UPLOADS_DIR, exist_ok=True)
+UPLOADS_DIR = '/app/uploads/projects'  # created on first upload
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx', 'xls', 'xlsx', 'zip'}
 
 def allowed_file(filename):
@@ -792,8 +952,11 @@ def upload_project_file(project_id):
         # Add timestamp to make unique
         import time
         filename = f"{int(time.time())}_{filename}"
+        os.makedirs(UPLOADS_DIR, exist_ok=True)
         filepath = os.path.join(UPLOADS_DIR, filename)
+        started = time.perf_counter()
         file.save(filepath)
+        record_upload('project', filepath, started)
         
         # Create database record
         project_file = ProjectFile(
@@ -813,12 +976,7 @@ def upload_project_file(project_id):
         )
         
         # Log activity
-        log = ActivityLog(
-            action=f"Uploaded file '{file.filename}' to project",
-            user_id=user.id,
-            project_id=project_id
-        )
-        db.session.add(log)
+        log_activity('project_file_uploaded', user.id, project_id, filename=file.filename)
         db.session.commit()
         
         return jsonify({
@@ -827,7 +985,7 @@ def upload_project_file(project_id):
                 "id": project_file.id,
                 "filename": project_file.filename,
                 "file_url": project_file.file_url,
-                "uploaded_at": project_file.uploaded_at.isoformat(),
+                "uploaded_at": project_file.uploaded_at,
                 "uploaded_by": user.name
             }
         }), 201
@@ -850,7 +1008,7 @@ def get_project_files(project_id):
             "id": f.id,
             "filename": f.filename,
             "file_url": f.file_url,
-            "uploaded_at": f.uploaded_at.isoformat(),
+            "uploaded_at": f.uploaded_at,
             "uploaded_by": User.query.get(f.uploaded_by).name
         } for f in files]
     })
@@ -881,3 +1039,37 @@ def delete_project_file(project_id, file_id):
     except Exception as e:
         db.session.rollback()
         return jsonify({"msg": f"Error deleting file: {str(e)}"}), 500
+
+
+# ======================================
+# ========== PROFILER ROUTES ===========
+# ======================================
+
+@admin.route('/profiler', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_profiler():
+    """Show what is being profiled and the latest profile files"""
+    if not current_app.config['PROFILER_ENABLED']:
+        return jsonify({"msg": "Profiler is disabled (set PROFILER_ENABLED=true)"}), 404
+    return jsonify({"settings": profiler.get_settings(), "profiles": profiler.list_profiles()})
+
+
+@admin.route('/profiler', methods=['PUT'])
+@jwt_required()
+@admin_required
+def update_profiler():
+    """Choose what to profile: {"endpoints": ["admin.get_projects"], "every_n": 100}
+
+    An empty endpoint list and every_n 0 switch sampling off.
+    """
+    if not current_app.config['PROFILER_ENABLED']:
+        return jsonify({"msg": "Profiler is disabled (set PROFILER_ENABLED=true)"}), 404
+    data = request.json or {}
+    endpoints = data.get('endpoints', [])
+    every_n = data.get('every_n', 0)
+    if not isinstance(endpoints, list) or any(e not in current_app.view_functions for e in endpoints):
+        return jsonify({"msg": "endpoints must be a list of endpoint names, e.g. admin.get_projects"}), 400
+    if not isinstance(every_n, int) or isinstance(every_n, bool) or every_n < 0:
+        return jsonify({"msg": "every_n must be a non-negative integer"}), 400
+    return jsonify({"settings": profiler.update_settings(endpoints, every_n)})
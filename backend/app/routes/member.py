@@ -1,9 +1,23 @@
 from flask import Blueprint, request, jsonify, send_file
-from ..models import User, Project, Task, Comment, Attachment, ActivityLog, ProjectFile, db
+from ..models import User, Project, Task, Attachment, ProjectFile, project_members, db
+from ..activity import log_activity, event_type_codes
+from ..metrics import record_upload
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from .shared import notify_admins
+from .shared import (
+    notify_admins, add_task_comment, page_args, project_summary, project_tasks_page,
+    project_member_list, project_activity_page
+)
+from ..fields import (
+    PROJECT_FIELDS, TASK_FIELDS, PROJECT_LIST_FIELDS, PROJECT_DETAIL_FIELDS,
+    PROJECT_TASK_FIELDS, MY_TASK_FIELDS, PROJECT_INCLUDES,
+    select_fields, select_includes, load_options, serialize
+)
 import os
+from datetime import datetime
 from werkzeug.utils import secure_filename
+from ..etag import conditional, member_projects_version, member_project_version, my_tasks_version
+from ..membership import project_member_required, is_project_member
+from ..counters import adjust_project_counters, count_status_change
 
 member = Blueprint('member', __name__, url_prefix='/member')
 
@@ -14,119 +28,122 @@ member = Blueprint('member', __name__, url_prefix='/member')
 
 @member.route('/projects', methods=['GET'])
 @jwt_required()
+@conditional(member_projects_version)
 def member_projects():
-    """Get projects assigned to the member"""
+    """Get projects assigned to the member (?fields= limits the returned columns)"""
     user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
-    projects = [{
-        "id": p.id,
-        "name": p.name,
-        "description": p.description,
-        "start_date": p.start_date.isoformat() if p.start_date else None,
-        "due_date": p.due_date.isoformat() if p.due_date else None,
-        "completion_date": p.completion_date.isoformat() if p.completion_date else None,
-        "priority": p.priority
-    } for p in user.projects]
-    return jsonify(projects)
+    fields, error = select_fields(request.args.get('fields'), PROJECT_FIELDS, PROJECT_LIST_FIELDS)
+    if error:
+        return jsonify({"msg": error}), 400
+
+    projects = Project.query.join(project_members).filter(
+        project_members.c.user_id == int(user_id)
+    ).options(*load_options(Project, fields, PROJECT_FIELDS)).all()
+    return jsonify([serialize(p, fields, PROJECT_FIELDS) for p in projects])
 
 
 @member.route('/projects/<int:project_id>/tasks', methods=['GET'])
 @jwt_required()
+@project_member_required
+@conditional(member_project_version)
 def project_tasks(project_id):
-    """Get tasks for a project (member can only see if assigned)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
-    project = Project.query.get_or_404(project_id)
-    if user not in project.members:
-        return jsonify({"msg": "Access denied"}), 403
-    
-    tasks = [{
-        "project_id": t.project_id,
-        "task_number": t.task_number,
-        "title": t.title,
-        "description": t.description,
-        "status": t.status,
-        "priority": t.priority,
-        "start_date": t.start_date.isoformat() if t.start_date else None,
-        "due_date": t.due_date.isoformat() if t.due_date else None,
-        "completion_date": t.completion_date.isoformat() if t.completion_date else None,
-        "assigned_to": t.assigned_to,
-        "assignee_name": User.query.get(t.assigned_to).name if t.assigned_to else None,
-        "attachments_count": len(t.attachments)
-    } for t in project.tasks]
+    """Get tasks for a project (member can only see if assigned)
+
+    Returns the full list by default; with ?page= (and ?per_page=) returns
+    one page as {"tasks", "page", "per_page", "has_more"}.
+    """
+    fields, error = select_fields(request.args.get('fields'), TASK_FIELDS, PROJECT_TASK_FIELDS)
+    if error:
+        return jsonify({"msg": error}), 400
+
+    if 'page' in request.args:
+        page, per_page = page_args()
+        tasks, has_more = project_tasks_page(project_id, fields, page, per_page)
+        return jsonify({"tasks": tasks, "page": page, "per_page": per_page, "has_more": has_more})
+
+    tasks, _ = project_tasks_page(project_id, fields)
     return jsonify(tasks)
 
 
 @member.route('/projects/<int:project_id>', methods=['GET'])
 @jwt_required()
+@project_member_required
+@conditional(member_project_version)
 def get_member_project_details(project_id):
-    """Get full project details (member can only see if assigned)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
+    """Get full project details (member can only see if assigned)
+
+    Supports the same ?fields=, ?task_fields= and ?include= parameters
+    as the admin project details endpoint.
+    """
+    fields, error = select_fields(request.args.get('fields'), PROJECT_FIELDS, PROJECT_DETAIL_FIELDS)
+    if error:
+        return jsonify({"msg": error}), 400
+    task_fields, error = select_fields(request.args.get('task_fields'), TASK_FIELDS, PROJECT_TASK_FIELDS)
+    if error:
+        return jsonify({"msg": error}), 400
+    includes, error = select_includes(request.args.get('include'), PROJECT_INCLUDES)
+    if error:
+        return jsonify({"msg": error}), 400
+
+    project = Project.query.options(*load_options(Project, fields, PROJECT_FIELDS)).get_or_404(project_id)
+
+    result = serialize(project, fields, PROJECT_FIELDS)
+
+    if 'tasks' in includes:
+        result["tasks"], _ = project_tasks_page(project.id, task_fields)
+    if 'members' in includes:
+        result["members"] = project_member_list(project.id)
+    if 'activity_logs' in includes:
+        result["activity_logs"], _ = project_activity_page(project.id, 1, 50)  # latest only; page via /activity
+
+    return jsonify({"project": result})
+
+
+@member.route('/projects/<int:project_id>/summary', methods=['GET'])
+@jwt_required()
+@project_member_required
+@conditional(member_project_version)
+def get_member_project_summary(project_id):
+    """Get project info with task/member/file counts (member can only see if assigned)"""
     project = Project.query.get_or_404(project_id)
-    
-    # Check if member is assigned to this project
-    if user not in project.members:
-        return jsonify({"msg": "Access denied"}), 403
-    
-    return jsonify({
-        "project": {
-            "id": project.id,
-            "name": project.name,
-            "description": project.description,
-            "start_date": project.start_date.isoformat() if project.start_date else None,
-            "due_date": project.due_date.isoformat() if project.due_date else None,
-            "completion_date": project.completion_date.isoformat() if project.completion_date else None,
-            "priority": project.priority,
-            "created_at": project.created_at.isoformat(),
-            "tasks": [{
-                "project_id": t.project_id,
-                "task_number": t.task_number,
-                "title": t.title,
-                "description": t.description,
-                "status": t.status,
-                "priority": t.priority,
-                "start_date": t.start_date.isoformat() if t.start_date else None,
-                "due_date": t.due_date.isoformat() if t.due_date else None,
-                "completion_date": t.completion_date.isoformat() if t.completion_date else None,
-                "assigned_to": t.assigned_to,
-                "assignee_name": User.query.get(t.assigned_to).name if t.assigned_to else None,
-                "attachments_count": len(t.attachments)
-            } for t in project.tasks],
-            "members": [{
-                "id": m.id,
-                "name": m.name,
-                "email": m.email
-            } for m in project.members],
-            "activity_logs": [{
-                "id": log.id,
-                "action": log.action,
-                "user_name": User.query.get(log.user_id).name,
-                "created_at": log.created_at.isoformat()
-            } for log in ActivityLog.query.filter_by(project_id=project.id).order_by(ActivityLog.created_at.desc()).all()]
-        }
-    })
+    return jsonify({"project": project_summary(project)})
+
+
+@member.route('/projects/<int:project_id>/members', methods=['GET'])
+@jwt_required()
+@project_member_required
+@conditional(member_project_version)
+def get_member_project_members(project_id):
+    """Get the members of a project (member can only see if assigned)"""
+    return jsonify({"members": project_member_list(project_id)})
+
+
+@member.route('/projects/<int:project_id>/activity', methods=['GET'])
+@jwt_required()
+@project_member_required
+@conditional(member_project_version)
+def get_member_project_activity(project_id):
+    """Get one page of a project's activity logs (member can only see if assigned)"""
+    event_types, error = event_type_codes(request.args.get('event_type'))
+    if error:
+        return jsonify({"msg": error}), 400
+    page, per_page = page_args(default_per_page=20)
+    logs, has_more = project_activity_page(project_id, page, per_page, event_types)
+    return jsonify({"activity_logs": logs, "page": page, "per_page": per_page, "has_more": has_more})
 
 
 @member.route('/projects/<int:project_id>/files', methods=['GET'])
 @jwt_required()
+@project_member_required
 def get_member_project_files(project_id):
     """Get all files for a project (member can only view if assigned)"""
-    user_id = get_jwt_identity()
-    user = User.query.get(int(user_id))
-    project = Project.query.get_or_404(project_id)
-    
-    # Check if member is assigned to this project
-    if user not in project.members:
-        return jsonify({"msg": "Access denied"}), 403
-    
     files = ProjectFile.query.filter_by(project_id=project_id).all()
     return jsonify({
         "files": [{
             "id": f.id,
             "filename": f.filename,
             "file_url": f.file_url,
-            "uploaded_at": f.uploaded_at.isoformat(),
+            "uploaded_at": f.uploaded_at,
             "uploaded_by": User.query.get(f.uploaded_by).name
         } for f in files]
     })
@@ -138,9 +155,13 @@ def get_member_project_files(project_id):
 
 @member.route('/tasks', methods=['GET'])
 @jwt_required()
+@conditional(my_tasks_version)
 def get_my_tasks():
-    """Get all tasks assigned to the member"""
+    """Get all tasks assigned to the member (?fields= limits the returned columns)"""
     user_id = get_jwt_identity()
+    fields, error = select_fields(request.args.get('fields'), TASK_FIELDS, MY_TASK_FIELDS)
+    if error:
+        return jsonify({"msg": error}), 400
     
     query = Task.query.filter_by(assigned_to=int(user_id))
     
@@ -154,23 +175,9 @@ def get_my_tasks():
     if priority:
         query = query.filter_by(priority=priority)
     
-    tasks = query.all()
+    tasks = query.options(*load_options(Task, fields, TASK_FIELDS)).all()
     
-    return jsonify({
-        "tasks": [{
-            "project_id": t.project_id,
-            "task_number": t.task_number,
-            "title": t.title,
-            "description": t.description,
-            "status": t.status,
-            "priority": t.priority,
-            "due_date": t.due_date.isoformat() if t.due_date else None,
-            "project_name": Project.query.get(t.project_id).name,
-            "assigned_to": t.assigned_to,
-            "assignee_name": User.query.get(t.assigned_to).name if t.assigned_to else None,
-            "attachments_count": len(t.attachments)
-        } for t in tasks]
-    })
+    return jsonify({"tasks": [serialize(t, fields, TASK_FIELDS) for t in tasks]})
 
 
 @member.route('/projects/<int:project_id>/tasks/<int:task_number>/status', methods=['PUT'])
@@ -190,11 +197,12 @@ def update_task_status(project_id, task_number):
     if new_status == 'completed':
         new_status = 'pending_review'
     
+    count_status_change(project_id, task.status, new_status)
     task.status = new_status
     
     # Log activity with appropriate message
     if new_status == 'pending_review':
-        action_msg = f"Submitted task #{task_number} '{task.title}' for review"
+        log_activity('task_submitted', user_id, project_id, task_number, title=task.title)
         # Notify admins about task submission for review
         notify_admins(
             f"{user.name} submitted task #{task_number} '{task.title}' for review",
@@ -205,7 +213,7 @@ def update_task_status(project_id, task_number):
             triggered_by=int(user_id)
         )
     else:
-        action_msg = f"Updated task #{task_number} '{task.title}' status to '{task.status}'"
+        log_activity('task_status_changed', user_id, project_id, task_number, title=task.title, status=task.status)
         # Notify admins about status change
         notify_admins(
             f"{user.name} changed task #{task_number} '{task.title}' status to '{new_status}'",
@@ -216,13 +224,6 @@ def update_task_status(project_id, task_number):
             triggered_by=int(user_id)
         )
     
-    log = ActivityLog(
-        action=action_msg,
-        user_id=int(user_id),
-        project_id=project_id
-    )
-    db.session.add(log)
-    
     db.session.commit()
     return jsonify({"msg": "Task status updated"})
 
@@ -233,6 +234,7 @@ def update_task_status(project_id, task_number):
 
 @member.route('/projects/<int:project_id>/tasks/<int:task_number>/comment', methods=['POST'])
 @jwt_required()
+@project_member_required
 def add_comment(project_id, task_number):
     """Add a comment to a task"""
     data = request.json
@@ -240,13 +242,7 @@ def add_comment(project_id, task_number):
     task = Task.query.get_or_404((project_id, task_number))
     user = User.query.get(int(user_id))
     
-    comment = Comment(
-        content=data['content'],
-        task_project_id=project_id,
-        task_number=task_number,
-        user_id=int(user_id)
-    )
-    db.session.add(comment)
+    add_task_comment(task, user_id, data['content'])
     
     # Notify admins about new comment
     notify_admins(
@@ -259,12 +255,7 @@ def add_comment(project_id, task_number):
     )
     
     # Log activity
-    log = ActivityLog(
-        action=f"Added comment to task #{task_number} '{task.title}'",
-        user_id=int(user_id),
-        project_id=project_id
-    )
-    db.session.add(log)
+    log_activity('task_commented', user_id, project_id, task_number, title=task.title)
     
     db.session.commit()
     return jsonify({"msg": "Comment added"})
@@ -276,6 +267,7 @@ def add_comment(project_id, task_number):
 
 @member.route('/projects/<int:project_id>/tasks/<int:task_number>/attachment', methods=['POST'])
 @jwt_required()
+@project_member_required
 def add_attachment(project_id, task_number):
     """Add an attachment to a task"""
     data = request.json
@@ -288,6 +280,8 @@ def add_attachment(project_id, task_number):
         task_number=task_number
     )
     db.session.add(attachment)
+    task.updated_at = datetime.utcnow()  # attachments_count changed
+    adjust_project_counters(project_id, attachment_count=1)
     db.session.commit()
     return jsonify({"msg": "Attachment added"})
 
@@ -296,9 +290,7 @@ def add_attachment(project_id, task_number):
 # ========== FILE ROUTES ===============
 # ======================================
 
-# Ensure uploads directory exists
-UPLOADS_DIR = '/app/uploads/tasks'
-os.makedirs(UPLOADS_DIR, exist_ok=True)
+UPLOADS_DIR = '/app/uploads/tasks'  # created on first upload
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx', 'xls', 'xlsx', 'zip'}
 
 def allowed_file(filename):
@@ -335,8 +327,11 @@ def upload_task_file(project_id, task_number):
         # Add timestamp to make unique
         import time
         filename = f"{int(time.time())}_{filename}"
+        os.makedirs(UPLOADS_DIR, exist_ok=True)
         filepath = os.path.join(UPLOADS_DIR, filename)
+        started = time.perf_counter()
         file.save(filepath)
+        record_upload('task', filepath, started)
         
         # Create database record
         attachment = Attachment(
@@ -347,6 +342,8 @@ def upload_task_file(project_id, task_number):
             task_number=task_number
         )
         db.session.add(attachment)
+        task.updated_at = datetime.utcnow()  # attachments_count changed
+        adjust_project_counters(project_id, attachment_count=1)
         
         # Notify admins about new file
         notify_admins(
@@ -359,12 +356,7 @@ def upload_task_file(project_id, task_number):
         )
         
         # Log activity
-        log = ActivityLog(
-            action=f"Uploaded file '{file.filename}' to task #{task_number} '{task.title}'",
-            user_id=user.id,
-            project_id=project_id
-        )
-        db.session.add(log)
+        log_activity('task_file_uploaded', user.id, project_id, task_number, title=task.title, filename=file.filename)
         db.session.commit()
         
         return jsonify({
@@ -373,7 +365,7 @@ def upload_task_file(project_id, task_number):
                 "id": attachment.id,
                 "filename": attachment.filename,
                 "file_url": attachment.file_url,
-                "uploaded_at": attachment.uploaded_at.isoformat(),
+                "uploaded_at": attachment.uploaded_at,
                 "uploaded_by": user.name
             }
         }), 201
@@ -393,7 +385,7 @@ def get_task_files(project_id, task_number):
     user = User.query.get(int(user_id))
     
     # Check if user is a member of the project or is admin
-    if user.role != 'admin' and user not in task.project.members:
+    if user.role != 'admin' and not is_project_member(user.id, project_id):
         return jsonify({"msg": "Access denied"}), 403
     
     files = Attachment.query.filter_by(task_project_id=project_id, task_number=task_number).all()
@@ -402,7 +394,7 @@ def get_task_files(project_id, task_number):
             "id": f.id,
             "filename": f.filename,
             "file_url": f.file_url,
-            "uploaded_at": f.uploaded_at.isoformat(),
+            "uploaded_at": f.uploaded_at,
             "uploaded_by": User.query.get(f.uploaded_by).name if f.uploaded_by else "Unknown"
         } for f in files]
     })
@@ -434,6 +426,8 @@ def delete_task_file(project_id, task_number, file_id):
         
         # Delete database record
         db.session.delete(attachment)
+        task.updated_at = datetime.utcnow()  # attachments_count changed
+        adjust_project_counters(project_id, attachment_count=-1)
         db.session.commit()
         return jsonify({"msg": "File deleted successfully"})
     except Exception as e:
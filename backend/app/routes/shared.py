@@ -1,6 +1,15 @@
-from flask import Blueprint, jsonify, request
-from ..models import Task, User, Comment, Notification, db
+from flask import Blueprint, jsonify, request, current_app
+from ..models import Task, Project, User, Comment, Notification, NotificationCounter, ActivityLog, ProjectFile, project_members, db
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.orm import load_only
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime, timedelta
+from ..fields import TASK_FIELDS, load_options, serialize
+from ..activity import EVENT_NAMES, render_activity
+from ..metrics import inc, observe
+from ..etag import conditional, notifications_version, comments_version, NOTIFICATIONS_SHOWN
+from ..sync import current_cursor, changes_since
+from ..counters import project_counts
 
 shared = Blueprint('shared', __name__)
 
@@ -9,37 +18,280 @@ shared = Blueprint('shared', __name__)
 # ========= HELPER FUNCTIONS ============
 # ======================================
 
+def adjust_unread_count(user_id, delta):
+    """Add delta to a user's unread counter in the current transaction"""
+    stmt = insert(NotificationCounter).values(user_id=user_id, unread=max(delta, 0))
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={"unread": db.func.greatest(NotificationCounter.unread + delta, 0)}
+    ))
+
+
+def read_watermark(user_id):
+    """The user's mark-all-as-read timestamp, or None"""
+    counter = db.session.get(NotificationCounter, user_id)
+    return counter.read_up_to if counter else None
+
+
+def notification_is_read(notification, watermark):
+    """A notification is read if marked individually or covered by the watermark"""
+    return bool(notification.is_read) or (watermark is not None and notification.created_at <= watermark)
+
+
+# Notification types that are merged when they repeat for the same task (or
+# project) and recipient within NOTIFICATION_COALESCE_SECONDS. Assignments and
+# reviews are always delivered as separate notifications.
+COALESCED_SUMMARIES = {
+    'task_status': "{count} status changes on task #{task_number}",
+    'comment': "{count} new comments on task #{task_number}",
+    'file': "{count} new files",
+}
+DIGEST_SUMMARY = "{count} updates"
+
+
+def _merged_message(summary, count, task_number, message):
+    text = f"{summary.format(count=count, task_number=task_number)} - latest: {message}"
+    return text if len(text) <= 500 else text[:497] + '...'
+
+
+def _bump_unread(counts, digests_started=None):
+    """Add {user_id: new unread rows} to the users' badges with one multi-row upsert.
+
+    digests_started maps the users who got a new digest to its start time,
+    stored as their last_digest_at in the same statement.
+    """
+    digests_started = digests_started or {}
+    stmt = insert(NotificationCounter).values([
+        {"user_id": uid, "unread": n, "last_digest_at": digests_started.get(uid)} for uid, n in counts.items()
+    ])
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={
+            "unread": NotificationCounter.unread + stmt.excluded.unread,
+            "last_digest_at": db.func.coalesce(stmt.excluded.last_digest_at, NotificationCounter.last_digest_at)
+        }
+    ))
+
+
+def create_notifications(recipients, message, notification_type, task_project_id=None, task_number=None, project_id=None, triggered_by=None, count=1):
+    """Deliver one event to several users, coalescing with their recent unread notifications.
+
+    recipients are User objects. A recipient's unread notification of the same
+    type and target from within NOTIFICATION_COALESCE_SECONDS - or their open
+    digest, for users in digest mode - is updated in place instead of adding a
+    row, and does not bump their unread badge again. Candidates are found with
+    one SELECT and the badges of new rows are bumped with one upsert.
+
+    A digest collects the events of notification_digest_minutes from its
+    first one, stored as last_digest_at on the user's counter; only a digest
+    created since then is open.
+
+    count > 1 delivers that many events at once (message being the latest);
+    it only makes sense for recipients in digest mode.
+    """
+    if not recipients:
+        return
+    observe('notification_fanout_recipients', len(recipients), type=notification_type)
+    now = datetime.utcnow()
+    window = timedelta(seconds=current_app.config['NOTIFICATION_COALESCE_SECONDS'])
+    windows = {u.id: timedelta(minutes=u.notification_digest_minutes) if u.notification_digest_minutes else window
+               for u in recipients}
+    digest_users = [u.id for u in recipients if u.notification_digest_minutes]
+
+    targets = []
+    if digest_users:
+        targets.append(db.and_(Notification.type == 'digest', Notification.user_id.in_(digest_users)))
+    if notification_type in COALESCED_SUMMARIES and window:
+        targets.append(db.and_(
+            Notification.type == notification_type,
+            Notification.task_project_id == task_project_id,
+            Notification.task_number == task_number,
+            Notification.project_id == project_id
+        ))
+
+    open_rows = {}
+    if targets:
+        candidates = db.session.query(Notification, NotificationCounter.last_digest_at).outerjoin(
+            NotificationCounter, NotificationCounter.user_id == Notification.user_id
+        ).filter(
+            Notification.user_id.in_(list(windows)),
+            Notification.is_read.isnot(True),
+            db.or_(NotificationCounter.read_up_to.is_(None), Notification.created_at > NotificationCounter.read_up_to),
+            Notification.created_at >= now - max(windows.values()),
+            db.or_(*targets)
+        ).order_by(Notification.created_at).all()
+        for n, digest_start in candidates:
+            if n.user_id in digest_users:
+                is_open = (n.type == 'digest' and digest_start is not None and n.created_at >= digest_start
+                           and now < digest_start + windows[n.user_id])
+            else:
+                is_open = n.type != 'digest' and n.created_at >= now - window
+            if is_open:
+                open_rows[n.user_id] = n  # the latest one wins
+
+    new_unread = []
+    for user in recipients:
+        n = open_rows.get(user.id)
+        if n is None:
+            digest = bool(user.notification_digest_minutes)
+            db.session.add(Notification(
+                user_id=user.id,
+                message=_merged_message(DIGEST_SUMMARY, count, task_number, message) if digest and count > 1 else message,
+                type='digest' if digest else notification_type,
+                count=count,
+                created_at=now,
+                task_project_id=task_project_id,
+                task_number=task_number,
+                project_id=project_id,
+                triggered_by=triggered_by
+            ))
+            new_unread.append(user.id)
+            continue
+        n.count += count
+        summary = DIGEST_SUMMARY if n.type == 'digest' else COALESCED_SUMMARIES[notification_type]
+        n.message = _merged_message(summary, n.count, task_number, message)
+        n.created_at = now  # moves it back to the top of the list
+        n.task_project_id, n.task_number, n.project_id = task_project_id, task_number, project_id
+        n.triggered_by = triggered_by
+
+    inc('notifications_written_total', len(new_unread), outcome='created')
+    inc('notifications_written_total', len(recipients) - len(new_unread), outcome='coalesced')
+    if new_unread:
+        _bump_unread({uid: 1 for uid in new_unread}, {uid: now for uid in new_unread if uid in digest_users})
+
+
+def insert_notifications(rows):
+    """Add notifications that are never coalesced, given as column dicts.
+
+    All rows go in one INSERT and each recipient's badge is bumped once, in
+    one multi-row upsert. For batches such as the scheduler's due date alerts.
+    """
+    if not rows:
+        return
+    db.session.execute(db.insert(Notification).values(rows))
+    unread = {}
+    for row in rows:
+        unread[row['user_id']] = unread.get(row['user_id'], 0) + 1
+    _bump_unread(unread)
+    inc('notifications_written_total', len(rows), outcome='created')
+
+
 def create_notification(user_id, message, notification_type, task_project_id=None, task_number=None, project_id=None, triggered_by=None):
     """Helper function to create a notification"""
-    notification = Notification(
-        user_id=user_id,
-        message=message,
-        type=notification_type,
-        task_project_id=task_project_id,
-        task_number=task_number,
-        project_id=project_id,
-        triggered_by=triggered_by
-    )
-    db.session.add(notification)
-    return notification
+    create_notifications([db.session.get(User, user_id)], message, notification_type,
+                         task_project_id, task_number, project_id, triggered_by)
 
 
 def notify_admins(message, notification_type, task_project_id=None, task_number=None, project_id=None, triggered_by=None):
     """Send notification to all admins"""
-    admins = User.query.filter_by(role='admin').all()
-    for admin in admins:
-        create_notification(admin.id, message, notification_type, task_project_id, task_number, project_id, triggered_by)
+    admins = User.query.filter_by(role='admin').options(
+        load_only(User.id, User.notification_digest_minutes)
+    ).all()
+    create_notifications(admins, message, notification_type, task_project_id, task_number, project_id, triggered_by)
 
 
 def notify_project_members(project_id, message, notification_type, task_project_id=None, task_number=None, triggered_by=None, exclude_user_id=None):
     """Send notification to all members of a project"""
-    from ..models import Project
-    project = Project.query.get(project_id)
-    if project:
-        for member in project.members:
-            if exclude_user_id and member.id == exclude_user_id:
-                continue
-            create_notification(member.id, message, notification_type, task_project_id, task_number, project_id, triggered_by)
+    query = User.query.join(project_members).filter(project_members.c.project_id == project_id)
+    if exclude_user_id:
+        query = query.filter(User.id != exclude_user_id)
+    members = query.options(load_only(User.id, User.notification_digest_minutes)).all()
+    create_notifications(members, message, notification_type, task_project_id, task_number, project_id, triggered_by)
+
+
+def add_task_comment(task, user_id, content):
+    """Add a comment and bump the task's comment_count in the same transaction"""
+    comment = Comment(
+        content=content,
+        task_project_id=task.project_id,
+        task_number=task.task_number,
+        user_id=int(user_id)
+    )
+    db.session.add(comment)
+    # Incremented in SQL, so concurrent comments cannot lose a count
+    task.comment_count = Task.comment_count + 1
+    return comment
+
+
+# ======================================
+# ======= PROJECT SECTION HELPERS =======
+# ======================================
+#
+# Project details are served as a cheap summary plus separately fetched
+# sections (tasks, members, activity) so large projects open immediately.
+
+def page_args(default_per_page=50, max_per_page=200):
+    """Read ?page= and ?per_page= from the request"""
+    page = request.args.get('page', 1, type=int)
+    per_page = request.args.get('per_page', default_per_page, type=int)
+    return max(page, 1), min(max(per_page, 1), max_per_page)
+
+
+def project_summary(project):
+    """Project info plus task/member/file counts, read from the project counters"""
+    overdue = Task.query.filter(
+        Task.project_id == project.id,
+        Task.due_date < datetime.utcnow(),
+        Task.status != 'completed'
+    ).count()
+    file_count = ProjectFile.query.filter_by(project_id=project.id).count()
+
+    return {
+        "id": project.id,
+        "name": project.name,
+        "description": project.description,
+        "start_date": project.start_date,
+        "due_date": project.due_date,
+        "completion_date": project.completion_date,
+        "priority": project.priority,
+        "created_at": project.created_at,
+        "counts": {**project_counts(project, overdue), "files": file_count}
+    }
+
+
+def project_tasks_page(project_id, fields, page=None, per_page=None):
+    """Tasks of a project ordered by task number; all of them when page is None"""
+    query = Task.query.filter_by(project_id=project_id).order_by(Task.task_number).options(
+        *load_options(Task, fields, TASK_FIELDS)
+    )
+    if page is None:
+        return [serialize(t, fields, TASK_FIELDS) for t in query.all()], False
+    tasks = query.offset((page - 1) * per_page).limit(per_page + 1).all()
+    return [serialize(t, fields, TASK_FIELDS) for t in tasks[:per_page]], len(tasks) > per_page
+
+
+def project_member_list(project_id):
+    """Members of a project in one query"""
+    members = User.query.join(project_members).filter(
+        project_members.c.project_id == project_id
+    ).options(load_only(User.id, User.name, User.email)).order_by(User.name).all()
+    return [{"id": m.id, "name": m.name, "email": m.email} for m in members]
+
+
+def project_activity_page(project_id, page=None, per_page=None, event_types=None):
+    """Activity logs of a project, newest first, rendered with author names joined in"""
+    query = db.session.query(
+        ActivityLog.id, ActivityLog.event_type, ActivityLog.task_number, ActivityLog.params,
+        ActivityLog.created_at, User.name, Project.name
+    ).join(User, User.id == ActivityLog.user_id).join(Project, Project.id == ActivityLog.project_id).filter(
+        ActivityLog.project_id == project_id
+    )
+    if event_types:
+        query = query.filter(ActivityLog.event_type.in_(event_types))
+    query = query.order_by(ActivityLog.created_at.desc(), ActivityLog.id.desc())
+    if page is None:
+        rows, has_more = query.all(), False
+    else:
+        rows = query.offset((page - 1) * per_page).limit(per_page + 1).all()
+        rows, has_more = rows[:per_page], len(rows) > per_page
+    return [{
+        "id": log_id,
+        "event_type": EVENT_NAMES.get(event_type),
+        "task_number": task_number,
+        "action": render_activity(event_type, task_number, params, project_name),
+        "user_name": user_name,
+        "created_at": created_at
+    } for log_id, event_type, task_number, params, created_at, user_name, project_name in rows], has_more
 
 
 # ======================================
@@ -48,18 +300,21 @@ def notify_project_members(project_id, message, notification_type, task_project_
 
 @shared.route('/notifications', methods=['GET'])
 @jwt_required()
+@conditional(notifications_version)
 def get_notifications():
     """Get all notifications for the current user"""
     user_id = get_jwt_identity()
-    notifications = Notification.query.filter_by(user_id=int(user_id)).order_by(Notification.created_at.desc()).limit(50).all()
+    watermark = read_watermark(int(user_id))
+    notifications = Notification.query.filter_by(user_id=int(user_id)).order_by(Notification.created_at.desc()).limit(NOTIFICATIONS_SHOWN).all()
     
     return jsonify({
         "notifications": [{
             "id": n.id,
             "message": n.message,
             "type": n.type,
-            "is_read": n.is_read,
-            "created_at": n.created_at.isoformat(),
+            "count": n.count,
+            "is_read": notification_is_read(n, watermark),
+            "created_at": n.created_at,
             "task_project_id": n.task_project_id,
             "task_number": n.task_number,
             "project_id": n.project_id,
@@ -71,10 +326,10 @@ def get_notifications():
 @shared.route('/notifications/unread-count', methods=['GET'])
 @jwt_required()
 def get_unread_count():
-    """Get count of unread notifications"""
+    """Get count of unread notifications (maintained counter, no ETag needed)"""
     user_id = get_jwt_identity()
-    count = Notification.query.filter_by(user_id=int(user_id), is_read=False).count()
-    return jsonify({"count": count})
+    counter = db.session.get(NotificationCounter, int(user_id))
+    return jsonify({"count": counter.unread if counter else 0})
 
 
 @shared.route('/notifications/<int:notification_id>/read', methods=['PUT'])
@@ -83,7 +338,9 @@ def mark_as_read(notification_id):
     """Mark a single notification as read"""
     user_id = get_jwt_identity()
     notification = Notification.query.filter_by(id=notification_id, user_id=int(user_id)).first_or_404()
-    notification.is_read = True
+    if not notification_is_read(notification, read_watermark(int(user_id))):
+        notification.is_read = True
+        adjust_unread_count(int(user_id), -1)
     db.session.commit()
     return jsonify({"msg": "Notification marked as read"})
 
@@ -91,30 +348,111 @@ def mark_as_read(notification_id):
 @shared.route('/notifications/read-all', methods=['PUT'])
 @jwt_required()
 def mark_all_as_read():
-    """Mark all notifications as read"""
+    """Mark all notifications as read by moving the user's watermark (one row write)"""
     user_id = get_jwt_identity()
-    Notification.query.filter_by(user_id=int(user_id), is_read=False).update({"is_read": True})
+    now = datetime.utcnow()
+    stmt = insert(NotificationCounter).values(user_id=int(user_id), unread=0, read_up_to=now)
+    db.session.execute(stmt.on_conflict_do_update(
+        index_elements=[NotificationCounter.user_id],
+        set_={"unread": 0, "read_up_to": now}
+    ))
     db.session.commit()
     return jsonify({"msg": "All notifications marked as read"})
 
 
+@shared.route('/notifications/settings', methods=['GET'])
+@jwt_required()
+def get_notification_settings():
+    """Get the current user's notification delivery settings"""
+    user = User.query.get_or_404(int(get_jwt_identity()))
+    return jsonify({"digest_minutes": user.notification_digest_minutes})
+
+
+@shared.route('/notifications/settings', methods=['PUT'])
+@jwt_required()
+def update_notification_settings():
+    """Switch digest mode on (digest_minutes > 0) or off (null or 0)"""
+    data = request.json or {}
+    digest_minutes = data.get('digest_minutes')
+    if digest_minutes is not None and (not isinstance(digest_minutes, int) or isinstance(digest_minutes, bool)
+                                       or not 0 <= digest_minutes <= 24 * 60):
+        return jsonify({"msg": "digest_minutes must be a whole number of minutes between 0 and 1440"}), 400
+
+    user = User.query.get_or_404(int(get_jwt_identity()))
+    user.notification_digest_minutes = digest_minutes or None
+    db.session.commit()
+    return jsonify({"msg": "Notification settings updated", "digest_minutes": user.notification_digest_minutes})
+
+
 # ======================================
 # ============ SHARED ROUTES ============
 # ======================================
 
 @shared.route('/projects/<int:project_id>/tasks/<int:task_number>/comments', methods=['GET'])
 @jwt_required()
+@conditional(comments_version)
 def get_task_comments(project_id, task_number):
-    """Get comments for a task"""
-    task = Task.query.get_or_404((project_id, task_number))
-    comments = Comment.query.filter_by(task_project_id=project_id, task_number=task_number).order_by(Comment.created_at.desc()).all()
-    
+    """Get comments for a task, newest first, one page at a time
+
+    ?before=<comment id> pages back through older comments, ?since=<comment id>
+    returns only the comments added after it (the oldest of them first when
+    there are more than a page, so the next ?since= picks up the rest). The
+    two cannot be combined. Comment ids grow with creation time, so they
+    serve as the keyset.
+    """
+    before = request.args.get('before', type=int)
+    since = request.args.get('since', type=int)
+    if before is not None and since is not None:
+        return jsonify({"msg": "Use either before or since, not both"}), 400
+    task = Task.query.options(load_only(Task.project_id, Task.task_number, Task.comment_count)).get_or_404(
+        (project_id, task_number)
+    )
+    _, per_page = page_args(default_per_page=20, max_per_page=100)
+
+    query = db.session.query(Comment, User.name).join(User, User.id == Comment.user_id).filter(
+        Comment.task_project_id == project_id,
+        Comment.task_number == task_number
+    )
+    if since is not None:
+        rows = query.filter(Comment.id > since).order_by(Comment.id.asc()).limit(per_page + 1).all()
+        rows, has_more = rows[:per_page][::-1], len(rows) > per_page
+    else:
+        if before is not None:
+            query = query.filter(Comment.id < before)
+        rows = query.order_by(Comment.id.desc()).limit(per_page + 1).all()
+        rows, has_more = rows[:per_page], len(rows) > per_page
+
     return jsonify({
         "comments": [{
             "id": c.id,
             "content": c.content,
-            "created_at": c.created_at.isoformat(),
+            "created_at": c.created_at,
             "user_id": c.user_id,
-            "user_name": User.query.get(c.user_id).name
-        } for c in comments]
+            "user_name": user_name
+        } for c, user_name in rows],
+        "has_more": has_more,
+        "comment_count": task.comment_count
     })
+
+
+# ======================================
+# ============= SYNC ROUTES =============
+# ======================================
+
+@shared.route('/sync', methods=['GET'])
+@jwt_required()
+def sync_changes():
+    """Projects, tasks, comments and memberships changed since ?since=<cursor>
+
+    Without since, or when the changes cannot be sent (too many, or older
+    than the kept deletions), answers {"reset": true}: reload the lists and
+    pass the returned cursor next time. Reads the primary only (see
+    replicas.PRIMARY_ENDPOINTS): a replica's rows may lag behind the cursor.
+    """
+    user = User.query.get_or_404(int(get_jwt_identity()))
+    cursor = current_cursor()  # before reading, so nothing committed meanwhile is skipped
+    since = request.args.get('since', type=int)
+    changes = changes_since(user, since) if since is not None else None
+    if changes is None:
+        return jsonify({"cursor": cursor, "reset": True})
+    return jsonify({"cursor": cursor, "reset": False, **changes})
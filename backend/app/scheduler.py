@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.orm import load_only
+from .models import db, User, SchedulerJob
+from .maintenance import (
+    ensure_partitions, apply_notification_retention, apply_activity_retention, repair_unread_counts
+)
+from .routes.shared import create_notifications, insert_notifications
+from .sync import prune_tombstones
+from .counters import repair_project_counters
+from .snapshots import take_snapshots
+
+# ======================================
+# ============== SCHEDULER ==============
+# ======================================
+#
+# Periodic jobs run by scripts/run_scheduler.py. Any number of runners can be
+# started; the one holding the Postgres advisory lock SCHEDULER_LOCK_ID runs
+# the jobs and the others wait to take over. A job runs when its interval has
+# passed since its last run, recorded in scheduler_jobs, so restarts do not
+# rerun everything.
+
+
+# ======================================
+# =========== DUE DATE ALERTS ===========
+# ======================================
+#
+# Each run only looks at tasks whose due date crossed a threshold since the
+# previous run (the job's high-water mark), plus tasks edited since then, so
+# a due date moved into the past is not missed. Both conditions are index
+# range scans. task_due_alerts makes every alert fire once per task, kind
+# and due date.
+
+EPOCH = datetime(1970, 1, 1)
+
+DUE_ALERT_SQL = text("""
+    WITH new_alerts AS (
+        INSERT INTO task_due_alerts (project_id, task_number, kind, due_date, created_at)
+        SELECT t.project_id, t.task_number, :kind, t.due_date, :now
+        FROM tasks t
+        WHERE t.status <> 'completed' AND t.assigned_to IS NOT NULL
+          AND t.due_date > :floor AND t.due_date <= :high
+          AND (t.due_date > :low OR t.updated_at > :since)
+        ON CONFLICT DO NOTHING
+        RETURNING project_id, task_number
+    )
+    SELECT t.project_id, t.task_number, t.title, t.assigned_to, t.due_date, p.name AS project_name
+    FROM new_alerts a
+    JOIN tasks t ON t.project_id = a.project_id AND t.task_number = a.task_number
+    JOIN projects p ON p.id = t.project_id
+""")
+
+DUE_ALERT_MESSAGES = {
+    'due_soon': "Task #{task_number} '{title}' in project '{project_name}' is due {due_date:%Y-%m-%d %H:%M}",
+    'overdue': "Task #{task_number} '{title}' in project '{project_name}' is overdue",
+}
+
+
+def _job_state(name):
+    state = db.session.get(SchedulerJob, name)
+    if state is None:
+        state = SchedulerJob(name=name)
+        db.session.add(state)
+    return state
+
+
+def detect_due_tasks(now=None):
+    """Notify assignees of tasks that became overdue or due soon since the last run"""
+    now = now or datetime.utcnow()
+    state = _job_state('due_alerts')
+    since = state.high_water or now - timedelta(hours=current_app.config['DUE_ALERT_LOOKBACK_HOURS'])
+    window = timedelta(hours=current_app.config['DUE_SOON_HOURS'])
+
+    windows = {
+        # kind: (floor, low, high) - due_date in (low, high], or in (floor, high] if edited
+        'overdue': (EPOCH, since, now),
+        'due_soon': (now, since + window, now + window),
+    }
+    alerts = []
+    for kind, (floor, low, high) in windows.items():
+        rows = db.session.execute(DUE_ALERT_SQL, {
+            "kind": kind, "now": now, "floor": floor, "low": low, "high": high, "since": since
+        }).mappings().all()
+        alerts += [(kind, row) for row in rows]
+
+    # Grouped by assignee: one INSERT for all alerts and one badge upsert.
+    # Users in digest mode get all their alerts folded into the digest at once.
+    by_user = {}
+    for kind, row in alerts:
+        by_user.setdefault(row['assigned_to'], []).append((kind, row))
+    digest_users = User.query.options(load_only(User.id, User.notification_digest_minutes)).filter(
+        User.id.in_(by_user), User.notification_digest_minutes.isnot(None)
+    ).all() if by_user else []
+    for user in digest_users:
+        user_alerts = by_user.pop(user.id)
+        kind, row = user_alerts[-1]
+        create_notifications(
+            [user], DUE_ALERT_MESSAGES[kind].format(**row), kind,
+            task_project_id=row['project_id'], task_number=row['task_number'], count=len(user_alerts)
+        )
+    insert_notifications([{
+        "user_id": user_id,
+        "message": DUE_ALERT_MESSAGES[kind].format(**row),
+        "type": kind,
+        "created_at": now,
+        "task_project_id": row['project_id'],
+        "task_number": row['task_number'],
+    } for user_id, user_alerts in by_user.items() for kind, row in user_alerts])
+
+    state.high_water = now
+    db.session.commit()
+    return {
+        "since": since.isoformat(),
+        "overdue": sum(1 for kind, _ in alerts if kind == 'overdue'),
+        "due_soon": sum(1 for kind, _ in alerts if kind == 'due_soon'),
+    }
+
+
+# ======================================
+# =============== RUNNER ================
+# ======================================
+
+# name -> (function, config key of its interval in seconds)
+JOBS = {
+    'due_alerts': (detect_due_tasks, 'DUE_ALERT_INTERVAL_SECONDS'),
+    'task_snapshots': (take_snapshots, 'SNAPSHOT_INTERVAL_SECONDS'),
+    'partitions': (ensure_partitions, 'MAINTENANCE_INTERVAL_SECONDS'),
+    'notification_retention': (apply_notification_retention, 'MAINTENANCE_INTERVAL_SECONDS'),
+    'activity_retention': (apply_activity_retention, 'MAINTENANCE_INTERVAL_SECONDS'),
+    'unread_counts': (repair_unread_counts, 'MAINTENANCE_INTERVAL_SECONDS'),
+    'sync_tombstones': (prune_tombstones, 'MAINTENANCE_INTERVAL_SECONDS'),
+    'project_counters': (repair_project_counters, 'MAINTENANCE_INTERVAL_SECONDS'),
+}
+
+
+def try_lock(connection):
+    """Take the scheduler's advisory lock on this connection (held until it closes)"""
+    return connection.execute(
+        text("SELECT pg_try_advisory_lock(:id)"), {"id": current_app.config['SCHEDULER_LOCK_ID']}
+    ).scalar()
+
+
+def run_pending(now=None, force=False):
+    """Run the jobs whose interval has passed; returns {name: result}"""
+    results = {}
+    for name, (job, interval_key) in JOBS.items():
+        now_job = now or datetime.utcnow()
+        state = _job_state(name)
+        interval = timedelta(seconds=current_app.config[interval_key])
+        if not force and state.last_run_at and now_job - state.last_run_at < interval:
+            continue
+        try:
+            result = job()
+        except Exception as e:
+            # Not marked as run, so it is retried on the next tick
+            db.session.rollback()
+            current_app.logger.exception("Scheduler job %s failed", name)
+            state = _job_state(name)
+            result = {"error": str(e)}
+        else:
+            state = _job_state(name)
+            state.last_run_at = now_job
+        state.last_result = result
+        db.session.commit()
+        results[name] = result
+    return results
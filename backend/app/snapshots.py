@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from .models import TaskSnapshot, db
+from .counters import STATUS_COUNTERS
+
+# ======================================
+# =========== DAILY SNAPSHOTS ===========
+# ======================================
+#
+# The burndown, cumulative flow and throughput reports read task_snapshots:
+# one row per project and per assignee per day with the task counts by
+# status. The scheduler runs take_snapshots every SNAPSHOT_INTERVAL_SECONDS
+# and upserts today's rows, so each day keeps the counts of its last run.
+# Both kinds come out of one pass over tasks (GROUPING SETS).
+#
+# completed_today counts tasks by completion_date. Tasks completed between
+# a day's last run and midnight are added when the next run recounts the
+# previous day, which is a range scan on ix_tasks_completion_date.
+
+SNAPSHOT_STATUSES = tuple(STATUS_COUNTERS)
+
+_owner = (
+    "CASE WHEN grouping(project_id) = 0 THEN 'project' ELSE 'member' END AS kind, "
+    "CASE WHEN grouping(project_id) = 0 THEN project_id ELSE assigned_to END AS owner_id"
+)
+_by_owner = (
+    "GROUP BY GROUPING SETS ((project_id), (assigned_to)) "
+    "HAVING grouping(project_id) = 0 OR assigned_to IS NOT NULL"
+)
+
+SNAPSHOT_SQL = text(f"""
+    INSERT INTO task_snapshots (kind, owner_id, day, total, {', '.join(SNAPSHOT_STATUSES)}, completed_today)
+    SELECT {_owner}, :day, count(*),
+           {', '.join(f"count(*) FILTER (WHERE status = '{s}')" for s in SNAPSHOT_STATUSES)},
+           count(*) FILTER (WHERE status = 'completed' AND completion_date >= :day_start AND completion_date < :day_end)
+    FROM tasks
+    {_by_owner}
+    ON CONFLICT (kind, owner_id, day) DO UPDATE SET
+        total = EXCLUDED.total,
+        {', '.join(f'{s} = EXCLUDED.{s}' for s in SNAPSHOT_STATUSES)},
+        completed_today = EXCLUDED.completed_today
+""")
+
+RECOUNT_COMPLETED_SQL = text(f"""
+    UPDATE task_snapshots s SET completed_today = c.n
+    FROM (
+        SELECT {_owner}, count(*) AS n
+        FROM tasks
+        WHERE status = 'completed' AND completion_date >= :day_start AND completion_date < :day_end
+        {_by_owner}
+    ) c
+    WHERE s.kind = c.kind AND s.owner_id = c.owner_id AND s.day = :day AND s.completed_today <> c.n
+""")
+
+
+def take_snapshots(now=None):
+    """Upsert today's task counts per project and per member"""
+    now = now or datetime.utcnow()
+    today = now.date()
+    start = datetime.combine(today, datetime.min.time())
+    with db.engine.begin() as connection:
+        written = connection.execute(SNAPSHOT_SQL, {
+            "day": today, "day_start": start, "day_end": start + timedelta(days=1)
+        }).rowcount
+        recounted = connection.execute(RECOUNT_COMPLETED_SQL, {
+            "day": today - timedelta(days=1), "day_start": start - timedelta(days=1), "day_end": start
+        }).rowcount
+    return {"day": today.isoformat(), "rows": written, "recounted_yesterday": recounted}
+
+
+def snapshot_series(kind, owner_id, first_day, last_day):
+    """The owner's snapshots from first_day to last_day, oldest first"""
+    return TaskSnapshot.query.filter(
+        TaskSnapshot.kind == kind,
+        TaskSnapshot.owner_id == owner_id,
+        TaskSnapshot.day.between(first_day, last_day)
+    ).order_by(TaskSnapshot.day).all()
+
+
+def forget_snapshots(kind, owner_id):
+    """Delete the snapshots of a deleted project or member"""
+    TaskSnapshot.query.filter_by(kind=kind, owner_id=owner_id).delete()
@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import text
+from .models import (User, Project, Task, Comment, SyncTombstone, SchedulerJob, project_members, db)
+from .fields import PROJECT_FIELDS, TASK_FIELDS, PROJECT_DETAIL_FIELDS, ALL_TASK_FIELDS, load_options, serialize
+
+# ======================================
+# ========= INCREMENTAL SYNC ============
+# ======================================
+#
+# GET /sync?since=<cursor> returns the projects, tasks, comments and
+# memberships created, changed or deleted since the cursor, so clients can
+# refresh without reloading whole lists.
+#
+# Triggers stamp every inserted or updated row with the id of the writing
+# transaction (version), and record deleted rows in sync_tombstones. The
+# cursor handed to clients is the oldest transaction still running when the
+# changes were read (pg_snapshot_xmin): anything committed later has a
+# version at or above it, so nothing is skipped. A row can be sent twice;
+# clients apply changes by key, so that is harmless.
+#
+# Tombstones older than SYNC_TOMBSTONE_DAYS are pruned by the scheduler.
+# A cursor older than the pruned range gets "reset": true and the client
+# reloads its lists, as it does when there are more than SYNC_MAX_ROWS
+# changes of one kind.
+
+SYNCED_TABLES = ('projects', 'tasks', 'comments', 'project_members')
+
+SYNC_FUNCTIONS = """
+CREATE OR REPLACE FUNCTION sync_stamp() RETURNS trigger AS $$
+BEGIN
+    NEW.version := pg_current_xact_id()::text::bigint;
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_tombstone() RETURNS trigger AS $$
+DECLARE
+    row_key text;
+    row_project integer;
+    row_user integer;
+BEGIN
+    IF TG_TABLE_NAME = 'projects' THEN
+        row_key := OLD.id::text; row_project := OLD.id;
+    ELSIF TG_TABLE_NAME = 'tasks' THEN
+        row_key := OLD.project_id || ':' || OLD.task_number; row_project := OLD.project_id;
+    ELSIF TG_TABLE_NAME = 'comments' THEN
+        row_key := OLD.id::text; row_project := OLD.task_project_id;
+    ELSE
+        row_key := OLD.project_id || ':' || OLD.user_id; row_project := OLD.project_id; row_user := OLD.user_id;
+    END IF;
+    INSERT INTO sync_tombstones (version, entity, entity_key, project_id, user_id, deleted_at)
+    VALUES (pg_current_xact_id()::text::bigint, TG_TABLE_NAME, row_key, row_project, row_user, now() AT TIME ZONE 'utc');
+    RETURN OLD;
+END
+$$ LANGUAGE plpgsql;
+"""
+
+
+def install_sync_triggers(connection):
+    """Create the functions and triggers (idempotent, PostgreSQL only).
+
+    The version columns they fill are added by the 047_sync_versions migration.
+    """
+    if connection.dialect.name != 'postgresql':
+        return
+    connection.execute(text(SYNC_FUNCTIONS))
+    for table in SYNCED_TABLES:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {table}_sync_stamp ON {table}"))
+        connection.execute(text(
+            f"CREATE TRIGGER {table}_sync_stamp BEFORE INSERT OR UPDATE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION sync_stamp()"
+        ))
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {table}_sync_tombstone ON {table}"))
+        connection.execute(text(
+            f"CREATE TRIGGER {table}_sync_tombstone AFTER DELETE ON {table} "
+            f"FOR EACH ROW EXECUTE FUNCTION sync_tombstone()"
+        ))
+
+
+def current_cursor():
+    """Oldest transaction still in flight; every later commit has a version >= this"""
+    return db.session.execute(text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint")).scalar()
+
+
+def _tombstone_horizon():
+    """Version of the newest pruned tombstone (0 if none were pruned)"""
+    state = db.session.get(SchedulerJob, 'sync_tombstones')
+    return (state.high_water_version or 0) if state else 0
+
+
+def changes_since(user, since):
+    """Changes visible to user with a version >= since, or None if the client must reload"""
+    limit = current_app.config['SYNC_MAX_ROWS']
+    if since <= _tombstone_horizon():
+        return None  # deletions after the cursor may have been pruned
+
+    # Members only see their projects. A project they just joined is sent in full.
+    if user.role != 'admin':
+        memberships = db.session.execute(
+            db.select(project_members.c.project_id, project_members.c.version)
+            .where(project_members.c.user_id == user.id)
+        ).all()
+        project_ids = [pid for pid, _ in memberships]
+        joined = [pid for pid, version in memberships if version is not None and version >= since]
+        project_filter = db.or_(Project.id.in_(joined), db.and_(Project.id.in_(project_ids), Project.version >= since))
+        task_filter = db.or_(Task.project_id.in_(joined), db.and_(Task.project_id.in_(project_ids), Task.version >= since))
+        comment_filter = db.or_(
+            Comment.task_project_id.in_(joined),
+            db.and_(Comment.task_project_id.in_(project_ids), Comment.version >= since)
+        )
+        member_filter = db.or_(
+            project_members.c.project_id.in_(joined),
+            db.and_(project_members.c.project_id.in_(project_ids), project_members.c.version >= since)
+        )
+    else:
+        project_filter = Project.version >= since
+        task_filter = Task.version >= since
+        comment_filter = Comment.version >= since
+        member_filter = project_members.c.version >= since
+
+    projects = Project.query.filter(project_filter).options(
+        *load_options(Project, PROJECT_DETAIL_FIELDS, PROJECT_FIELDS)
+    ).limit(limit + 1).all()
+    tasks = Task.query.filter(task_filter).options(
+        *load_options(Task, ALL_TASK_FIELDS, TASK_FIELDS)
+    ).limit(limit + 1).all()
+    comments = db.session.query(Comment, User.name).join(User, User.id == Comment.user_id).filter(
+        comment_filter
+    ).limit(limit + 1).all()
+    memberships = db.session.execute(
+        db.select(project_members.c.project_id, project_members.c.user_id).where(member_filter).limit(limit + 1)
+    ).all()
+
+    tombstones = SyncTombstone.query.filter(SyncTombstone.version >= since)
+    if user.role != 'admin':
+        tombstones = tombstones.filter(db.or_(
+            SyncTombstone.project_id.in_(project_ids),
+            SyncTombstone.user_id == user.id,
+            # the project itself, once the user's own membership is gone with it
+            db.and_(SyncTombstone.entity == 'projects', SyncTombstone.project_id.in_(
+                db.select(SyncTombstone.project_id).where(
+                    SyncTombstone.user_id == user.id, SyncTombstone.version >= since
+                )
+            ))
+        ))
+    tombstones = tombstones.limit(limit + 1).all()
+
+    if any(len(rows) > limit for rows in (projects, tasks, comments, memberships, tombstones)):
+        return None
+
+    deleted = {"projects": [], "tasks": [], "comments": [], "memberships": []}
+    for t in tombstones:
+        if t.entity in ('tasks', 'project_members'):
+            key = [int(part) for part in t.entity_key.split(':')]
+        else:
+            key = int(t.entity_key)
+        deleted['memberships' if t.entity == 'project_members' else t.entity].append(key)
+
+    return {
+        "projects": [serialize(p, PROJECT_DETAIL_FIELDS, PROJECT_FIELDS) for p in projects],
+        "tasks": [serialize(t, ALL_TASK_FIELDS, TASK_FIELDS) for t in tasks],
+        "comments": [{
+            "id": c.id,
+            "content": c.content,
+            "created_at": c.created_at,
+            "project_id": c.task_project_id,
+            "task_number": c.task_number,
+            "user_id": c.user_id,
+            "user_name": name
+        } for c, name in comments],
+        "memberships": [{"project_id": pid, "user_id": uid} for pid, uid in memberships],
+        "deleted": deleted,
+    }
+
+
+def prune_tombstones(days=None):
+    """Delete tombstones older than SYNC_TOMBSTONE_DAYS; cursors before them must reload"""
+    days = days if days is not None else current_app.config['SYNC_TOMBSTONE_DAYS']
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    pruned, horizon = db.session.execute(text(
+        "WITH pruned AS (DELETE FROM sync_tombstones WHERE deleted_at < :cutoff RETURNING version) "
+        "SELECT count(*), max(version) FROM pruned"
+    ), {"cutoff": cutoff}).one()
+    # Moved in the same transaction as the delete, so the two cannot disagree
+    db.session.flush()
+    state = db.session.get(SchedulerJob, 'sync_tombstones') or SchedulerJob(name='sync_tombstones')
+    state.high_water_version = max(horizon or 0, state.high_water_version or 0)
+    db.session.add(state)
+    db.session.commit()
+    return {"cutoff": cutoff.isoformat(), "pruned": pruned, "horizon": state.high_water_version}
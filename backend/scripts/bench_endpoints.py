@@ -0,0 +1,332 @@
+"""Benchmark every read endpoint and a few concurrent user scenarios.
+
+Boots create_app() in-process against DATABASE_URL (load it first with
+scripts/generate_load_data.py) and records, per route, latency percentiles,
+throughput, SQL statements per request and response size. Then it runs the
+scenarios with several threads at once:
+
+  login_storm          users logging in at the same time (bcrypt bound)
+  status_change_burst  members moving their tasks between statuses
+  dashboard_load       admins and members opening their dashboards
+
+Results go to a JSON file; pass --compare with an earlier file to print the
+change in p50/p95 per route.
+
+    python scripts/bench_endpoints.py --output bench/before.json
+    python scripts/bench_endpoints.py --output bench/after.json --compare bench/before.json
+
+Scenarios write to the database (status changes, logins), so run this on a
+benchmark database, not a real one.
+"""
+import argparse
+import json
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from sqlalchemy import event, func
+from flask_jwt_extended import create_access_token
+from app import create_app
+from app.models import db, User, Task, Notification, ProjectFile, Attachment, project_members
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--requests', type=int, default=50, help="timed requests per route")
+parser.add_argument('--warmup', type=int, default=5)
+parser.add_argument('--threads', type=int, default=16, help="concurrent users in scenarios")
+parser.add_argument('--iterations', type=int, default=20, help="scenario iterations per thread")
+parser.add_argument('--password', default='123', help="password of the generated users (login storm)")
+parser.add_argument('--only', help="comma separated substrings; only routes whose endpoint or path matches")
+parser.add_argument('--skip-scenarios', action='store_true')
+parser.add_argument('--output', default=f"bench/endpoints-{datetime.now():%Y%m%d-%H%M%S}.json")
+parser.add_argument('--compare', help="earlier results file to diff against")
+args = parser.parse_args()
+
+BLUEPRINTS = ('main', 'admin', 'member', 'shared')
+# Writes that leave the data as they found it, so they can be repeated.
+# Marking one notification read only changes it on the first (warmup) call.
+# mark_all_as_read is left out: every call moves the read watermark, which
+# marks the notifications created since then as read.
+REPEATABLE_WRITES = {
+    ('shared.mark_as_read', 'PUT'),
+}
+
+
+# ======================================
+# =========== QUERY COUNTING ============
+# ======================================
+
+_local = threading.local()
+
+
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    _local.queries = getattr(_local, 'queries', 0) + 1
+
+
+def timed(client_call):
+    """Run one request; returns (seconds, statement count, response)"""
+    _local.queries = 0
+    started = time.perf_counter()
+    response = client_call()
+    return time.perf_counter() - started, _local.queries, response
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies, queries, wall_seconds, statuses, sizes=()):
+    ordered = sorted(latencies)
+    ms = lambda v: round(v * 1000, 2) if v is not None else None
+    return {
+        "requests": len(ordered),
+        "p50_ms": ms(percentile(ordered, 50)),
+        "p90_ms": ms(percentile(ordered, 90)),
+        "p95_ms": ms(percentile(ordered, 95)),
+        "p99_ms": ms(percentile(ordered, 99)),
+        "max_ms": ms(ordered[-1] if ordered else None),
+        "mean_ms": ms(sum(ordered) / len(ordered) if ordered else None),
+        "throughput_rps": round(len(ordered) / wall_seconds, 1) if wall_seconds else None,
+        "queries_per_request": round(sum(queries) / len(queries), 1) if queries else None,
+        "max_queries": max(queries) if queries else None,
+        "avg_bytes": round(sum(sizes) / len(sizes)) if sizes else None,
+        "statuses": {str(s): statuses.count(s) for s in sorted(set(statuses))},
+    }
+
+
+# ======================================
+# ============== FIXTURES ===============
+# ======================================
+
+def pick_fixtures():
+    """The busiest member and admin, and ids for every URL parameter"""
+    admin = User.query.filter_by(role='admin').order_by(User.id).first()
+    busiest = db.session.query(Task.assigned_to, func.count()).filter(Task.assigned_to.isnot(None)).group_by(
+        Task.assigned_to).order_by(func.count().desc()).first()
+    if admin is None or busiest is None:
+        raise SystemExit("The database needs at least one admin and one assigned task "
+                         "(run scripts/generate_load_data.py)")
+    member_id = busiest[0]
+    # The member's biggest project, and one of their tasks in it
+    project_id = db.session.query(Task.project_id).filter(Task.assigned_to == member_id).join(
+        project_members, db.and_(project_members.c.project_id == Task.project_id,
+                                 project_members.c.user_id == member_id)
+    ).group_by(Task.project_id).order_by(func.count().desc()).limit(1).scalar()
+    task_number = db.session.query(func.min(Task.task_number)).filter(
+        Task.project_id == project_id, Task.assigned_to == member_id).scalar()
+    notification_id = db.session.query(func.max(Notification.id)).filter(Notification.user_id == member_id).scalar()
+    project_file_id = db.session.query(func.min(ProjectFile.id)).filter(ProjectFile.project_id == project_id).scalar()
+    attachment_id = db.session.query(func.min(Attachment.id)).filter(
+        Attachment.task_project_id == project_id, Attachment.task_number == task_number).scalar()
+    return {
+        "admin_id": admin.id,
+        "member_id": member_id,
+        "project_id": project_id,
+        "task_number": task_number,
+        "notification_id": notification_id or 0,
+        "project_file_id": project_file_id or 0,
+        "attachment_id": attachment_id or 0,
+    }
+
+
+def url_for_rule(rule, fixtures):
+    values = {}
+    for arg in rule.arguments:
+        if arg == 'file_id':
+            values[arg] = fixtures['attachment_id' if rule.endpoint.startswith('member.') else 'project_file_id']
+        elif arg == 'user_id':
+            values[arg] = fixtures['member_id']
+        else:
+            values[arg] = fixtures[arg]
+    return rule.build(values, append_unknown=False)[1]
+
+
+def routes_to_measure(app):
+    """(endpoint, method, rule) for every read route and repeatable write in the four blueprints"""
+    selected, skipped = [], []
+    for rule in sorted(app.url_map.iter_rules(), key=lambda r: r.rule):
+        blueprint = rule.endpoint.split('.')[0]
+        if blueprint not in BLUEPRINTS:
+            continue
+        if args.only and not any(s in rule.endpoint or s in rule.rule for s in args.only.split(',')):
+            continue
+        for method in sorted(rule.methods - {'HEAD', 'OPTIONS'}):
+            if method == 'GET' or (rule.endpoint, method) in REPEATABLE_WRITES:
+                selected.append((rule.endpoint, method, rule))
+            else:
+                skipped.append(f"{method} {rule.rule}")
+    return selected, skipped
+
+
+# ======================================
+# ============== ROUTE RUN ==============
+# ======================================
+
+def bench_routes(app, fixtures, tokens):
+    results = {}
+    selected, skipped = routes_to_measure(app)
+    client = app.test_client()
+    for endpoint, method, rule in selected:
+        url = url_for_rule(rule, fixtures)
+        role = 'admin' if endpoint.startswith('admin.') else 'member'
+        headers = {'Authorization': f"Bearer {tokens[role]}"}
+        call = lambda: client.open(url, method=method, headers=headers)
+        for _ in range(args.warmup):
+            call()
+        latencies, queries, statuses, sizes = [], [], [], []
+        started = time.perf_counter()
+        for _ in range(args.requests):
+            seconds, count, response = timed(call)
+            latencies.append(seconds)
+            queries.append(count)
+            statuses.append(response.status_code)
+            sizes.append(len(response.get_data()))
+        results[f"{method} {rule.rule}"] = summarize(latencies, queries, time.perf_counter() - started, statuses, sizes)
+        r = results[f"{method} {rule.rule}"]
+        print(f"  {method:6} {rule.rule:60} p50 {r['p50_ms']:8.2f}ms  p95 {r['p95_ms']:8.2f}ms  "
+              f"{r['queries_per_request']:6} q/req  {r['statuses']}")
+    return results, skipped
+
+
+# ======================================
+# ============== SCENARIOS ==============
+# ======================================
+
+def run_scenario(app, name, make_steps):
+    """Run make_steps(thread_index) -> [callable(client)] on args.threads threads at once"""
+    lock = threading.Lock()
+    latencies, queries, statuses = [], [], []
+
+    def worker(index):
+        client = app.test_client()
+        steps = make_steps(index)
+        for i in range(args.iterations):
+            step = steps[i % len(steps)]
+            seconds, count, response = timed(lambda: step(client))
+            with lock:
+                latencies.append(seconds)
+                queries.append(count)
+                statuses.append(response.status_code)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        list(pool.map(worker, range(args.threads)))
+    result = summarize(latencies, queries, time.perf_counter() - started, statuses)
+    print(f"  {name:22} p50 {result['p50_ms']:8.2f}ms  p95 {result['p95_ms']:8.2f}ms  "
+          f"{result['throughput_rps']:8} req/s  {result['statuses']}")
+    return result
+
+
+def bench_scenarios(app, fixtures):
+    with app.app_context():
+        users = User.query.order_by(User.id).limit(args.threads * 4).all()
+        emails = [u.email for u in users]
+        workers = db.session.query(Task.assigned_to, Task.project_id, Task.task_number).filter(
+            Task.assigned_to.isnot(None)).order_by(Task.project_id, Task.task_number).limit(args.threads).all()
+        admin_ids = [u.id for u in User.query.filter_by(role='admin').all()]
+        member_ids = [w[0] for w in workers]
+        tokens = {uid: create_access_token(identity=str(uid)) for uid in set(admin_ids + member_ids)}
+
+    def auth(uid):
+        return {'Authorization': f"Bearer {tokens[uid]}"}
+
+    def login_steps(i):
+        email = emails[i % len(emails)]
+        return [lambda c: c.post('/login', json={"email": email, "password": args.password})]
+
+    def status_steps(i):
+        uid, project_id, task_number = workers[i % len(workers)]
+        url = f"/member/projects/{project_id}/tasks/{task_number}/status"
+        return [lambda c, s=s: c.put(url, headers=auth(uid), json={"status": s}) for s in ('in_progress', 'todo')]
+
+    def dashboard_steps(i):
+        # Every fourth user is an admin, the rest are members
+        if i % 4 == 0 and admin_ids:
+            uid = admin_ids[i % len(admin_ids)]
+            urls = ['/admin/projects', '/admin/members', '/admin/tasks', '/admin/reports/stats',
+                    '/notifications', '/notifications/unread-count']
+        else:
+            uid = member_ids[i % len(member_ids)]
+            urls = ['/member/projects', '/member/tasks', '/notifications', '/notifications/unread-count']
+        return [lambda c, u=u: c.get(u, headers=auth(uid)) for u in urls]
+
+    return {
+        "login_storm": run_scenario(app, 'login_storm', login_steps),
+        "status_change_burst": run_scenario(app, 'status_change_burst', status_steps),
+        "dashboard_load": run_scenario(app, 'dashboard_load', dashboard_steps),
+    }
+
+
+# ======================================
+# ================ MAIN =================
+# ======================================
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def compare(current, previous_path):
+    with open(previous_path) as f:
+        previous = json.load(f)
+    print(f"\nChange against {previous_path} ({previous['meta'].get('commit')}):")
+    for section in ('routes', 'scenarios'):
+        for name, now in current[section].items():
+            before = previous.get(section, {}).get(name)
+            if not before or not before.get('p50_ms') or not now.get('p50_ms'):
+                continue
+            deltas = []
+            for key in ('p50_ms', 'p95_ms', 'queries_per_request'):
+                if before.get(key) and now.get(key) is not None:
+                    deltas.append(f"{key} {before[key]} -> {now[key]} ({(now[key] / before[key] - 1) * 100:+.0f}%)")
+            print(f"  {name:66} " + '  '.join(deltas))
+
+
+# Measure the endpoints, not the limiter (export RATE_LIMIT_ENABLED=true to include it)
+os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+app = create_app()
+app.config['TESTING'] = True
+with app.app_context():
+    for engine in db.engines.values():  # replicas included
+        event.listen(engine, 'before_cursor_execute', _count_query)
+    fixtures = pick_fixtures()
+    tokens = {
+        'admin': create_access_token(identity=str(fixtures['admin_id'])),
+        'member': create_access_token(identity=str(fixtures['member_id'])),
+    }
+    dataset = {table: db.session.execute(db.text(f"SELECT count(*) FROM {table}")).scalar()
+               for table in ('users', 'projects', 'tasks', 'comments', 'notifications', 'activity_logs')}
+    database = db.engines[None].url.render_as_string(hide_password=True)
+
+print(f"Routes ({args.requests} requests each, fixtures {fixtures}):")
+routes, skipped = bench_routes(app, fixtures, tokens)
+scenarios = {}
+if not args.skip_scenarios:
+    print(f"Scenarios ({args.threads} threads x {args.iterations} iterations):")
+    scenarios = bench_scenarios(app, fixtures)
+
+results = {
+    "meta": {
+        "commit": git_commit(),
+        "started": datetime.now().isoformat(timespec='seconds'),
+        "database": database,
+        "dataset": dataset,
+        "fixtures": fixtures,
+        "args": vars(args),
+    },
+    "routes": routes,
+    "skipped_routes": skipped,
+    "scenarios": scenarios,
+}
+os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+with open(args.output, 'w') as f:
+    json.dump(results, f, indent=2)
+print(f"\nWrote {args.output}")
+if args.compare:
+    compare(results, args.compare)
@@ -0,0 +1,104 @@
+"""Compare JSON encoding time and bytes on the wire for the heaviest payloads.
+
+Builds synthetic payloads shaped like project details and the admin task
+list, then measures the stdlib encoder (with the old per-field
+isoformat() calls) against FastJSONProvider, and gzip/brotli sizes.
+
+    python scripts/bench_serialization.py --tasks 2000 --logs 5000
+"""
+import argparse
+import gzip
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from app.encoding import FastJSONProvider, brotli, orjson
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--tasks', type=int, default=2000)
+parser.add_argument('--logs', type=int, default=5000)
+parser.add_argument('--repeat', type=int, default=20)
+args = parser.parse_args()
+
+random.seed(42)
+now = datetime(2026, 1, 1)
+statuses = ['todo', 'in_progress', 'pending_review', 'completed']
+
+
+def task(n):
+    return {
+        "project_id": 1,
+        "task_number": n,
+        "title": f"Task {n} implement feature {random.randint(1, 500)}",
+        "description": "Build the feature end to end, including tests and documentation. " * random.randint(1, 4),
+        "status": random.choice(statuses),
+        "priority": random.choice(['low', 'medium', 'high']),
+        "start_date": now + timedelta(days=random.randint(0, 30)),
+        "due_date": now + timedelta(days=random.randint(30, 90)),
+        "completion_date": None,
+        "assigned_to": random.randint(2, 50),
+        "assignee_name": f"Member {random.randint(2, 50)}",
+        "attachments_count": random.randint(0, 5)
+    }
+
+
+def log(n):
+    return {
+        "id": n,
+        "action": f"Updated task #{random.randint(1, args.tasks)} status to '{random.choice(statuses)}'",
+        "user_name": f"Member {random.randint(2, 50)}",
+        "created_at": now + timedelta(minutes=n)
+    }
+
+
+payloads = {
+    "project_details": {"project": {
+        "id": 1, "name": "Big project", "description": "x" * 200, "created_at": now,
+        "tasks": [task(n) for n in range(1, args.tasks + 1)],
+        "members": [{"id": i, "name": f"Member {i}", "email": f"member{i}@test.com"} for i in range(2, 50)],
+        "activity_logs": [log(n) for n in range(1, args.logs + 1)]
+    }},
+    "all_tasks": {"tasks": [dict(task(n), project_name="Big project") for n in range(1, args.tasks + 1)]}
+}
+
+
+def with_isoformat(obj):
+    """What the views used to do by hand before encoding"""
+    if isinstance(obj, dict):
+        return {k: with_isoformat(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [with_isoformat(v) for v in obj]
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    return obj
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        result = fn()
+    return (time.perf_counter() - start) / args.repeat * 1000, result
+
+
+app = Flask(__name__)
+stdlib = DefaultJSONProvider(app)
+fast = FastJSONProvider(app)
+
+print(f"orjson: {'yes' if orjson else 'no'}, brotli: {'yes' if brotli else 'no'}, repeat={args.repeat}\n")
+for name, payload in payloads.items():
+    std_ms, std_body = timed(lambda: stdlib.dumps(with_isoformat(payload)))
+    fast_ms, fast_body = timed(lambda: fast.dumps(payload))
+    assert json.loads(std_body) == json.loads(fast_body)
+
+    raw = fast_body.encode('utf-8')
+    gzip_ms, gzipped = timed(lambda: gzip.compress(raw, compresslevel=6))
+    print(f"{name}")
+    print(f"  encode  stdlib+isoformat {std_ms:8.2f} ms   fast {fast_ms:8.2f} ms   ({std_ms / fast_ms:.1f}x)")
+    print(f"  bytes   raw {len(raw):>10,}   gzip {len(gzipped):>10,} ({gzip_ms:.2f} ms)", end='')
+    if brotli:
+        br_ms, brotlied = timed(lambda: brotli.compress(raw, quality=4))
+        print(f"   br {len(brotlied):>10,} ({br_ms:.2f} ms)")
+    else:
+        print()
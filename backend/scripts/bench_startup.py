@@ -0,0 +1,96 @@
+"""Measure how long a fresh worker takes to serve its first request.
+
+Each run starts a new Python process and times three phases: importing the
+app package, create_app(), and the first GET /health (plus GET /health/db,
+the first database round trip). With --server it instead starts
+`flask run` and polls /health until it answers, which includes interpreter
+and server startup.
+
+    python scripts/bench_startup.py --runs 10
+    python scripts/bench_startup.py --server --runs 5
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--runs', type=int, default=10)
+parser.add_argument('--server', action='store_true', help="time `flask run` until /health answers")
+parser.add_argument('--timeout', type=float, default=60)
+parser.add_argument('--json', help="also write the results to this file")
+args = parser.parse_args()
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in the child process; prints one JSON line with the phase timings
+CHILD = """
+import json, time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+client = app.test_client()
+status = client.get('/health').status_code
+t3 = time.perf_counter()
+db_status = client.get('/health/db').status_code
+t4 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "create_app": t2 - t1, "first_request": t3 - t2,
+                  "first_db_request": t4 - t3, "total": t4 - t0, "status": status, "db_status": db_status}))
+"""
+
+
+def in_process_run():
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', CHILD], cwd=BACKEND_DIR, capture_output=True, text=True,
+                         timeout=args.timeout, env={**os.environ, 'PYTHONPATH': BACKEND_DIR})
+    if out.returncode != 0:
+        raise SystemExit(f"Worker failed:\n{out.stderr}")
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["process"] = time.perf_counter() - started  # includes interpreter startup
+    return result
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def server_run():
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, '-m', 'flask', 'run', '--port', str(port), '--no-reload'],
+                            cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < args.timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    return {"time_to_first_request": time.perf_counter() - started, "status": response.status}
+            except OSError:
+                time.sleep(0.01)
+        raise SystemExit(f"Server did not answer within {args.timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+runs = [server_run() if args.server else in_process_run() for _ in range(args.runs)]
+phases = [k for k in runs[0] if k not in ('status', 'db_status')]
+print(f"{len(runs)} runs ({'flask run' if args.server else 'fresh process + test client'}):")
+summary = {}
+for phase in phases:
+    values = [r[phase] for r in runs]
+    summary[phase] = {"median_ms": round(statistics.median(values) * 1000, 1),
+                      "min_ms": round(min(values) * 1000, 1), "max_ms": round(max(values) * 1000, 1)}
+    print(f"  {phase:22} median {summary[phase]['median_ms']:8.1f}ms  "
+          f"min {summary[phase]['min_ms']:8.1f}ms  max {summary[phase]['max_ms']:8.1f}ms")
+if args.json:
+    with open(args.json, 'w') as f:
+        json.dump({"summary": summary, "runs": runs}, f, indent=2)
@@ -0,0 +1,358 @@
+"""Generate a large, production-shaped dataset for load testing (PostgreSQL only).
+
+Rows are streamed into the database with COPY, so millions of rows load in
+minutes. The same --seed always produces the same data. Activity is skewed:
+a few users are in many projects and get most of the assignments and
+comments, project sizes follow a long-tailed distribution, and admins
+receive most notifications.
+
+    python scripts/generate_load_data.py --truncate
+    python scripts/generate_load_data.py --users 20000 --projects 5000 --tasks-per-project 200
+
+Every generated user has the password given by --password (default 123).
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+from sqlalchemy import text
+from app import create_app
+from app.models import db, User
+from app.activity import EVENT_CODES
+from app.partitions import create_month_partitions, add_months, month_start
+from app.maintenance import repair_unread_counts, repair_comment_counts
+from app.counters import repair_project_counters
+from app.snapshots import take_snapshots
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--users', type=int, default=2000)
+parser.add_argument('--admins', type=int, default=5)
+parser.add_argument('--projects', type=int, default=500)
+parser.add_argument('--tasks-per-project', type=float, default=100, help="mean; sizes are long-tailed")
+parser.add_argument('--members-per-project', type=int, default=8)
+parser.add_argument('--comments-per-task', type=float, default=3)
+parser.add_argument('--attachments-per-task', type=float, default=0.5)
+parser.add_argument('--files-per-project', type=float, default=3)
+parser.add_argument('--activity-per-task', type=float, default=4)
+parser.add_argument('--notifications-per-user', type=float, default=100)
+parser.add_argument('--months', type=int, default=12, help="how far back the history goes")
+parser.add_argument('--skew', type=float, default=1.1, help="Zipf exponent for user activity (0 = uniform)")
+parser.add_argument('--seed', type=int, default=42)
+parser.add_argument('--password', default='123')
+parser.add_argument('--truncate', action='store_true', help="empty all tables first")
+parser.add_argument('--chunk', type=int, default=100_000, help="rows per COPY batch")
+args = parser.parse_args()
+
+NOW = datetime.utcnow().replace(microsecond=0)
+HISTORY_START = add_months(month_start(NOW), -args.months)
+STATUSES = ['todo', 'in_progress', 'pending_review', 'completed']
+PRIORITIES = ['low', 'medium', 'high']
+VERBS = ['Design', 'Implement', 'Review', 'Test', 'Refactor', 'Document', 'Deploy', 'Fix', 'Optimize', 'Migrate']
+NOUNS = ['login flow', 'checkout page', 'search API', 'report export', 'user settings', 'payment gateway',
+         'dashboard widgets', 'email templates', 'mobile layout', 'audit log', 'file uploads', 'cache layer']
+WORDS = ('lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore '
+         'et dolore magna aliqua ut enim ad minim veniam quis nostrud exercitation ullamco laboris').split()
+
+TABLES = ['activity_logs', 'notifications', 'notification_counters', 'attachments', 'comments',
+          'project_files', 'tasks', 'project_members', 'projects', 'users', 'task_snapshots']
+
+
+def rng_for(name):
+    """Independent, reproducible random stream per table"""
+    return random.Random(f"{args.seed}-{name}")
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize() + '.'
+
+
+def task_title(project_id, task_number):
+    """Deterministic title, so later tables can repeat it without storing every task"""
+    h = project_id * 7919 + task_number * 104729
+    return f"{VERBS[h % len(VERBS)]} {NOUNS[(h // 11) % len(NOUNS)]}"
+
+
+def between(rng, start, end):
+    return start + timedelta(seconds=rng.random() * max((end - start).total_seconds(), 0))
+
+
+def zipf_weights(n):
+    return [1 / (rank + 1) ** args.skew for rank in range(n)]
+
+
+def copy_rows(cursor, table, columns, rows):
+    """COPY rows (an iterable of tuples) into table in chunks; returns the row count"""
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    started, total = time.perf_counter(), 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    pending = 0
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending == args.chunk:
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            total += pending
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+        total += pending
+    elapsed = time.perf_counter() - started
+    print(f"  {table:22} {total:>10,} rows  {elapsed:7.1f}s  {total / max(elapsed, 1e-9):>10,.0f} rows/s")
+    return total
+
+
+def next_id(connection, table):
+    return connection.execute(text(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")).scalar()
+
+
+# ======================================
+# ============ ROW GENERATORS ===========
+# ======================================
+
+def user_rows(first_id, password_hash):
+    rng = rng_for('users')
+    for i in range(args.users):
+        uid = first_id + i
+        role = 'admin' if i < args.admins else 'member'
+        created = between(rng, HISTORY_START, NOW)
+        yield uid, f"Load User {uid}", f"load{uid}@example.com", password_hash, role, created, created
+
+
+def plan_projects(first_project_id, member_ids):
+    """Project dates, sizes and member lists, kept in memory for the later tables"""
+    rng = rng_for('projects')
+    weights = zipf_weights(len(member_ids))
+    # choices() sums weights on every call; cumulative ones are summed once
+    cum_weights = list(accumulate(weights))
+    rank = {member_id: i for i, member_id in enumerate(member_ids)}
+    projects = []
+    for i in range(args.projects):
+        start = between(rng, HISTORY_START, NOW - timedelta(days=7))
+        # Long-tailed sizes with the requested mean (lognormal, sigma 1)
+        size = max(1, int(rng.lognormvariate(0, 1) / 1.6487 * args.tasks_per_project))
+        k = min(len(member_ids), max(1, int(rng.gauss(args.members_per_project, args.members_per_project / 3))))
+        members = set()
+        while len(members) < k:  # draw the missing ones again after duplicates
+            members.update(rng.choices(member_ids, cum_weights=cum_weights, k=k - len(members)))
+        members = sorted(members, key=rank.get)  # most active first
+        projects.append({
+            "id": first_project_id + i,
+            "start": start,
+            "due": start + timedelta(days=rng.randint(30, 365)),
+            "tasks": size,
+            "members": members,
+            "member_cum_weights": list(accumulate(weights[rank[m]] for m in members)),
+            "priority": rng.choice(PRIORITIES),
+        })
+    return projects
+
+
+def project_rows(projects):
+    rng = rng_for('project_rows')
+    for p in projects:
+        completed = p["due"] if p["due"] < NOW and rng.random() < 0.6 else None
+        yield (p["id"], f"Project {p['id']}", sentence(rng, 20), p["start"], p["due"], completed,
+               p["priority"], p["start"], completed or p["start"])
+
+
+def project_member_rows(projects):
+    for p in projects:
+        for member_id in p["members"]:
+            yield p["id"], member_id
+
+
+def task_times(rng, project):
+    created = between(rng, project["start"], min(project["due"], NOW))
+    return created, created + timedelta(days=rng.randint(3, 45))
+
+
+def task_rows(projects):
+    rng = rng_for('tasks')
+    for p in projects:
+        for n in range(1, p["tasks"] + 1):
+            created, due = task_times(rng, p)
+            age = (NOW - created).days
+            # Older tasks are more likely to be done
+            status = rng.choices(STATUSES, weights=[10, 6, 2, 2 + age / 10])[0]
+            completed = between(rng, created, NOW) if status == 'completed' else None
+            assignee = rng.choices(p["members"], cum_weights=p["member_cum_weights"])[0] if rng.random() < 0.9 else None
+            yield (p["id"], n, task_title(p["id"], n), sentence(rng, 30), status, rng.choice(PRIORITIES),
+                   created, due, completed, created, completed or created, assignee)
+
+
+def per_task(rng, mean):
+    """Skewed per-task count: most tasks get a few, some get many"""
+    return int(rng.expovariate(1 / mean)) if mean > 0 else 0
+
+
+def comment_rows(projects, first_id):
+    rng = rng_for('comments')
+    cid = first_id
+    for p in projects:
+        for n in range(1, p["tasks"] + 1):
+            for _ in range(per_task(rng, args.comments_per_task)):
+                author = rng.choices(p["members"], cum_weights=p["member_cum_weights"])[0]
+                yield cid, sentence(rng, rng.randint(5, 40)), between(rng, p["start"], NOW), p["id"], n, author
+                cid += 1
+
+
+def attachment_rows(projects, first_id):
+    rng = rng_for('attachments')
+    aid = first_id
+    for p in projects:
+        for n in range(1, p["tasks"] + 1):
+            for _ in range(per_task(rng, args.attachments_per_task)):
+                name = f"file_{aid}.pdf"
+                uploader = rng.choices(p["members"], cum_weights=p["member_cum_weights"])[0]
+                yield aid, name, f"/uploads/tasks/{name}", between(rng, p["start"], NOW), uploader, p["id"], n
+                aid += 1
+
+
+def project_file_rows(projects, first_id, admin_ids):
+    rng = rng_for('project_files')
+    fid = first_id
+    for p in projects:
+        for _ in range(per_task(rng, args.files_per_project)):
+            name = f"project_file_{fid}.pdf"
+            yield fid, name, f"/uploads/projects/{name}", between(rng, p["start"], NOW), rng.choice(admin_ids), p["id"]
+            fid += 1
+
+
+def activity_rows(projects, first_id):
+    rng = rng_for('activity_logs')
+    lid = first_id
+    followups = ['task_status_changed', 'task_commented', 'task_updated', 'task_submitted', 'task_file_uploaded']
+    for p in projects:
+        for n in range(1, p["tasks"] + 1):
+            title = task_title(p["id"], n)
+            created, _ = task_times(rng, p)
+            yield lid, EVENT_CODES['task_created'], n, json.dumps({"title": title}), created, p["members"][0], p["id"]
+            lid += 1
+            for _ in range(per_task(rng, max(args.activity_per_task - 1, 0))):
+                event = rng.choice(followups)
+                params = {"title": title}
+                if event == 'task_status_changed':
+                    params["status"] = rng.choice(STATUSES[:2])
+                elif event == 'task_file_uploaded':
+                    params["filename"] = f"file_{rng.randint(1, 10**6)}.pdf"
+                user = rng.choices(p["members"], cum_weights=p["member_cum_weights"])[0]
+                yield lid, EVENT_CODES[event], n, json.dumps(params), between(rng, created, NOW), user, p["id"]
+                lid += 1
+
+
+def notification_rows(projects, user_ids, admin_ids, first_id):
+    rng = rng_for('notifications')
+    admins = set(admin_ids)
+    # Admins receive every member event, so they get the bulk of the rows
+    weights = [w * (20 if uid in admins else 1) for uid, w in zip(user_ids, zipf_weights(len(user_ids)))]
+    cum_weights = list(accumulate(weights))
+    project_cum_weights = list(accumulate(p["tasks"] for p in projects))
+    total = int(args.notifications_per_user * len(user_ids))
+    templates = {
+        'task_status': "Load User {by} changed task #{n} '{title}' status to 'in_progress'",
+        'comment': "Load User {by} commented on task #{n} '{title}'",
+        'file': "Load User {by} uploaded file 'report.pdf' to task #{n} '{title}'",
+        'assignment': "You have been assigned to task #{n} '{title}' in project 'Project {p}'",
+        'review': "Your task #{n} '{title}' has been approved ✓",
+    }
+    types = list(templates)
+    nid = first_id
+    for start in range(0, total, args.chunk):
+        k = min(args.chunk, total - start)
+        recipients = rng.choices(user_ids, cum_weights=cum_weights, k=k)
+        chosen = rng.choices(projects, cum_weights=project_cum_weights, k=k)
+        for user_id, p in zip(recipients, chosen):
+            n = rng.randint(1, p["tasks"])
+            kind = rng.choice(types)
+            by = rng.choice(p["members"])
+            created = between(rng, p["start"], NOW)
+            is_read = rng.random() < (0.9 if (NOW - created).days > 7 else 0.3)
+            message = templates[kind].format(by=by, n=n, title=task_title(p["id"], n), p=p["id"])
+            yield (nid, message, kind, is_read, 1, created, created, user_id, p["id"], n, p["id"], by)
+            nid += 1
+
+
+# ======================================
+# ================ MAIN =================
+# ======================================
+
+app = create_app()
+with app.app_context():
+    if db.engine.dialect.name != 'postgresql':
+        raise SystemExit("generate_load_data.py needs PostgreSQL (it loads with COPY)")
+    if args.admins > args.users:
+        raise SystemExit("--admins cannot exceed --users")
+
+    started = time.perf_counter()
+    with db.engine.begin() as connection:
+        if args.truncate:
+            connection.execute(text(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE"))
+        # Partitions for the whole history, so no rows land in the default partitions
+        for table in ('notifications', 'activity_logs'):
+            months = args.months + app.config['PARTITION_MONTHS_AHEAD']
+            create_month_partitions(connection, table, months, now=HISTORY_START)
+        first = {table: next_id(connection, table) for table in
+                 ('users', 'projects', 'comments', 'attachments', 'project_files', 'notifications', 'activity_logs')}
+
+    # Hash once; every generated user shares the password
+    hasher = User()
+    hasher.set_password(args.password)
+    password_hash = hasher.password
+
+    user_ids = list(range(first['users'], first['users'] + args.users))
+    admin_ids, member_ids = user_ids[:args.admins], user_ids[args.admins:] or user_ids
+    projects = plan_projects(first['projects'], member_ids)
+
+    print(f"Loading (seed {args.seed}, history from {HISTORY_START:%Y-%m-%d}):")
+    raw = db.engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        copy_rows(cursor, 'users', ['id', 'name', 'email', 'password', 'role', 'created_at', 'updated_at'],
+                  user_rows(first['users'], password_hash))
+        copy_rows(cursor, 'projects', ['id', 'name', 'description', 'start_date', 'due_date', 'completion_date',
+                                       'priority', 'created_at', 'updated_at'], project_rows(projects))
+        copy_rows(cursor, 'project_members', ['project_id', 'user_id'], project_member_rows(projects))
+        copy_rows(cursor, 'tasks', ['project_id', 'task_number', 'title', 'description', 'status', 'priority',
+                                    'start_date', 'due_date', 'completion_date', 'created_at', 'updated_at',
+                                    'assigned_to'], task_rows(projects))
+        copy_rows(cursor, 'comments', ['id', 'content', 'created_at', 'task_project_id', 'task_number', 'user_id'],
+                  comment_rows(projects, first['comments']))
+        copy_rows(cursor, 'attachments', ['id', 'filename', 'file_url', 'uploaded_at', 'uploaded_by',
+                                          'task_project_id', 'task_number'],
+                  attachment_rows(projects, first['attachments']))
+        copy_rows(cursor, 'project_files', ['id', 'filename', 'file_url', 'uploaded_at', 'uploaded_by', 'project_id'],
+                  project_file_rows(projects, first['project_files'], admin_ids or user_ids))
+        copy_rows(cursor, 'activity_logs', ['id', 'event_type', 'task_number', 'params', 'created_at', 'user_id',
+                                            'project_id'], activity_rows(projects, first['activity_logs']))
+        copy_rows(cursor, 'notifications', ['id', 'message', 'type', 'is_read', 'count', 'created_at', 'updated_at',
+                                            'user_id', 'task_project_id', 'task_number', 'project_id',
+                                            'triggered_by'],
+                  notification_rows(projects, user_ids, admin_ids or user_ids, first['notifications']))
+
+        # Ids were assigned here, so move the sequences past them
+        for table in ('users', 'projects', 'comments', 'attachments', 'project_files'):
+            cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                           f"(SELECT COALESCE(MAX(id), 1) FROM {table}))")
+        for table in ('notifications', 'activity_logs'):
+            cursor.execute(f"SELECT setval('{table}_id_seq', (SELECT COALESCE(MAX(id), 1) FROM {table}))")
+        raw.commit()
+    finally:
+        raw.close()
+
+    print("Unread counters:", repair_unread_counts())
+    print("Comment counts:", repair_comment_counts())
+    print("Project counters:", repair_project_counters())
+    print("Task snapshots:", take_snapshots())
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.execute(text("ANALYZE"))
+    print(f"Done in {time.perf_counter() - started:.1f}s. Log in as load{user_ids[0]}@example.com "
+          f"(admin) or load{member_ids[0]}@example.com / {args.password}")
@@ -0,0 +1,17 @@
+"""Database housekeeping: partitions, retention and counter drift repair.
+
+Run it daily (cron or a scheduler container):
+
+    python scripts/maintain_db.py
+"""
+from app import create_app
+from app.maintenance import (
+    ensure_partitions, apply_notification_retention, apply_activity_retention, repair_unread_counts
+)
+
+app = create_app()
+with app.app_context():
+    print("Partitions:", ensure_partitions())
+    print("Notification retention:", apply_notification_retention())
+    print("Activity log retention:", apply_activity_retention())
+    print("Unread counters:", repair_unread_counts())
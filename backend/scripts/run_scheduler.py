@@ -0,0 +1,70 @@
+"""Run the background jobs: due date alerts, task snapshots and database maintenance.
+
+Keeps running and checks the jobs every SCHEDULER_TICK_SECONDS. Start one per
+deployment, or more for failover: only the runner holding the advisory lock
+does anything, the others take over if it goes away.
+
+    python scripts/run_scheduler.py
+    python scripts/run_scheduler.py --once           # run what is due, then exit (cron)
+    python scripts/run_scheduler.py --once --force   # run every job now
+"""
+import argparse
+import json
+import time
+from app import create_app
+from app.models import db
+from app.scheduler import try_lock, run_pending
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument('--once', action='store_true', help="run the due jobs once and exit")
+parser.add_argument('--force', action='store_true', help="ignore the job intervals")
+args = parser.parse_args()
+
+
+def acquire_lock():
+    """A connection holding the scheduler lock, or None if another runner has it"""
+    connection = db.engine.connect()
+    if try_lock(connection):
+        connection.commit()
+        return connection
+    connection.close()
+    return None
+
+
+def still_connected(connection):
+    # The lock goes away with the session, so stop running jobs if it dropped
+    try:
+        connection.exec_driver_sql("SELECT 1")
+        connection.commit()
+        return True
+    except Exception:
+        connection.invalidate()
+        return False
+
+
+app = create_app()
+with app.app_context():
+    tick = app.config['SCHEDULER_TICK_SECONDS']
+    lock_connection = None
+    while True:
+        try:
+            if lock_connection is not None and not still_connected(lock_connection):
+                print("Lost the database connection, releasing the scheduler lock", flush=True)
+                lock_connection = None
+            if lock_connection is None:
+                lock_connection = acquire_lock()
+                if lock_connection is not None:
+                    print("Holding the scheduler lock", flush=True)
+            if lock_connection is not None:
+                for name, result in run_pending(force=args.force).items():
+                    print(f"{name}: {json.dumps(result)}", flush=True)
+            elif args.once:
+                print("Another scheduler is running, nothing to do")
+        except Exception as e:  # database unreachable; try again on the next tick
+            print(f"Scheduler tick failed: {e}", flush=True)
+        finally:
+            db.session.remove()
+
+        if args.once:
+            break
+        time.sleep(tick)
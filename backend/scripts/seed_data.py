@@ -1,5 +1,6 @@
 from app import create_app
 from app.models import db, User, Project, Task
+from app.counters import repair_project_counters
 from datetime import datetime, timedelta
 
 app = create_app()
@@ -161,6 +162,9 @@ with app.app_context():
         db.session.add(task)
     
     db.session.commit()
+
+    # The rows above bypass the routes that keep the project counters in step
+    print("Project counters:", repair_project_counters())
     
     print("Database seeded successfully!")
     print("\nProjects created:")
@@ -0,0 +1,77 @@
+"""Shared fixtures.
+
+sqlite_app(*models) builds the app on a throwaway SQLite file with only the
+tables a test needs. pg_app runs against TEST_DATABASE_URL, an empty
+PostgreSQL database (e.g. postgresql://postgres@localhost:5432/pm_test)
+given the schema `flask init-db` creates; the tests using it are skipped
+when it is not set. Tables are emptied after each test.
+"""
+import os
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import text
+
+from app import create_app, db
+
+TEST_ENV = {'RATE_LIMIT_ENABLED': 'false', 'MEMBERSHIP_CACHE_SECONDS': '0'}
+
+
+@pytest.fixture
+def sqlite_app(tmp_path, monkeypatch):
+    """Factory: sqlite_app(*models, **env) -> app with those models' (or tables') tables"""
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+
+    def make(*models, **env):
+        for name, value in {**TEST_ENV, **env}.items():
+            monkeypatch.setenv(name, value)
+        app = create_app()
+        app.testing = True
+        with app.app_context():
+            db.metadata.create_all(db.engine, tables=[getattr(model, '__table__', model) for model in models])
+        return app
+    return make
+
+
+@pytest.fixture(scope='session')
+def _pg_database():
+    url = os.getenv('TEST_DATABASE_URL')
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    with pytest.MonkeyPatch.context() as patch:
+        for name, value in {**TEST_ENV, 'DATABASE_URL': url}.items():
+            patch.setenv(name, value)
+        app = create_app()
+    app.testing = True
+
+    from app.maintenance import ensure_partitions
+    from app.migrations import migrate_schema
+    from app.sync import install_sync_triggers
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(text("DROP SCHEMA public CASCADE"))
+            connection.execute(text("CREATE SCHEMA public"))
+        # What init-db does, without the upload directories
+        db.create_all(bind_key=None)
+        migrate_schema()
+        with db.engine.begin() as connection:
+            install_sync_triggers(connection)
+        ensure_partitions()
+    yield app
+    with app.app_context():
+        db.engine.dispose()
+
+
+@pytest.fixture
+def pg_app(_pg_database):
+    yield _pg_database
+    with _pg_database.app_context():
+        db.session.remove()
+        tables = ', '.join(t.name for t in db.metadata.sorted_tables if t.name != 'schema_migrations')
+        with db.engine.begin() as connection:
+            connection.execute(text(f"TRUNCATE {tables} RESTART IDENTITY CASCADE"))
+
+
+@pytest.fixture
+def auth_headers():
+    """auth_headers(user) -> Authorization header for that user (inside an app context)"""
+    return lambda user: {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
@@ -0,0 +1,48 @@
+"""Keyset pages of a task's comments: ?before= goes back, ?since= catches up."""
+import pytest
+
+from app import db
+from app.models import User, Project, Task, Comment
+
+
+@pytest.fixture
+def five_comments(sqlite_app, auth_headers):
+    app = sqlite_app(User, Project, Task, Comment)
+    with app.app_context():
+        user = User(name='Member', email='member@example.com', password='x', role='member')
+        project = Project(name='Launch')
+        db.session.add_all([user, project])
+        db.session.flush()
+        db.session.add(Task(project_id=project.id, task_number=1, title='Ship', comment_count=5))
+        comments = [Comment(content=f'c{i}', task_project_id=project.id, task_number=1, user_id=user.id)
+                    for i in range(1, 6)]
+        db.session.add_all(comments)
+        db.session.commit()
+        url = f'/projects/{project.id}/tasks/1/comments?per_page=2'
+        return app.test_client(), url, auth_headers(user), {c.content: c.id for c in comments}
+
+
+def page(client, url, headers, ids, **args):
+    response = client.get(url + ''.join(f'&{k}={ids[v]}' for k, v in args.items()), headers=headers)
+    assert response.status_code == 200
+    body = response.get_json()
+    return [c['content'] for c in body['comments']], body['has_more']
+
+
+def test_before_pages_back_newest_first(five_comments):
+    assert page(*five_comments) == (['c5', 'c4'], True)
+    assert page(*five_comments, before='c4') == (['c3', 'c2'], True)
+    assert page(*five_comments, before='c2') == (['c1'], False)
+
+
+def test_since_pages_forward_from_the_oldest_new_comment(five_comments):
+    # Four comments after c1 but a page of two: c2 and c3, shown newest first
+    assert page(*five_comments, since='c1') == (['c3', 'c2'], True)
+    assert page(*five_comments, since='c3') == (['c5', 'c4'], False)
+    assert page(*five_comments, since='c5') == ([], False)
+
+
+def test_before_and_since_together_are_rejected(five_comments):
+    client, url, headers, ids = five_comments
+    response = client.get(f"{url}&before={ids['c4']}&since={ids['c1']}", headers=headers)
+    assert response.status_code == 400
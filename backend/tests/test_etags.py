@@ -0,0 +1,67 @@
+"""ETags of views that count overdue tasks change when a task goes overdue.
+
+No row is written when a due date passes, so without a time component the
+project list would keep answering 304 with a stale overdue_count.
+"""
+from datetime import datetime, timedelta
+import pytest
+
+import app.etag as etag
+from app import db
+from app.models import User, Project, Task
+
+DUE = datetime(2026, 3, 2, 9, 0)
+
+
+def _clock(monkeypatch, now):
+    class Clock(datetime):
+        @classmethod
+        def utcnow(cls):
+            return now
+    monkeypatch.setattr(etag, 'datetime', Clock)
+
+
+@pytest.fixture
+def project_with_due_task(pg_app, auth_headers):
+    app = pg_app
+    with app.app_context():
+        admin = User(name='Admin', email='admin@example.com', password='x', role='admin')
+        member = User(name='Member', email='member@example.com', password='x', role='member')
+        project = Project(name='Launch', members=[member])
+        db.session.add_all([admin, member, project])
+        db.session.flush()
+        db.session.add(Task(project_id=project.id, task_number=1, title='Ship', status='todo', due_date=DUE))
+        db.session.commit()
+        return app, auth_headers(admin), admin.id, member.id, project.id
+
+
+def test_project_list_etag_changes_once_a_task_is_overdue(project_with_due_task, monkeypatch):
+    app, headers, *_ = project_with_due_task
+    client = app.test_client()
+    _clock(monkeypatch, DUE - timedelta(minutes=5))
+    etag_before = client.get('/admin/projects', headers=headers).headers['ETag']
+    assert client.get('/admin/projects', headers={**headers, 'If-None-Match': etag_before}).status_code == 304
+
+    _clock(monkeypatch, DUE + timedelta(minutes=5))
+    response = client.get('/admin/projects', headers={**headers, 'If-None-Match': etag_before})
+    assert response.status_code == 200
+    assert response.get_json()['projects'][0]['overdue_count'] == 1
+
+
+def test_overdue_counting_stamps_follow_the_clock(project_with_due_task, monkeypatch):
+    app, _, admin_id, member_id, project_id = project_with_due_task
+    with app.test_request_context():
+        def stamps():
+            return (
+                etag.projects_version(admin_id),
+                etag.member_projects_version(member_id),
+                etag.reports_version(admin_id),
+                etag.project_version(admin_id, project_id),
+            )
+        _clock(monkeypatch, DUE - timedelta(hours=1))
+        early = stamps()
+        _clock(monkeypatch, DUE - timedelta(minutes=1))
+        assert stamps() == early  # nothing went overdue in between
+        _clock(monkeypatch, DUE + timedelta(minutes=1))
+        late = stamps()
+        assert all(before != after for before, after in zip(early, late))
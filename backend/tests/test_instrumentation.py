@@ -0,0 +1,44 @@
+"""Query budgets from QUERY_BUDGETS fail tests on extra statements; Server-Timing reports them."""
+import pytest
+
+from app import db
+from app.instrumentation import QueryBudgetExceeded, assert_max_queries
+from app.models import User
+
+
+@pytest.fixture
+def instrumented(sqlite_app, auth_headers):
+    def make(budgets):
+        app = sqlite_app(User, SQL_INSTRUMENTATION='true', QUERY_BUDGETS=budgets)
+        with app.app_context():
+            user = User(name='Member', email='member@example.com', password='x', role='member')
+            db.session.add(user)
+            db.session.commit()
+            return app.test_client(), auth_headers(user)
+    return make
+
+
+def test_budgets_are_read_from_the_environment(instrumented):
+    client, headers = instrumented('{"main.get_profile": 1}')
+    assert client.application.config['QUERY_BUDGETS'] == {'main.get_profile': 1}
+    response = client.get('/profile', headers=headers)
+    assert response.status_code == 200
+    db_timing, app_timing = response.headers['Server-Timing'].split(', ')
+    assert db_timing.startswith('db;dur=') and db_timing.endswith('desc="1 queries"')
+    assert app_timing.startswith('app;dur=')
+
+
+def test_going_over_the_budget_fails_under_testing(instrumented):
+    client, headers = instrumented('{"main.get_profile": 0}')
+    with pytest.raises(QueryBudgetExceeded, match=r"main\.get_profile.*budget of 0"):
+        client.get('/profile', headers=headers)
+
+
+def test_assert_max_queries(instrumented):
+    client, headers = instrumented('{}')
+    with assert_max_queries(1) as stats:
+        client.get('/profile', headers=headers)
+    assert stats.count == 1
+    with pytest.raises(QueryBudgetExceeded):
+        with assert_max_queries(0):
+            client.get('/profile', headers=headers)
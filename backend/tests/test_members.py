@@ -0,0 +1,58 @@
+"""GET /admin/members counts every member's tasks by status in one query."""
+import pytest
+
+from app import db
+from app.models import User, Project, Task
+
+
+@pytest.fixture
+def admin_app(sqlite_app, auth_headers):
+    app = sqlite_app(User, Project, Task, SQL_INSTRUMENTATION='true')
+    with app.app_context():
+        admin = User(name='Admin', email='admin@example.com', password='x', role='admin')
+        project = Project(name='Launch')
+        db.session.add_all([admin, project])
+        db.session.commit()
+        return app, auth_headers(admin), project.id
+
+
+def add_member(app, project_id, name, statuses):
+    with app.app_context():
+        user = User(name=name, email=f'{name}@example.com', password='x', role='member')
+        db.session.add(user)
+        db.session.flush()
+        start = Task.query.filter_by(project_id=project_id).count()
+        db.session.add_all(Task(project_id=project_id, task_number=start + i + 1, title=status, status=status,
+                                assigned_to=user.id) for i, status in enumerate(statuses))
+        db.session.commit()
+
+
+def get_members(app, headers):
+    response = app.test_client().get('/admin/members', headers=headers)
+    assert response.status_code == 200
+    queries = int(response.headers['Server-Timing'].split('desc="')[1].split(' ')[0])
+    return {m['name']: m['task_counts'] for m in response.get_json()['members']}, queries
+
+
+def test_task_counts_by_status(admin_app):
+    app, headers, project_id = admin_app
+    add_member(app, project_id, 'ann', ['todo', 'todo', 'in_progress', 'completed'])
+    add_member(app, project_id, 'bob', ['pending_review'])
+    add_member(app, project_id, 'cy', [])
+
+    counts, _ = get_members(app, headers)
+    assert counts == {
+        'ann': {"assigned": 2, "in_progress": 1, "pending_review": 0, "completed": 1},
+        'bob': {"assigned": 0, "in_progress": 0, "pending_review": 1, "completed": 0},
+        'cy': {"assigned": 0, "in_progress": 0, "pending_review": 0, "completed": 0},
+    }
+
+
+def test_query_count_does_not_grow_with_members(admin_app):
+    app, headers, project_id = admin_app
+    add_member(app, project_id, 'ann', ['todo', 'completed'])
+    _, with_one = get_members(app, headers)
+    for name in ('bob', 'cy', 'dee'):
+        add_member(app, project_id, name, ['in_progress'])
+    _, with_four = get_members(app, headers)
+    assert with_four == with_one
@@ -0,0 +1,86 @@
+"""Coalescing of repeated notifications and the unread badge around mark-all-as-read."""
+import importlib
+from datetime import datetime, timedelta
+import pytest
+
+from app import db
+from app.models import User, Project, Notification
+
+shared_routes = importlib.import_module('app.routes.shared')  # the attribute is the blueprint
+
+
+class Clock(datetime):
+    now = None
+
+    @classmethod
+    def utcnow(cls):
+        return cls.now
+
+
+@pytest.fixture
+def recipient(pg_app, auth_headers, monkeypatch):
+    monkeypatch.setattr(shared_routes, 'datetime', Clock)
+    Clock.now = datetime.utcnow()
+    with pg_app.app_context():
+        user = User(name='Member', email='member@example.com', password='x', role='member')
+        project = Project(name='Launch')
+        db.session.add_all([user, project])
+        db.session.commit()
+        return pg_app, user.id, project.id, auth_headers(user)
+
+
+def notify(app, user_id, project_id, notification_type, message):
+    with app.test_request_context():
+        shared_routes.create_notification(user_id, message, notification_type, project_id, 1, project_id)
+        db.session.commit()
+
+
+def listed(app, headers):
+    return app.test_client().get('/notifications', headers=headers).get_json()['notifications']
+
+
+def unread(app, headers):
+    return app.test_client().get('/notifications/unread-count', headers=headers).get_json()['count']
+
+
+def test_repeats_within_the_window_merge_into_one_row(recipient):
+    app, user_id, project_id, headers = recipient
+    notify(app, user_id, project_id, 'comment', "Ann commented")
+    Clock.now += timedelta(seconds=app.config['NOTIFICATION_COALESCE_SECONDS'] - 1)
+    notify(app, user_id, project_id, 'comment', "Bob commented")
+
+    [merged] = listed(app, headers)
+    assert merged['count'] == 2
+    assert merged['message'] == "2 new comments on task #1 - latest: Bob commented"
+    assert unread(app, headers) == 1
+
+
+def test_a_repeat_after_the_window_adds_a_row(recipient):
+    app, user_id, project_id, headers = recipient
+    notify(app, user_id, project_id, 'comment', "Ann commented")
+    Clock.now += timedelta(seconds=app.config['NOTIFICATION_COALESCE_SECONDS'] + 1)
+    notify(app, user_id, project_id, 'comment', "Bob commented")
+
+    assert [(n['message'], n['count']) for n in listed(app, headers)] == [("Bob commented", 1), ("Ann commented", 1)]
+    assert unread(app, headers) == 2
+
+
+def test_unread_count_after_mark_all_read_and_a_new_notification(recipient):
+    app, user_id, project_id, headers = recipient
+    notify(app, user_id, project_id, 'comment', "Ann commented")
+    notify(app, user_id, project_id, 'assignment', "You were assigned")
+    assert unread(app, headers) == 2
+
+    Clock.now += timedelta(seconds=1)
+    assert app.test_client().put('/notifications/read-all', headers=headers).status_code == 200
+    assert unread(app, headers) == 0
+
+    # Within the window, but the earlier comment is read: a new row, not a merge
+    Clock.now += timedelta(seconds=1)
+    notify(app, user_id, project_id, 'comment', "Bob commented")
+    assert unread(app, headers) == 1
+    assert [(n['message'], n['is_read']) for n in listed(app, headers)] == [
+        ("Bob commented", False), ("You were assigned", True), ("Ann commented", True)
+    ]
+    with app.app_context():
+        assert Notification.query.count() == 3
@@ -0,0 +1,42 @@
+"""Creating a month moves that month's rows out of the default partition."""
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+from app import db
+from app.models import User, Notification
+from app.partitions import add_months, create_month_partitions, partition_name
+
+
+def partition_of(notification_id):
+    return db.session.execute(text(
+        "SELECT tableoid::regclass::text FROM notifications WHERE id = :id"
+    ), {"id": notification_id}).scalar()
+
+
+def test_default_partition_rows_move_into_a_new_month(pg_app):
+    month = add_months(datetime.utcnow(), 12)  # past the PARTITION_MONTHS_AHEAD created by init-db
+    with pg_app.app_context():
+        user = User(name='Member', email='member@example.com', password='x', role='member')
+        db.session.add(user)
+        db.session.flush()
+        in_month, later = (
+            Notification(user_id=user.id, message=message, type='assignment', created_at=created_at)
+            for message, created_at in (("in the month", month + timedelta(days=3)),
+                                        ("a month later", add_months(month, 1)))
+        )
+        db.session.add_all([in_month, later])
+        db.session.commit()
+        ids = in_month.id, later.id
+        assert partition_of(ids[0]) == partition_of(ids[1]) == 'notifications_default'
+        db.session.commit()  # attaching waits for open transactions that read the default partition
+
+        with db.engine.begin() as connection:
+            created = create_month_partitions(connection, 'notifications', months_ahead=0, now=month)
+        assert created == [partition_name('notifications', month)]
+        assert partition_of(ids[0]) == partition_name('notifications', month)
+        assert partition_of(ids[1]) == 'notifications_default'
+        assert Notification.query.count() == 2
+        db.session.commit()
+
+        with db.engine.begin() as connection:
+            connection.execute(text(f"DROP TABLE {created[0]}"))  # the other tests expect the init-db partitions
@@ -0,0 +1,91 @@
+"""The project counters equal a fresh COUNT(*) after every route that moves them."""
+import pytest
+
+from app import db
+from app.counters import STATUS_COUNTERS, verify_project_counters
+from app.models import User, Project, Task, Attachment, project_members
+
+
+@pytest.fixture
+def admin_client(pg_app, auth_headers):
+    with pg_app.app_context():
+        admin = User(name='Admin', email='admin@example.com', password='x', role='admin')
+        members = [User(name=f'Member {i}', email=f'm{i}@example.com', password='x', role='member') for i in range(3)]
+        db.session.add_all([admin, *members])
+        db.session.commit()
+        headers = {'admin': auth_headers(admin), **{m.id: auth_headers(m) for m in members}}
+        return pg_app.test_client(), headers, [m.id for m in members]
+
+
+def fresh_counts(project_id):
+    tasks = Task.query.filter_by(project_id=project_id)
+    counts = {'task_count': tasks.count()}
+    counts.update({column: tasks.filter_by(status=status).count() for status, column in STATUS_COUNTERS.items()})
+    counts['attachment_count'] = Attachment.query.filter_by(task_project_id=project_id).count()
+    counts['member_count'] = db.session.query(project_members).filter_by(project_id=project_id).count()
+    return counts
+
+
+def assert_counters_match(app, project_id):
+    with app.app_context():
+        project = db.session.get(Project, project_id)
+        assert {name: getattr(project, name) for name in fresh_counts(project_id)} == fresh_counts(project_id)
+        assert verify_project_counters()['drifted'] == 0
+
+
+def test_counters_follow_task_and_member_changes(admin_client):
+    client, headers, (m1, m2, m3) = admin_client
+    app, admin = client.application, headers['admin']
+
+    def ok(response):
+        assert response.status_code in (200, 201), response.get_json()
+        return response.get_json()
+
+    project_id = ok(client.post('/admin/projects', json={'name': 'Launch'}, headers=admin))['project_id']
+    ok(client.put(f'/admin/projects/{project_id}/members', json={'member_ids': [m1, m2]}, headers=admin))
+    assert_counters_match(app, project_id)
+    ok(client.patch(f'/admin/projects/{project_id}/members', json={'add': [m3], 'remove': [m1]}, headers=admin))
+    assert_counters_match(app, project_id)
+
+    for status in ('todo', 'in_progress', 'pending_review'):
+        ok(client.post(f'/admin/projects/{project_id}/tasks',
+                       json={'title': status, 'status': status, 'assigned_to': m2}, headers=admin))
+    assert_counters_match(app, project_id)
+
+    tasks = f'/projects/{project_id}/tasks'
+    ok(client.post(f'/member{tasks}/1/attachment', json={'filename': 'a.txt', 'file_url': '/a.txt'}, headers=headers[m2]))
+    ok(client.put(f'/member{tasks}/2/status', json={'status': 'completed'}, headers=headers[m2]))
+    ok(client.put(f'/admin{tasks}/1', json={'status': 'in_progress'}, headers=admin))
+    ok(client.put(f'/admin{tasks}/3/approve', headers=admin))
+    assert_counters_match(app, project_id)
+
+    ok(client.delete(f'/admin{tasks}/1', headers=admin))  # with its attachment
+    assert_counters_match(app, project_id)
+
+    ok(client.post(f'/admin/projects/{project_id}/tasks', json={'title': 'late', 'assigned_to': m3}, headers=admin))
+    assert client.put(f'/admin/projects/{project_id}/complete', headers=admin).status_code == 400
+    assert ok(client.put(f'/admin/projects/{project_id}/complete?force=true', headers=admin))['forced_tasks'] == 2
+    assert_counters_match(app, project_id)
+
+    with app.app_context():
+        project = db.session.get(Project, project_id)
+        assert (project.task_count, project.completed_count, project.member_count) == (3, 3, 2)
+
+
+def test_verify_counters_command(admin_client):
+    client, headers, _ = admin_client
+    app = client.application
+    project_id = client.post('/admin/projects', json={'name': 'Drifting'}, headers=headers['admin']).get_json()['project_id']
+    with app.app_context():
+        db.session.execute(db.update(Project).where(Project.id == project_id).values(task_count=5, member_count=2))
+        db.session.commit()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=['verify-counters'])
+    assert result.exit_code == 1
+    assert "'drifted': 1" in result.output and f"'project_ids': [{project_id}]" in result.output
+
+    result = runner.invoke(args=['verify-counters', '--repair'])
+    assert result.exit_code == 0 and "'repaired': True" in result.output
+    assert runner.invoke(args=['verify-counters']).exit_code == 0
+    assert_counters_match(app, project_id)
@@ -0,0 +1,50 @@
+"""GET /sync must read the primary even when a replica is configured.
+
+The "replica" here is a second SQLite database that lags: it has none of
+the rows written to the primary. If /sync read it, the user lookup would
+404 and the changes would be missing although the cursor covers them.
+"""
+import sys
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app, db
+from app.models import User, Project
+
+
+@pytest.fixture
+def lagging_replica(tmp_path, monkeypatch):
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'primary.db'}")
+    monkeypatch.setenv('DATABASE_REPLICA_URLS', f"sqlite:///{tmp_path / 'replica.db'}")
+    monkeypatch.setenv('RATE_LIMIT_ENABLED', 'false')
+    app = create_app()
+    tables = [User.__table__, Project.__table__]
+    with app.app_context():
+        for engine in (db.engines[None], db.engines['replica_0']):
+            db.metadata.create_all(engine, tables=tables)
+        user = User(name='Admin', email='admin@example.com', password='x', role='admin')
+        db.session.add_all([user, Project(name='Written on the primary')])
+        db.session.commit()
+        token = create_access_token(identity=str(user.id))
+
+    # The cursor and change queries are PostgreSQL specific; record what they see instead
+    shared_routes = sys.modules['app.routes.shared']  # app.routes.shared is the blueprint
+    monkeypatch.setattr(shared_routes, 'current_cursor', lambda: 1)
+    monkeypatch.setattr(shared_routes, 'changes_since', lambda user, since: {
+        "projects": [p.name for p in Project.query.all()]
+    })
+    return app, {'Authorization': f'Bearer {token}'}
+
+
+def test_sync_reads_the_primary(lagging_replica):
+    app, headers = lagging_replica
+    response = app.test_client().get('/sync?since=1', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['projects'] == ['Written on the primary']
+
+
+def test_other_reads_use_the_lagging_replica(lagging_replica):
+    app, headers = lagging_replica
+    with app.test_request_context('/admin/projects', headers=headers):
+        app.preprocess_request()
+        assert Project.query.count() == 0
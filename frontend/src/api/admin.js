@@ -66,6 +66,34 @@ export const getProjectById = async (id, token) => {
   return res.json();
 };
 
+export const getProjectSummary = async (id, token) => {
+  const res = await fetch(`${BASE_URL}/projects/${id}/summary`, {
+    headers: { Authorization: `Bearer ${token}` }
+  });
+  return res.json();
+};
+
+export const getProjectTasksPage = async (id, page, perPage, token) => {
+  const res = await fetch(`${BASE_URL}/projects/${id}/tasks?page=${page}&per_page=${perPage}`, {
+    headers: { Authorization: `Bearer ${token}` }
+  });
+  return res.json();
+};
+
+export const getProjectMembers = async (id, token) => {
+  const res = await fetch(`${BASE_URL}/projects/${id}/members`, {
+    headers: { Authorization: `Bearer ${token}` }
+  });
+  return res.json();
+};
+
+export const getProjectActivity = async (id, page, token) => {
+  const res = await fetch(`${BASE_URL}/projects/${id}/activity?page=${page}`, {
+    headers: { Authorization: `Bearer ${token}` }
+  });
+  return res.json();
+};
+
 export const updateProjectMembers = async (projectId, memberIds, token) => {
   const res = await fetch(`${BASE_URL}/projects/${projectId}/members`, {
     method: "PUT",
@@ -75,6 +103,19 @@ export const updateProjectMembers = async (projectId, memberIds, token) => {
   return res.json();
 };
 
+// Add and/or remove members without sending the full list
+export const changeProjectMembers = async (projectId, { add = [], remove = [] }, token) => {
+  const res = await fetch(`${BASE_URL}/projects/${projectId}/members`, {
+    method: "PATCH",
+    headers: {
+      "Content-Type": "application/json",
+      Authorization: `Bearer ${token}`
+    },
+    body: JSON.stringify({ add, remove })
+  });
+  return res.json();
+};
+
 export const createTask = async (projectId, task, token) => {
   const res = await fetch(`${BASE_URL}/projects/${projectId}/tasks`, {
     method: "POST",
@@ -129,8 +170,8 @@ export const deleteMember = async (userId, token) => {
   return res.json();
 };
 
-export const completeProject = async (projectId, token) => {
-  const res = await fetch(`${BASE_URL}/projects/${projectId}/complete`, {
+export const completeProject = async (projectId, token, force = false) => {
+  const res = await fetch(`${BASE_URL}/projects/${projectId}/complete${force ? '?force=true' : ''}`, {
     method: "PUT",
     headers: { Authorization: `Bearer ${token}` }
   });
@@ -168,3 +209,12 @@ export const addAdminComment = async (projectId, taskNumber, content, token) =>
   });
   return res.json();
 };
+
+// report: "burndown", "cumulative-flow" or "throughput"; params: { project_id } or { member_id }, optional from/to
+export const getTrendReport = async (report, params, token) => {
+  const query = new URLSearchParams(params);
+  const res = await fetch(`${BASE_URL}/reports/${report}?${query}`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  return res.json();
+};
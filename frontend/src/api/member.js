@@ -22,6 +22,34 @@ export const getProjectTasks = async (projectId, token) => {
   return res.json();
 };
 
+export const getProjectSummary = async (projectId, token) => {
+  const res = await fetch(`${BASE_URL}/projects/${projectId}/summary`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  return res.json();
+};
+
+export const getProjectTasksPage = async (projectId, page, perPage, token) => {
+  const res = await fetch(`${BASE_URL}/projects/${projectId}/tasks?page=${page}&per_page=${perPage}`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  return res.json();
+};
+
+export const getProjectMembers = async (projectId, token) => {
+  const res = await fetch(`${BASE_URL}/projects/${projectId}/members`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  return res.json();
+};
+
+export const getProjectActivity = async (projectId, page, token) => {
+  const res = await fetch(`${BASE_URL}/projects/${projectId}/activity?page=${page}`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  return res.json();
+};
+
 export const updateTaskStatus = async (projectId, taskNumber, status, token) => {
   const res = await fetch(`${BASE_URL}/projects/${projectId}/tasks/${taskNumber}/status`, {
     method: "PUT",
@@ -40,8 +68,10 @@ export const addComment = async (projectId, taskNumber, content, token) => {
   return res.json();
 };
 
-export const getTaskComments = async (projectId, taskNumber, token) => {
-  const res = await fetch(`${API_URL}/projects/${projectId}/tasks/${taskNumber}/comments`, {
+// params: { before } for older comments, { since } for comments added after that id
+export const getTaskComments = async (projectId, taskNumber, token, params = {}) => {
+  const query = new URLSearchParams(params);
+  const res = await fetch(`${API_URL}/projects/${projectId}/tasks/${taskNumber}/comments?${query}`, {
     headers: { Authorization: `Bearer ${token}` },
   });
   return res.json();
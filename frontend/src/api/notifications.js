@@ -29,3 +29,19 @@ export const markAllAsRead = async (token) => {
   });
   return res.json();
 };
+
+export const getNotificationSettings = async (token) => {
+  const res = await fetch(`${API_URL}/notifications/settings`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  return res.json();
+};
+
+export const updateNotificationSettings = async (settings, token) => {
+  const res = await fetch(`${API_URL}/notifications/settings`, {
+    method: "PUT",
+    headers: { "Content-Type": "application/json", Authorization: `Bearer ${token}` },
+    body: JSON.stringify(settings),
+  });
+  return res.json();
+};
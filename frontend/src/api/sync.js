@@ -0,0 +1,11 @@
+const API_URL = import.meta.env.VITE_API_URL || "http://localhost:5000";
+
+// Changes since a cursor from an earlier call. Without a cursor, or when the
+// response has reset: true, reload the full lists and keep the new cursor.
+export const getChanges = async (since, token) => {
+  const query = since === undefined || since === null ? "" : `?since=${since}`;
+  const res = await fetch(`${API_URL}/sync${query}`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  return res.json();
+};
@@ -147,6 +147,15 @@ const NotificationPanel = () => {
             </svg>
           </div>
         );
+      case 'due_soon':
+      case 'overdue':
+        return (
+          <div className={`w-8 h-8 rounded-full ${type === 'overdue' ? 'bg-red-100' : 'bg-amber-100'} flex items-center justify-center`}>
+            <svg className={`w-4 h-4 ${type === 'overdue' ? 'text-red-600' : 'text-amber-600'}`} fill="none" stroke="currentColor" viewBox="0 0 24 24">
+              <path strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M12 8v4l3 3m6-3a9 9 0 11-18 0 9 9 0 0118 0z" />
+            </svg>
+          </div>
+        );
       default:
         return (
           <div className="w-8 h-8 rounded-full bg-slate-100 flex items-center justify-center">
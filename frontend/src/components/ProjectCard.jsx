@@ -42,6 +42,22 @@ const ProjectCard = ({ project }) => {
             </p>
           )}
         </div>
+        {project.task_count > 0 && (
+          <div className="mb-4">
+            <div className="flex justify-between text-xs text-gray-500 mb-1">
+              <span>{project.completed_count}/{project.task_count} tasks done</span>
+              {project.overdue_count > 0 && (
+                <span className="font-medium text-red-600">{project.overdue_count} overdue</span>
+              )}
+            </div>
+            <div className="w-full h-2 bg-gray-200 rounded-full overflow-hidden">
+              <div
+                className="h-full bg-green-500"
+                style={{ width: `${Math.round((project.completed_count / project.task_count) * 100)}%` }}
+              />
+            </div>
+          </div>
+        )}
         <Link
           to={`/projects/${project.id}`}
           className="inline-block w-full text-center py-2 px-4 border border-transparent text-sm font-medium rounded-lg text-white bg-blue-600 hover:bg-blue-700 transition-colors duration-200"
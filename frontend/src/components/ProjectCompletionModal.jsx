@@ -1,21 +1,27 @@
 import React, { useState } from "react";
 import { completeProject } from "../api/admin";
 
-const ProjectCompletionModal = ({ projectId, projectName, tasks, isOpen, onClose, onCompleted }) => {
+const ProjectCompletionModal = ({ projectId, projectName, tasks, counts, isOpen, onClose, onCompleted }) => {
   const token = localStorage.getItem("token");
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [error, setError] = useState(null);
+  const [forceComplete, setForceComplete] = useState(false);
 
   const completedTasks = tasks.filter(t => t.status === 'completed');
   const pendingTasks = tasks.filter(t => t.status !== 'completed');
-  const allCompleted = pendingTasks.length === 0;
+  // The lists only hold the loaded pages of tasks; the project counters cover all of them
+  const totalCount = counts ? counts.tasks : tasks.length;
+  const completedCount = counts ? counts.completed : completedTasks.length;
+  const pendingCount = totalCount - completedCount;
+  const allCompleted = pendingCount === 0;
+  const canComplete = allCompleted || forceComplete;
 
   const handleComplete = async () => {
     setIsSubmitting(true);
     setError(null);
 
     try {
-      const result = await completeProject(projectId, token);
+      const result = await completeProject(projectId, token, forceComplete);
       if (result.msg && !result.pending_tasks) {
         // Success
         onCompleted();
@@ -60,7 +66,7 @@ const ProjectCompletionModal = ({ projectId, projectName, tasks, isOpen, onClose
           {/* Completed Tasks */}
           <div>
             <h5 className="font-semibold text-green-700 mb-2">
-              ✓ Completed Tasks ({completedTasks.length})
+              ✓ Completed Tasks ({completedCount})
             </h5>
             {completedTasks.length > 0 ? (
               <ul className="space-y-1 ml-4">
@@ -79,7 +85,7 @@ const ProjectCompletionModal = ({ projectId, projectName, tasks, isOpen, onClose
           {pendingTasks.length > 0 && (
             <div>
               <h5 className="font-semibold text-red-700 mb-2">
-                ⚠ Pending Tasks ({pendingTasks.length})
+                ⚠ Pending Tasks ({pendingCount})
               </h5>
               <ul className="space-y-1 ml-4">
                 {pendingTasks.map(task => (
@@ -94,10 +100,21 @@ const ProjectCompletionModal = ({ projectId, projectName, tasks, isOpen, onClose
           {/* Summary */}
           <div className="p-3 bg-gray-50 rounded-lg">
             <p className="text-sm text-gray-700">
-              <strong>{completedTasks.length}/{tasks.length}</strong> tasks completed
+              <strong>{completedCount}/{totalCount}</strong> tasks completed
             </p>
           </div>
 
+          {!allCompleted && (
+            <label className="flex items-center gap-2 text-sm text-gray-700">
+              <input
+                type="checkbox"
+                checked={forceComplete}
+                onChange={(e) => setForceComplete(e.target.checked)}
+              />
+              Also mark the {pendingCount} pending tasks as completed
+            </label>
+          )}
+
           {/* Buttons */}
           <div className="flex gap-3 pt-4">
             <button
@@ -108,18 +125,18 @@ const ProjectCompletionModal = ({ projectId, projectName, tasks, isOpen, onClose
             </button>
             <button
               onClick={handleComplete}
-              disabled={!allCompleted || isSubmitting}
+              disabled={!canComplete || isSubmitting}
               className={`flex-1 py-2 px-4 font-semibold rounded-lg transition duration-200 ${
-                allCompleted
+                canComplete
                   ? 'bg-green-600 hover:bg-green-700 text-white'
                   : 'bg-gray-300 text-gray-500 cursor-not-allowed'
               }`}
             >
-              {isSubmitting ? "Completing..." : allCompleted ? "Complete Project" : "Cannot Complete"}
+              {isSubmitting ? "Completing..." : canComplete ? "Complete Project" : "Cannot Complete"}
             </button>
           </div>
 
-          {!allCompleted && (
+          {!canComplete && (
             <p className="text-sm text-red-600 text-center">
               All tasks must be completed before marking the project as complete.
             </p>
@@ -15,7 +15,8 @@ const TaskItem = ({ task, onTaskUpdated, onTaskEdit, isHighlighted }) => {
   const [newComment, setNewComment] = useState("");
   const [showComments, setShowComments] = useState(false);
   const [isFileModalOpen, setIsFileModalOpen] = useState(false);
-  const [commentCount, setCommentCount] = useState(0);
+  const [commentCount, setCommentCount] = useState(task.comment_count || 0);
+  const [hasOlderComments, setHasOlderComments] = useState(false);
   const [fileCount, setFileCount] = useState(task.attachments_count || 0);
   
   // Confirmation modal states
@@ -35,13 +36,34 @@ const TaskItem = ({ task, onTaskUpdated, onTaskEdit, isHighlighted }) => {
   const fetchComments = async () => {
     const res = await getTaskComments(task.project_id, task.task_number, token);
     setComments(res.comments);
-    setCommentCount(res.comments.length);
+    setHasOlderComments(res.has_more);
+    setCommentCount(res.comment_count);
   };
 
-  // Fetch comment count on mount
+  // Only the comments added since the newest one shown
+  const fetchNewComments = async () => {
+    if (comments.length === 0) return fetchComments();
+    const res = await getTaskComments(task.project_id, task.task_number, token, { since: comments[0].id });
+    setComments(prev => [...res.comments, ...prev]);
+    setCommentCount(res.comment_count);
+    if (res.has_more) fetchComments();
+  };
+
+  const fetchOlderComments = async () => {
+    const oldest = comments[comments.length - 1];
+    const res = await getTaskComments(task.project_id, task.task_number, token, { before: oldest.id });
+    setComments(prev => [...prev, ...res.comments]);
+    setHasOlderComments(res.has_more);
+  };
+
+  // The count comes with the task; comments are loaded when the panel opens
   useEffect(() => {
-    fetchComments();
-  }, [task.project_id, task.task_number]);
+    setCommentCount(task.comment_count || 0);
+  }, [task.comment_count]);
+
+  useEffect(() => {
+    if (showComments) fetchComments();
+  }, [showComments, task.project_id, task.task_number]);
 
   // Update file count from task prop when it changes
   useEffect(() => {
@@ -57,7 +79,7 @@ const TaskItem = ({ task, onTaskUpdated, onTaskEdit, isHighlighted }) => {
       await addComment(task.project_id, task.task_number, newComment, token);
     }
     setNewComment("");
-    fetchComments();
+    fetchNewComments();
   };
 
   const handleStatusChange = async (newStatus) => {
@@ -72,7 +94,7 @@ const TaskItem = ({ task, onTaskUpdated, onTaskEdit, isHighlighted }) => {
 
   const handleRejectTask = async (reason) => {
     await rejectTaskCompletion(task.project_id, task.task_number, reason, token);
-    await fetchComments(); // Refresh comments to show rejection reason
+    if (showComments) await fetchNewComments(); // Show the rejection reason
     onTaskUpdated();
   };
 
@@ -393,6 +415,17 @@ const TaskItem = ({ task, onTaskUpdated, onTaskEdit, isHighlighted }) => {
                     </div>
                   </li>
                 ))}
+                {hasOlderComments && (
+                  <li>
+                    <button
+                      type="button"
+                      onClick={fetchOlderComments}
+                      className="text-xs text-indigo-600 hover:text-indigo-800 font-medium"
+                    >
+                      Show older comments
+                    </button>
+                  </li>
+                )}
               </ul>
             ) : (
               <p className="text-sm text-slate-400 mb-4">No comments yet</p>
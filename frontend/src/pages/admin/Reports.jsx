@@ -5,6 +5,10 @@ import {
   Cell,
   BarChart,
   Bar,
+  AreaChart,
+  Area,
+  LineChart,
+  Line,
   XAxis,
   YAxis,
   CartesianGrid,
@@ -12,12 +16,15 @@ import {
   Legend,
   ResponsiveContainer,
 } from "recharts";
+import { getTrendReport } from "../../api/admin";
 
 const API_URL = import.meta.env.VITE_API_URL || "http://localhost:5000";
 
 const Reports = () => {
   const [stats, setStats] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [trendProjectId, setTrendProjectId] = useState(null);
+  const [trends, setTrends] = useState(null);
   const token = localStorage.getItem("token");
 
   useEffect(() => {
@@ -40,6 +47,27 @@ const Reports = () => {
     fetchStats();
   }, [token]);
 
+  // Trend charts of one project, read from the daily snapshots
+  useEffect(() => {
+    if (!trendProjectId) return;
+    const fetchTrends = async () => {
+      const params = { project_id: trendProjectId };
+      const [burndown, flow, throughput] = await Promise.all([
+        getTrendReport("burndown", params, token),
+        getTrendReport("cumulative-flow", params, token),
+        getTrendReport("throughput", params, token),
+      ]);
+      setTrends({ burndown: burndown.series, flow: flow.series, throughput: throughput.series });
+    };
+    fetchTrends().catch((error) => console.error("Error fetching trends:", error));
+  }, [trendProjectId, token]);
+
+  useEffect(() => {
+    if (!trendProjectId && stats?.project_progress?.length > 0) {
+      setTrendProjectId(stats.project_progress[0].id);
+    }
+  }, [stats]);
+
   if (loading) {
     return (
       <div className="flex items-center justify-center h-screen">
@@ -175,6 +203,70 @@ const Reports = () => {
         </div>
       </div>
 
+      {/* Project Trends */}
+      {stats.project_progress && stats.project_progress.length > 0 && (
+        <div className="bg-white p-6 rounded-lg shadow-lg border border-gray-200">
+          <div className="flex items-center justify-between mb-6">
+            <h2 className="text-2xl font-semibold text-gray-800">Project Trends (30 days)</h2>
+            <select
+              className="px-3 py-2 text-sm border border-gray-300 rounded-lg"
+              value={trendProjectId || ""}
+              onChange={(e) => setTrendProjectId(parseInt(e.target.value))}
+            >
+              {stats.project_progress.map((project) => (
+                <option key={project.id} value={project.id}>#{project.id} {project.name}</option>
+              ))}
+            </select>
+          </div>
+          {trends && trends.burndown.length > 0 ? (
+            <div className="grid grid-cols-1 lg:grid-cols-3 gap-6">
+              <div>
+                <h3 className="text-sm font-semibold text-gray-600 mb-2">Burndown</h3>
+                <ResponsiveContainer width="100%" height={220}>
+                  <LineChart data={trends.burndown}>
+                    <CartesianGrid strokeDasharray="3 3" />
+                    <XAxis dataKey="day" tick={{ fontSize: 10 }} />
+                    <YAxis allowDecimals={false} />
+                    <Tooltip />
+                    <Line type="monotone" dataKey="remaining" stroke="#f59e0b" dot={false} isAnimationActive={false} />
+                    <Line type="monotone" dataKey="total" stroke="#94a3b8" dot={false} isAnimationActive={false} />
+                  </LineChart>
+                </ResponsiveContainer>
+              </div>
+              <div>
+                <h3 className="text-sm font-semibold text-gray-600 mb-2">Cumulative Flow</h3>
+                <ResponsiveContainer width="100%" height={220}>
+                  <AreaChart data={trends.flow}>
+                    <CartesianGrid strokeDasharray="3 3" />
+                    <XAxis dataKey="day" tick={{ fontSize: 10 }} />
+                    <YAxis allowDecimals={false} />
+                    <Tooltip />
+                    <Area type="monotone" dataKey="completed" stackId="1" stroke="#10b981" fill="#10b981" isAnimationActive={false} />
+                    <Area type="monotone" dataKey="pending_review" stackId="1" stroke="#8b5cf6" fill="#8b5cf6" isAnimationActive={false} />
+                    <Area type="monotone" dataKey="in_progress" stackId="1" stroke="#f59e0b" fill="#f59e0b" isAnimationActive={false} />
+                    <Area type="monotone" dataKey="todo" stackId="1" stroke="#94a3b8" fill="#94a3b8" isAnimationActive={false} />
+                  </AreaChart>
+                </ResponsiveContainer>
+              </div>
+              <div>
+                <h3 className="text-sm font-semibold text-gray-600 mb-2">Throughput</h3>
+                <ResponsiveContainer width="100%" height={220}>
+                  <BarChart data={trends.throughput}>
+                    <CartesianGrid strokeDasharray="3 3" />
+                    <XAxis dataKey="day" tick={{ fontSize: 10 }} />
+                    <YAxis allowDecimals={false} />
+                    <Tooltip />
+                    <Bar dataKey="completed" fill="#10b981" isAnimationActive={false} />
+                  </BarChart>
+                </ResponsiveContainer>
+              </div>
+            </div>
+          ) : (
+            <p className="text-gray-500 text-center py-8">No snapshots recorded for this project yet</p>
+          )}
+        </div>
+      )}
+
       {/* Top Performers & Project Progress */}
       <div className="grid grid-cols-1 lg:grid-cols-2 gap-8">
         {/* Top Performers */}
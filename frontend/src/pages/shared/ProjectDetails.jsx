@@ -1,7 +1,7 @@
 import React, { useEffect, useState, useMemo } from "react";
 import { useParams, useNavigate, useSearchParams } from "react-router-dom";
-import { getProjectById, getMembers, deleteProject } from "../../api/admin";
-import { getProjectDetails as getMemberProjectDetails } from "../../api/member";
+import * as adminApi from "../../api/admin";
+import * as memberApi from "../../api/member";
 import { uploadProjectFile, getProjectFiles, deleteProjectFile, getMemberProjectFiles } from "../../api/files";
 import Sidebar from "../../components/Sidebar";
 import TaskList from "../../components/TaskList";
@@ -12,6 +12,8 @@ import ProjectCompletionModal from "../../components/ProjectCompletionModal";
 import FileUpload from "../../components/FileUpload";
 import FileList from "../../components/FileList";
 
+const TASKS_PER_PAGE = 50;
+
 const ProjectDetails = () => {
   const token = localStorage.getItem("token");
   const role = localStorage.getItem("role");
@@ -30,24 +32,52 @@ const ProjectDetails = () => {
   const [isUploadingFile, setIsUploadingFile] = useState(false);
   const [isFileUploadModalOpen, setIsFileUploadModalOpen] = useState(false);
   const [highlightedTask, setHighlightedTask] = useState(null);
+  const [activityPage, setActivityPage] = useState(1);
+  const [activityHasMore, setActivityHasMore] = useState(false);
+  const [taskPage, setTaskPage] = useState(1);
+  const [tasksHaveMore, setTasksHaveMore] = useState(false);
+
+  // Admin and member expose the same project section endpoints
+  const api = role === 'admin' ? adminApi : memberApi;
+
+  const fetchTasks = async (page = 1) => {
+    const res = await api.getProjectTasksPage(id, page, TASKS_PER_PAGE, token);
+    setProject(prev => ({
+      ...prev,
+      tasks: page === 1 ? res.tasks : [...prev.tasks, ...res.tasks]
+    }));
+    setTaskPage(page);
+    setTasksHaveMore(res.has_more);
+  };
+
+  const fetchMembers = async () => {
+    const res = await api.getProjectMembers(id, token);
+    setProject(prev => ({ ...prev, members: res.members }));
+  };
+
+  const fetchActivity = async (page = 1) => {
+    const res = await api.getProjectActivity(id, page, token);
+    setProject(prev => ({
+      ...prev,
+      activity_logs: page === 1 ? res.activity_logs : [...prev.activity_logs, ...res.activity_logs]
+    }));
+    setActivityPage(page);
+    setActivityHasMore(res.has_more);
+  };
 
   const fetchProjectDetails = async () => {
     try {
-      let res;
-      if (role === 'admin') {
-        res = await getProjectById(id, token);
-      } else {
-        // Member uses their own endpoint
-        res = await getMemberProjectDetails(id, token);
-      }
-      setProject(res.project);
+      // Render the summary first, then fill in each section as it arrives
+      const res = await api.getProjectSummary(id, token);
+      setProject(prev => ({ tasks: [], members: [], activity_logs: [], ...prev, ...res.project }));
+      await Promise.all([fetchTasks(1), fetchMembers(), fetchActivity(1)]);
     } catch (error) {
       console.error("Error fetching project details:", error);
     }
   };
 
   const fetchAllMembers = async () => {
-    const res = await getMembers(token);
+    const res = await adminApi.getMembers(token);
     setAllMembers(res.members);
   };
 
@@ -66,6 +96,7 @@ const ProjectDetails = () => {
   };
 
   useEffect(() => {
+    setProject(null);
     fetchProjectDetails();
     if (role === 'admin') {
       fetchAllMembers();
@@ -98,7 +129,7 @@ const ProjectDetails = () => {
 
   const handleDeleteProject = async () => {
     if (window.confirm(`Are you sure you want to delete project #${project.id}: ${project.name}?`)) {
-      await deleteProject(id, token);
+      await adminApi.deleteProject(id, token);
       navigate('/projects'); // Redirect to projects list after deletion
     }
   };
@@ -318,7 +349,7 @@ const ProjectDetails = () => {
           {/* Tasks */}
           <div className="col-span-2 p-4 border rounded-lg shadow-md bg-white max-h-[600px] overflow-y-auto">
             <div className="flex justify-between items-center mb-4">
-              <h2 className="text-xl font-semibold">Tasks ({project.tasks.length})</h2>
+              <h2 className="text-xl font-semibold">Tasks ({project.counts ? project.counts.tasks : project.tasks.length})</h2>
               {role === 'admin' && (
                 <button
                   onClick={() => setIsTaskModalOpen(true)}
@@ -349,6 +380,14 @@ const ProjectDetails = () => {
             ) : (
               <p className="text-gray-500 text-sm">No tasks for this project.</p>
             )}
+            {tasksHaveMore && (
+              <button
+                onClick={() => fetchTasks(taskPage + 1)}
+                className="mt-3 w-full py-1 text-xs font-semibold text-indigo-600 hover:text-indigo-800"
+              >
+                Load more tasks
+              </button>
+            )}
           </div>
 
           {/* Activity Logs */}
@@ -367,6 +406,14 @@ const ProjectDetails = () => {
                 <p className="text-gray-500 text-sm">No activities yet.</p>
               )}
             </ul>
+            {activityHasMore && (
+              <button
+                onClick={() => fetchActivity(activityPage + 1)}
+                className="mt-3 w-full py-1 text-xs font-semibold text-indigo-600 hover:text-indigo-800"
+              >
+                Load more
+              </button>
+            )}
           </div>
         </div>
 
@@ -402,6 +449,7 @@ const ProjectDetails = () => {
           projectId={id}
           projectName={project.name}
           tasks={sortedTasks}
+          counts={project.counts}
           isOpen={isCompletionModalOpen}
           onClose={() => setIsCompletionModalOpen(false)}
           onCompleted={handleProjectSaved}